@@ -0,0 +1,110 @@
+"""
+Сравнение бэкендов разбора HTML на корпусе сохранённых страниц.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.html_backends --corpus path/to/pages
+    python -m benchmarks.html_backends --synthetic 200
+
+Корпус - каталог с *.html (например, сохранённые `curl -o` страницы,
+которые парсят воркеры). Для каждого бэкенда выводится среднее время
+HttpParser.extract() на страницу и число страниц, где результат
+расходится с эталонным html.parser.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.parsers.exceptions import ParsingError
+from src.parsers.html_backends import available_html_backends
+from src.parsers.http import HttpParser
+
+REFERENCE_BACKEND = "html.parser"
+
+
+def load_corpus(directory: Path) -> list[tuple[str, str]]:
+    """Читает *.html из каталога; кодировка - utf-8 с заменой ошибок."""
+    pages = []
+    for path in sorted(directory.rglob("*.html")):
+        pages.append((path.name, path.read_bytes().decode("utf-8", errors="replace")))
+    return pages
+
+
+def synthetic_corpus(count: int) -> list[tuple[str, str]]:
+    """Страницы от ~10 КБ до ~2 МБ на случай, если корпуса под рукой нет."""
+    pages = []
+    for i in range(count):
+        rows = "".join(
+            f'<tr><td class="name">item {j}</td><td><a href="/items/{j}">link</a></td></tr>'
+            for j in range(50 * (1 + i % 40))
+        )
+        html = (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>Synthetic page {i}</title>"
+            "<script>var data = {};</script></head>"
+            f"<body><div id=\"content\"><table>{rows}</table></div></body></html>"
+        )
+        pages.append((f"synthetic-{i}.html", html))
+    return pages
+
+
+def extract_all(parser: HttpParser, pages: list[tuple[str, str]]) -> list[dict | str]:
+    results = []
+    for name, html in pages:
+        try:
+            results.append(parser.extract(name, html))
+        except ParsingError as e:
+            results.append(f"ParsingError: {e}")
+    return results
+
+
+def run(pages: list[tuple[str, str]], backends: list[str], repeat: int) -> None:
+    reference = extract_all(HttpParser(html_backend=REFERENCE_BACKEND), pages)
+    total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1024 / 1024
+    print(f"Корпус: {len(pages)} страниц, {total_mb:.1f} МБ; повторов: {repeat}")
+    print(f"{'backend':<12} {'ms/page':>10} {'pages/s':>10} {'speedup':>8} {'mismatch':>9}")
+
+    baseline = None
+    for backend in backends:
+        parser = HttpParser(html_backend=backend)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = extract_all(parser, pages)
+            timings.append(time.perf_counter() - started)
+
+        per_page = statistics.median(timings) / len(pages)
+        baseline = baseline or per_page
+        mismatches = sum(1 for got, want in zip(results, reference) if got != want)
+        print(
+            f"{backend:<12} {per_page * 1000:>10.3f} {1 / per_page:>10.0f} "
+            f"{baseline / per_page:>7.1f}x {mismatches:>9}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", type=Path, help="Каталог с сохранёнными *.html")
+    source.add_argument("--synthetic", type=int, metavar="N", help="Сгенерировать N страниц")
+    arg_parser.add_argument("--backend", action="append", help="Бэкенд (можно несколько); по умолчанию все установленные")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Сколько раз прогонять корпус (берётся медиана)")
+    args = arg_parser.parse_args(argv)
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.synthetic)
+    if not pages:
+        print("Корпус пуст", file=sys.stderr)
+        return 1
+
+    backends = args.backend or available_html_backends()
+    # Эталон первым, чтобы speedup считался относительно него
+    backends = sorted(backends, key=lambda name: name != REFERENCE_BACKEND)
+    run(pages, backends, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,462 @@
+import asyncio
+import base64
+import json
 import traceback
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from dependency_injector.wiring import inject, Provide
+from pydantic import ValidationError
 from src.core.container import Container
-from src.api.schemas import ParsingRequest, ParsingResponse
-from src.repositories.task_repository import TaskRepository
+from src.api.schemas import (
+    BatchLineError,
+    ParsingBatchRequest,
+    ParsingBatchResponse,
+    ParsingRequest,
+    ParsingResponse,
+    QueueStatsItem,
+    QueueStatsResponse,
+    SeleniumStatsResponse,
+    TaskListResponse,
+    TransportStatsResponse,
+)
+from src.parsers.specs import SpecRegistry
+from redis import RedisError
+from src.repositories.async_task_repository import AsyncTaskRepository
+from src.repositories.task_repository import TASK_STATUSES, TERMINAL_STATUSES
+from src.services.admission import QueueMonitor
+from src.services.dispatcher import AsyncTaskDispatcher, Submission
+from src.services.selenium_stats import SeleniumStatsStore
+from src.services.task_events import TaskEventHub
+from src.services.transport_stats import TransportStatsStore
+from src.worker.celery_app import QUEUE_BY_METHOD, queue_for
 from uuid import UUID
 
 router = APIRouter()
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
 @router.post("/parse", response_model=ParsingResponse)
 @inject
-def parse_url(
+async def parse_url(
     request: ParsingRequest,
-    task_repository: TaskRepository = Depends(Provide[Container.task_repository]),
+    task_dispatcher: AsyncTaskDispatcher = Depends(Provide[Container.async_task_dispatcher]),
+    spec_registry: SpecRegistry = Depends(Provide[Container.spec_registry]),
+    queue_monitor: QueueMonitor = Depends(Provide[Container.queue_monitor]),
 ):
+    _check_spec(spec_registry, request.spec)
+    await _check_admission(queue_monitor, request.method, request.priority)
     try:
-        url_str = str(request.url)
-
-        from src.worker.tasks import parse_url_task
+        task_id = await task_dispatcher.asubmit(Submission(
+            url=str(request.url),
+            method=request.method,
+            max_age=request.max_age,
+            spec=request.spec,
+            priority=request.priority,
+        ))
 
+        return ParsingResponse(task_id=UUID(task_id))
 
-        task = task_repository.add(url_str)
-
-        parse_url_task.apply_async(
-            args=[url_str, request.method],
-            task_id=str(task.id)
-        )
-        
-        return ParsingResponse(task_id=task.id)
-    
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed at step ???: {e}")
 
+def _check_spec(spec_registry: SpecRegistry, name: str | None) -> None:
+    if name is not None and spec_registry.get(name) is None:
+        raise HTTPException(status_code=422, detail=f"Неизвестная спецификация извлечения: {name}")
+
+async def _check_admission(queue_monitor: QueueMonitor, method: str, priority: str) -> None:
+    """429 с Retry-After, если очередь метода не успеет взять задачу за ADMISSION_MAX_WAIT."""
+    if not Container.settings.ADMISSION_ENABLED:
+        return
+    # Клиент Redis синхронный
+    admission = await run_in_threadpool(queue_monitor.admit, queue_for(method), priority)
+    if not admission.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Очередь переполнена, повторите запрос позже",
+            headers={"Retry-After": str(int(admission.retry_after))},
+        )
+
+async def _iter_lines(request: Request):
+    """Читает тело запроса по строкам, не загружая его целиком."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+@router.post(
+    "/parse/batch",
+    response_model=ParsingBatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": ParsingBatchRequest.model_json_schema(),
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": "По одному ParsingRequest в строке"},
+                },
+            },
+        },
+    },
+)
+@inject
+async def parse_batch(
+    request: Request,
+    task_dispatcher: AsyncTaskDispatcher = Depends(Provide[Container.async_task_dispatcher]),
+    spec_registry: SpecRegistry = Depends(Provide[Container.spec_registry]),
+    queue_monitor: QueueMonitor = Depends(Provide[Container.queue_monitor]),
+):
+    """
+    Пакетная постановка задач.
+
+    application/json - {"urls": [...], "method": "http"}, до BATCH_MAX_URLS URL.
+    application/x-ndjson - по одному {"url": ..., "method": ...} в строке;
+    тело читается потоком, задачи создаются порциями по мере чтения,
+    невалидные строки пропускаются и попадают в errors.
+
+    Приоритет пакетных задач по умолчанию - low. Переполненная очередь -
+    429 до создания задач (для NDJSON проверяется HTTP-очередь с приоритетом low).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type not in NDJSON_CONTENT_TYPES:
+        try:
+            batch = ParsingBatchRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=json.loads(e.json()))
+        if len(batch.urls) > Container.settings.BATCH_MAX_URLS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Не больше {Container.settings.BATCH_MAX_URLS} URL в JSON, используйте NDJSON",
+            )
+        _check_spec(spec_registry, batch.spec)
+        await _check_admission(queue_monitor, batch.method, batch.priority)
+        submissions = [
+            Submission(
+                url=str(url),
+                method=batch.method,
+                max_age=batch.max_age,
+                spec=batch.spec,
+                priority=batch.priority,
+            )
+            for url in batch.urls
+        ]
+        created = await task_dispatcher.asubmit_many(submissions)
+        return ParsingBatchResponse(task_ids=[UUID(task_id) for task_id in created])
+
+    await _check_admission(queue_monitor, "http", "low")
+
+    # id задачи по строкам тела; None - строка отклонена
+    line_task_ids: list[UUID | None] = []
+    errors: list[BatchLineError] = []
+    chunk: list[Submission] = []
+    # Позиции валидных строк текущей порции в line_task_ids
+    chunk_positions: list[int] = []
+
+    async def flush():
+        ids = await task_dispatcher.asubmit_many(chunk)
+        for position, task_id in zip(chunk_positions, ids):
+            line_task_ids[position] = UUID(task_id)
+        chunk.clear()
+        chunk_positions.clear()
+
+    line_number = 0
+    async for raw_line in _iter_lines(request):
+        line_number += 1
+        if not raw_line.strip():
+            continue
+        line_task_ids.append(None)
+        try:
+            item = ParsingRequest.model_validate_json(raw_line)
+        except ValidationError as e:
+            errors.append(BatchLineError(line=line_number, error=str(e.errors()[0]["msg"])))
+            continue
+        if item.spec is not None and spec_registry.get(item.spec) is None:
+            errors.append(BatchLineError(line=line_number, error=f"Неизвестная спецификация извлечения: {item.spec}"))
+            continue
+        chunk.append(Submission(
+            url=str(item.url),
+            method=item.method,
+            max_age=item.max_age,
+            spec=item.spec,
+            # Строки пакета без явного приоритета - массовая загрузка, как и JSON-пакет
+            priority=item.priority if "priority" in item.model_fields_set else "low",
+        ))
+        chunk_positions.append(len(line_task_ids) - 1)
+        if len(chunk) >= task_dispatcher.chunk_size:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    return ParsingBatchResponse(task_ids=line_task_ids, errors=errors)
+
+def _public_status(view: dict) -> dict:
+    """status_view без служебных полей."""
+    return {key: value for key, value in view.items() if key != "leader_id"}
+
+def _parse_task_ids(ids: list[str]) -> list[str]:
+    """id из ?ids=a,b,c или ?ids=a&ids=b без повторов; 422, если их нет, слишком много или не UUID."""
+    try:
+        task_ids = list(dict.fromkeys(
+            str(UUID(part.strip())) for value in ids for part in value.split(",") if part.strip()
+        ))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids должны быть UUID")
+    if not task_ids:
+        raise HTTPException(status_code=422, detail="Не указаны ids")
+    if len(task_ids) > Container.settings.TASKS_MAX_IDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Не больше {Container.settings.TASKS_MAX_IDS} id за запрос",
+        )
+    return task_ids
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/tasks/events")
+@inject
+async def stream_task_events(
+    ids: list[str] = Query([], description="id задач: ?ids=a,b,c или ?ids=a&ids=b"),
+    task_repository: AsyncTaskRepository = Depends(Provide[Container.async_task_repository]),
+    task_event_hub: TaskEventHub = Depends(Provide[Container.task_event_hub]),
+):
+    """
+    Server-Sent Events со сменами статуса задач (до TASKS_MAX_IDS).
+
+    Сначала по событию status с текущим статусом каждой задачи, затем
+    по событию на каждую смену статуса; not_found - задачи нет. Поток
+    закрывается, когда все задачи завершились (done/error).
+    """
+    task_ids = _parse_task_ids(ids)
+    heartbeat = Container.settings.TASK_EVENTS_HEARTBEAT
+
+    async def stream():
+        async with task_event_hub.subscribe(task_ids) as events:
+            waiting = set(task_ids)
+            # Ведущая задача -> присоединённые к ней из запрошенных
+            followers: dict[str, set[str]] = {}
+            last_status: dict[str, str] = {}
+            changed, subscribed = list(task_ids), []
+            while True:
+                views = await task_repository.get_statuses(changed)
+                for task_id in changed:
+                    view = views.get(task_id)
+                    if view is None:
+                        waiting.discard(task_id)
+                        yield _sse("not_found", {"id": task_id})
+                        continue
+                    if view["status"] != last_status.get(task_id):
+                        last_status[task_id] = view["status"]
+                        yield _sse("status", _public_status(view))
+                    if view["status"] in TERMINAL_STATUSES:
+                        waiting.discard(task_id)
+                    elif view.get("leader_id"):
+                        leader_id = view["leader_id"]
+                        followers.setdefault(leader_id, set()).add(task_id)
+                        if leader_id not in events.task_ids:
+                            await events.add([leader_id])
+                            subscribed.append(task_id)
+                if not waiting:
+                    return
+                if subscribed:
+                    # Ведущая могла завершиться до подписки на неё - её событие уже прошло
+                    changed, subscribed = subscribed, []
+                    continue
+
+                changed = []
+                while not changed:
+                    event = await events.get(heartbeat)
+                    if event is None:
+                        # Прокси не закрывают соединение, пока идут комментарии.
+                        # Событие могло не дойти (Redis pub/sub недоступен) - перечитываем ожидаемые
+                        yield ": keep-alive\n\n"
+                        changed = list(waiting)
+                        continue
+                    task_id, _ = event
+                    changed = [
+                        tid for tid in ({task_id} | followers.get(task_id, set())) if tid in waiting
+                    ]
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/tasks/{task_id}", response_model=dict)
 @inject
-def get_task_status(
+async def get_task_status(
     task_id: UUID,
-    task_repository: TaskRepository = Depends(Provide[Container.task_repository]),
+    wait: float = Query(0, ge=0, description="Ждать завершения задачи до стольких секунд (не больше TASK_WAIT_MAX)"),
+    task_repository: AsyncTaskRepository = Depends(Provide[Container.async_task_repository]),
+    task_event_hub: TaskEventHub = Depends(Provide[Container.task_event_hub]),
 ):
-    task = task_repository.get_by_id(str(task_id))
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
-    
+    """
+    Статус задачи.
+
+    С wait > 0 - long-polling: ответ приходит, как только задача завершится
+    (done/error), или по истечении wait секунд с текущим статусом.
+    Ожидание будит событие смены статуса из Redis; без событий статус
+    перечитывается раз в TASK_EVENTS_HEARTBEAT секунд.
+    """
+    key = str(task_id)
+    if not wait:
+        view = (await task_repository.get_statuses([key])).get(key)
+        if not view:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        return _public_status(view)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, Container.settings.TASK_WAIT_MAX)
+    # Подписка до чтения статуса: смена между ними не потеряется
+    async with task_event_hub.subscribe([key]) as events:
+        view = (await task_repository.get_statuses([key])).get(key)
+        if not view:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        while view["status"] not in TERMINAL_STATUSES:
+            leader_id = view.get("leader_id")
+            if leader_id and leader_id not in events.task_ids:
+                # Присоединённая задача меняет статус вместе с ведущей. Ведущая могла
+                # завершиться до подписки на неё, поэтому статус сразу перечитывается
+                await events.add([leader_id])
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                # Без события (Redis pub/sub недоступен) статус перечитывается раз в heartbeat
+                await events.get(min(remaining, Container.settings.TASK_EVENTS_HEARTBEAT))
+            view = (await task_repository.get_statuses([key])).get(key) or view
+
+    return _public_status(view)
+
+def _encode_cursor(task) -> str:
+    raw = json.dumps([task.created_at.isoformat(), task.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(UUID(task_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Некорректный cursor")
+
+def _utc_naive(value: datetime | None) -> datetime | None:
+    """created_at хранится в UTC без часового пояса."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _task_summary(task) -> dict:
     return {
         "id": task.id,
+        "url": task.url,
+        "method": task.method,
         "status": task.status,
-        "result": task.result,
-        "created_at": task.created_at
-    }
\ No newline at end of file
+        "priority": task.priority,
+        "created_at": task.created_at,
+        "completed_at": task.completed_at,
+        "attempts": task.attempts,
+    }
+
+@router.get("/tasks", response_model=TaskListResponse)
+@inject
+async def get_tasks(
+    ids: list[str] = Query([], description="id задач: ?ids=a,b,c или ?ids=a&ids=b"),
+    status: list[str] = Query([], description="Фильтр по статусу: ?status=done,error"),
+    domain: str | None = Query(None, description="Фильтр по хосту URL"),
+    created_after: datetime | None = Query(None, description="created_at не раньше"),
+    created_before: datetime | None = Query(None, description="created_at раньше"),
+    limit: int | None = Query(None, ge=1, description="Размер страницы (не больше TASKS_PAGE_MAX)"),
+    cursor: str | None = Query(None, description="next_cursor предыдущей страницы"),
+    task_repository: AsyncTaskRepository = Depends(Provide[Container.async_task_repository]),
+):
+    """
+    С ids - статусы нескольких задач за один запрос (до TASKS_MAX_IDS).
+
+    Без ids - список задач от новых к старым с фильтрами и keyset-пагинацией
+    по (created_at, id): страница с курсором стоит столько же, сколько первая.
+    """
+    if ids:
+        task_ids = _parse_task_ids(ids)
+        views = await task_repository.get_statuses(task_ids)
+        return TaskListResponse(
+            tasks=[_public_status(views[task_id]) for task_id in task_ids if task_id in views],
+            not_found=[UUID(task_id) for task_id in task_ids if task_id not in views],
+        )
+
+    statuses = [part.strip() for value in status for part in value.split(",") if part.strip()]
+    unknown = set(statuses) - set(TASK_STATUSES)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Неизвестный статус: {', '.join(sorted(unknown))}")
+    limit = min(limit or Container.settings.TASKS_PAGE_SIZE, Container.settings.TASKS_PAGE_MAX)
+
+    # На одну строку больше - чтобы знать, есть ли следующая страница
+    tasks = await task_repository.list_page(
+        limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        statuses=statuses,
+        domain=domain.strip().lower() if domain else None,
+        created_after=_utc_naive(created_after),
+        created_before=_utc_naive(created_before),
+    )
+    return TaskListResponse(
+        tasks=[_task_summary(task) for task in tasks[:limit]],
+        next_cursor=_encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None,
+    )
+
+@router.get("/queue/stats", response_model=QueueStatsResponse)
+@inject
+async def get_queue_stats(
+    queue_monitor: QueueMonitor = Depends(Provide[Container.queue_monitor]),
+):
+    """Глубина очередей и скорость их разбора - для автоскейлера."""
+    items = []
+    for queue in sorted(set(QUEUE_BY_METHOD.values())):
+        try:
+            stats = await run_in_threadpool(queue_monitor.stats, queue)
+        except RedisError as e:
+            raise HTTPException(status_code=503, detail=f"Брокер недоступен: {e}")
+        items.append(QueueStatsItem(
+            queue=queue,
+            depth=stats.total_depth,
+            depth_by_priority=stats.depth,
+            reserved_by_priority=stats.reserved,
+            drain_rate=stats.drain_rate,
+            estimated_wait=stats.estimated_wait(),
+        ))
+    return QueueStatsResponse(queues=items, max_wait=queue_monitor.max_wait)
+
+@router.get("/selenium/stats", response_model=SeleniumStatsResponse)
+@inject
+async def get_selenium_stats(
+    selenium_stats: SeleniumStatsStore = Depends(Provide[Container.selenium_stats]),
+):
+    """Счётчики Selenium-узлов по процессам воркеров: сессии, отказы, свободные слоты."""
+    try:
+        workers = await run_in_threadpool(selenium_stats.collect)
+    except RedisError as e:
+        raise HTTPException(status_code=503, detail=f"Redis недоступен: {e}")
+    return SeleniumStatsResponse(workers=workers)
+
+@router.get("/http/stats", response_model=TransportStatsResponse)
+@inject
+async def get_http_stats(
+    transport_stats: TransportStatsStore = Depends(Provide[Container.transport_stats]),
+):
+    """Счётчики HTTP-транспорта по процессам воркеров: запросы, новые и переиспользованные соединения, DNS-кэш."""
+    try:
+        workers = await run_in_threadpool(transport_stats.collect)
+    except RedisError as e:
+        raise HTTPException(status_code=503, detail=f"Redis недоступен: {e}")
+    return TransportStatsResponse(workers=workers)
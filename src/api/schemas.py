@@ -1,3 +1,4 @@
+from typing import Literal
 from uuid import UUID
 from pydantic import BaseModel, HttpUrl, Field
 
@@ -7,11 +8,105 @@ class ParsingRequest(BaseModel):
     Pydantic автоматически проверит, что url - это действительно ссылка.
     """
     url: HttpUrl
-    method: str = Field(default="http", description="Метод парсинга: http или selenium")
+    method: str = Field(default="http", description="Метод парсинга: http, selenium или auto")
+    max_age: int | None = Field(
+        default=None,
+        ge=0,
+        description="Принять готовый результат этого URL не старше N секунд вместо нового парсинга",
+    )
+    spec: str | None = Field(
+        default=None,
+        description="Имя спецификации извлечения; по умолчанию выбирается по домену URL",
+    )
+    priority: Literal["high", "normal", "low"] = Field(
+        default="normal",
+        description="Приоритет: high - интерактивные запросы, low - массовая загрузка",
+    )
 
 class ParsingResponse(BaseModel):
     """
     Схема ответа.
     Возвращаем только ID созданной задачи.
     """
-    task_id: UUID
\ No newline at end of file
+    task_id: UUID
+
+class ParsingBatchRequest(BaseModel):
+    """
+    Схема пакетного запроса: много URL одним методом.
+    """
+    urls: list[HttpUrl] = Field(min_length=1, description="Список URL для парсинга")
+    method: str = Field(default="http", description="Метод парсинга: http, selenium или auto")
+    max_age: int | None = Field(
+        default=None,
+        ge=0,
+        description="Принять готовый результат URL не старше N секунд вместо нового парсинга",
+    )
+    spec: str | None = Field(
+        default=None,
+        description="Имя спецификации извлечения для всех URL",
+    )
+    priority: Literal["high", "normal", "low"] = Field(
+        default="low",
+        description="Приоритет всех задач пакета; по умолчанию low, чтобы не задерживать одиночные запросы",
+    )
+
+class BatchLineError(BaseModel):
+    """
+    Ошибка в строке NDJSON-тела (нумерация с 1).
+    """
+    line: int
+    error: str
+
+class ParsingBatchResponse(BaseModel):
+    """
+    Схема ответа на пакетный запрос.
+    id задач идут в порядке входных URL; для невалидной строки NDJSON - null.
+    """
+    task_ids: list[UUID | None]
+    errors: list[BatchLineError] = []
+
+class QueueStatsItem(BaseModel):
+    """
+    Состояние одной очереди Celery.
+    estimated_wait - секунд до начала новой задачи; null, если за окно не завершилось ни одной.
+    """
+    queue: str
+    depth: int
+    depth_by_priority: dict[str, int]
+    reserved_by_priority: dict[str, int] = Field(
+        description="Взяты воркерами заранее (prefetch) и ждут свободного слота"
+    )
+    drain_rate: float = Field(description="Задач в секунду за последние ADMISSION_DRAIN_WINDOW секунд")
+    estimated_wait: float | None
+
+class QueueStatsResponse(BaseModel):
+    """
+    Схема ответа GET /queue/stats.
+    """
+    queues: list[QueueStatsItem]
+    max_wait: float
+
+class SeleniumStatsResponse(BaseModel):
+    """
+    Схема ответа GET /selenium/stats.
+    workers - {процесс воркера (hostname:pid): {url узла: счётчики}}.
+    """
+    workers: dict[str, dict[str, dict]]
+
+class TransportStatsResponse(BaseModel):
+    """
+    Схема ответа GET /http/stats.
+    workers - {процесс воркера (hostname:pid): счётчики соединений и DNS-кэша}.
+    """
+    workers: dict[str, dict]
+
+class TaskListResponse(BaseModel):
+    """
+    Схема ответа GET /tasks.
+    С ids - статусы в порядке запрошенных id (как у GET /tasks/{task_id}), not_found - id без задачи.
+    Без ids - страница задач от новых к старым (без result); следующая - ?cursor=next_cursor,
+    null - страниц больше нет.
+    """
+    tasks: list[dict]
+    not_found: list[UUID] = []
+    next_cursor: str | None = None
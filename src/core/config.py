@@ -4,10 +4,130 @@ from pydantic import PostgresDsn, RedisDsn
 class Settings(BaseSettings):
     POSTGRES_DSN: PostgresDsn
     REDIS_URL: RedisDsn
+    # Пул соединений с БД (на процесс; у API свой пул у синхронного и асинхронного движка)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    # Пересоздавать соединения старше стольких секунд (idle-таймауты pgbouncer/балансировщика)
+    DB_POOL_RECYCLE: int = 1800
+    # Проверять соединение перед выдачей из пула: обрыв не доходит до запроса
+    DB_POOL_PRE_PING: bool = True
     SELENIUM_HOST: str = "selenium"
     SELENIUM_PORT: int = 4444
+    # Несколько Selenium-эндпоинтов (JSON-список URL); пусто - SELENIUM_HOST:SELENIUM_PORT
+    SELENIUM_URLS: list[str] = []
+    # Пул тёплых сессий Selenium на процесс воркера
+    SELENIUM_POOL_SIZE: int = 2
+    SELENIUM_MAX_PAGES: int = 100
+    SELENIUM_MAX_AGE: float = 600.0
+    # Сколько секунд GET /selenium/stats показывает процесс после его последней браузерной задачи
+    SELENIUM_STATS_TTL: int = 300
+
+    # Движок для пакетов method="http": "sync" (requests) или "async" (httpx);
+    # одиночные задачи всегда идут через sync
+    HTTP_ENGINE: str = "sync"
+    HTTP_MAX_CONCURRENCY: int = 200
+    HTTP_PER_HOST_CONCURRENCY: int = 8
+
+    # Общий keep-alive транспорт HttpParser (на процесс воркера)
+    HTTP_POOL_CONNECTIONS: int = 100
+    HTTP_POOL_MAXSIZE: int = 10
+    HTTP_HOST_POOL_SIZES: dict[str, int] = {}
+    HTTP_DNS_TTL: float = 300.0
+    # Сколько секунд GET /http/stats показывает процесс после его последней публикации
+    HTTP_STATS_TTL: int = 300
+    # Не чаще чем раз в столько секунд процесс публикует счётчики транспорта
+    HTTP_STATS_INTERVAL: float = 10.0
+    # Повторный парсинг с If-None-Match / If-Modified-Since (только HTTP_ENGINE=sync)
+    HTTP_REVALIDATE: bool = True
+    # Потоковое чтение тела с остановкой после нужных полей (только HTTP_ENGINE=sync)
+    HTTP_STREAMING: bool = True
+    # Бэкенд разбора HTML: html.parser, lxml, selectolax
+    HTTP_HTML_BACKEND: str = "lxml"
+
+    # Пакетная отправка задач (POST /parse/batch)
+    BATCH_CHUNK_SIZE: int = 500
+    BATCH_MAX_URLS: int = 10000
+    # >1 - URL method="http" из пакета уходят воркеру сообщениями parse_batch_task
+    # по столько штук (общий парсер и bulk UPDATE статусов); 1 - по одному
+    BATCH_TASK_SIZE: int = 1
+    # Присоединять повторные задачи к уже выполняющейся для того же URL
+    COALESCE_IN_FLIGHT: bool = True
+
+    # Write-behind запись статусов в воркере
+    STATUS_WRITE_BEHIND: bool = False
+    STATUS_BATCH_SIZE: int = 500
+    STATUS_FLUSH_INTERVAL: float = 1.0
+
+    # Кэш статусов задач в Redis для GET /tasks: секунд после последней записи, 0 - выключен
+    STATUS_CACHE_TTL: int = 600
+    # Сколько id можно запросить одним GET /tasks?ids=
+    TASKS_MAX_IDS: int = 500
+    # Размер страницы GET /tasks по умолчанию и максимальный
+    TASKS_PAGE_SIZE: int = 50
+    TASKS_PAGE_MAX: int = 500
+    # Предел ожидания GET /tasks/{task_id}?wait=, секунд
+    TASK_WAIT_MAX: float = 60.0
+    # Интервал keep-alive комментариев в потоке GET /tasks/events, секунд
+    TASK_EVENTS_HEARTBEAT: float = 15.0
+
+    # Очереди Celery: HTTP и браузер обрабатываются разными воркерами
+    CELERY_HTTP_QUEUE: str = "parse.http"
+    CELERY_BROWSER_QUEUE: str = "parse.browser"
+    # Пул и параллелизм воркеров (python -m src.worker.celery_app http|browser)
+    WORKER_HTTP_POOL: str = "gevent"
+    WORKER_HTTP_CONCURRENCY: int = 100
+    WORKER_BROWSER_POOL: str = "prefork"
+    WORKER_BROWSER_CONCURRENCY: int = 4
+
+    # Раз в сколько выполненных задач очереди поднимать самую старую задачу
+    # каждого более низкого приоритета (защита от голодания); 0 - строгий приоритет
+    PRIORITY_STARVATION_EVERY: int = 10
+
+    # Admission control: POST /parse отвечает 429, если задача прождёт в очереди
+    # дольше ADMISSION_MAX_WAIT секунд или перед ней больше ADMISSION_MAX_DEPTH задач
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_WAIT: float = 300.0
+    ADMISSION_MAX_DEPTH: int = 100_000
+    # За сколько секунд считать скорость разбора очереди
+    ADMISSION_DRAIN_WINDOW: int = 60
+    ADMISSION_STATS_TTL: float = 1.0
+
+    # Повторы после временных сетевых ошибок: задача перезапускается через Celery
+    # с экспоненциальной задержкой, а не ждёт внутри воркера
+    TASK_MAX_RETRIES: int = 3
+    TASK_RETRY_BASE_DELAY: float = 2.0
+    TASK_RETRY_MAX_DELAY: float = 600.0
+
+    # Лимит запросов к домену, общий для воркеров (token bucket в Redis)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DEFAULT_RATE: float = 2.0
+    RATE_LIMIT_BURST: int = 5
+    # Скорость для доменов (запросов в секунду), действует и на поддомены
+    RATE_LIMIT_DOMAINS: dict[str, float] = {}
+    RATE_LIMIT_MIN_RATE: float = 0.05
+    RATE_LIMIT_PENALTY_TTL: int = 600
+    # Дальше скольких секунд слоты не резервируются: задача с таким countdown
+    # должна успеть выполниться до visibility_timeout транспорта Redis (3600 с),
+    # иначе брокер выдаст её второй раз
+    RATE_LIMIT_MAX_DELAY: float = 600.0
+
+    # method="auto": сколько секунд помнить сработавший для домена метод
+    ROUTING_TTL: int = 7 * 24 * 3600
+
+    # JSON с декларативными спецификациями извлечения ({"specs": [...]})
+    EXTRACTION_SPECS_PATH: str | None = None
+
+    # Кэш результатов по URL (в памяти процесса воркера, поверх scraping_tasks)
+    RESULT_CACHE_SIZE: int = 10000
 
     PROJECT_NAME: str = "Higher School of Parsing"
     DEBUG: bool = True
 
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
\ No newline at end of file
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    @property
+    def selenium_urls(self) -> list[str]:
+        return self.SELENIUM_URLS or [
+            f"http://{self.SELENIUM_HOST}:{self.SELENIUM_PORT}/wd/hub"
+        ]
@@ -1,7 +1,24 @@
 from dependency_injector import containers, providers
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from src.core.config import Settings
-from src.db.database import Database
+from src.core.priorities import CELERY_PRIORITY_SEP, CELERY_PRIORITY_STEPS
+from src.db.database import AsyncDatabase, Database
+from src.repositories.async_task_repository import AsyncTaskRepository
+from src.repositories.status_cache import TaskStatusCache
+from src.repositories.status_writer import BufferedStatusWriter
 from src.repositories.task_repository import TaskRepository
+from src.repositories.validator_repository import ValidatorRepository
+from src.services.admission import QueueMonitor
+from src.services.dispatcher import AsyncTaskDispatcher
+from src.services.priority_lanes import StarvationGuard
+from src.services.result_cache import ResultCache
+from src.services.task_events import RedisTaskEventHub
+from src.services.rate_limiter import DomainRateLimiter
+from src.services.routing import RedisRoutingStore
+from src.services.selenium_stats import SeleniumStatsStore
+from src.services.transport_stats import TransportStatsStore
+from src.parsers.specs import SpecRegistry
 
 class Container(containers.DeclarativeContainer):
     wiring_config = containers.WiringConfiguration(
@@ -15,9 +32,25 @@ class Container(containers.DeclarativeContainer):
     settings = Settings()
 
     # база данных
+    db_pool = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
     db = providers.Singleton(
         Database, 
-        db_url=settings.POSTGRES_DSN.unicode_string()
+        db_url=settings.POSTGRES_DSN.unicode_string(),
+        **db_pool,
+    )
+
+    # asyncpg для эндпоинтов API; воркер работает через синхронный db
+    async_db = providers.Singleton(
+        AsyncDatabase,
+        db_url=settings.POSTGRES_DSN.unicode_string(),
+        **db_pool,
     )
     
     # Провайдер для engine (нужен для создания таблиц в main.py)
@@ -32,7 +65,126 @@ class Container(containers.DeclarativeContainer):
         db=db
     )
 
+    redis = providers.Singleton(
+        Redis.from_url,
+        settings.REDIS_URL.unicode_string(),
+    )
+
+    # Для pub/sub в API: ожидание событий не должно занимать потоки
+    async_redis = providers.Singleton(
+        AsyncRedis.from_url,
+        settings.REDIS_URL.unicode_string(),
+    )
+
+    # Маршруты method="auto" по доменам, общие для всех воркеров
+    routing_store = providers.Singleton(
+        RedisRoutingStore,
+        redis=redis,
+        ttl=settings.ROUTING_TTL,
+    )
+
+    # Счётчики Selenium-узлов процессов воркеров для GET /selenium/stats
+    selenium_stats = providers.Singleton(
+        SeleniumStatsStore,
+        redis=redis,
+        ttl=settings.SELENIUM_STATS_TTL,
+    )
+
+    # Счётчики HTTP-транспорта процессов воркеров для GET /http/stats
+    transport_stats = providers.Singleton(
+        TransportStatsStore,
+        redis=redis,
+        ttl=settings.HTTP_STATS_TTL,
+    )
+
+    rate_limiter = providers.Singleton(
+        DomainRateLimiter,
+        redis=redis,
+        default_rate=settings.RATE_LIMIT_DEFAULT_RATE,
+        burst=settings.RATE_LIMIT_BURST,
+        domain_rates=settings.RATE_LIMIT_DOMAINS,
+        min_rate=settings.RATE_LIMIT_MIN_RATE,
+        penalty_ttl=settings.RATE_LIMIT_PENALTY_TTL,
+        max_delay=settings.RATE_LIMIT_MAX_DELAY,
+    )
+
+    starvation_guard = providers.Singleton(
+        StarvationGuard,
+        redis=redis,
+        priority_steps=CELERY_PRIORITY_STEPS,
+        every=settings.PRIORITY_STARVATION_EVERY,
+        sep=CELERY_PRIORITY_SEP,
+    )
+
+    # Глубина очередей и скорость разбора (API - admission control, воркер - счётчики)
+    queue_monitor = providers.Singleton(
+        QueueMonitor,
+        redis=redis,
+        max_wait=settings.ADMISSION_MAX_WAIT,
+        max_depth=settings.ADMISSION_MAX_DEPTH,
+        window=settings.ADMISSION_DRAIN_WINDOW,
+        stats_ttl=settings.ADMISSION_STATS_TTL,
+    )
+
+    async_session_factory = providers.Factory(
+        lambda db: db.session_factory,
+        db=async_db,
+    )
+
+    # Статусы для опроса GET /tasks: воркер пишет, API читает
+    status_cache = providers.Singleton(
+        TaskStatusCache,
+        redis=redis,
+        ttl=settings.STATUS_CACHE_TTL,
+    )
+
+    # События смены статуса для GET /tasks/{task_id}?wait= и GET /tasks/events
+    task_event_hub = providers.Singleton(
+        RedisTaskEventHub,
+        redis=async_redis,
+    )
+
     task_repository = providers.Factory(
         TaskRepository,
         session_factory=session_factory,
-    )
\ No newline at end of file
+        status_cache=status_cache,
+    )
+
+    async_task_repository = providers.Factory(
+        AsyncTaskRepository,
+        session_factory=async_session_factory,
+        status_cache=status_cache,
+    )
+
+    validator_repository = providers.Factory(
+        ValidatorRepository,
+        session_factory=session_factory,
+    )
+
+    # Один буфер на процесс воркера
+    status_writer = providers.Singleton(
+        BufferedStatusWriter,
+        task_repository=task_repository,
+        max_batch=settings.STATUS_BATCH_SIZE,
+        flush_interval=settings.STATUS_FLUSH_INTERVAL,
+    )
+
+    # Селекторы компилируются один раз при загрузке реестра в процессе
+    spec_registry = providers.Singleton(
+        SpecRegistry.from_file,
+        settings.EXTRACTION_SPECS_PATH,
+    )
+
+    result_cache = providers.Singleton(
+        ResultCache,
+        task_repository=task_repository,
+        max_entries=settings.RESULT_CACHE_SIZE,
+    )
+
+    async_task_dispatcher = providers.Factory(
+        AsyncTaskDispatcher,
+        task_repository=async_task_repository,
+        chunk_size=settings.BATCH_CHUNK_SIZE,
+        coalesce=settings.COALESCE_IN_FLIGHT,
+        batch_task_size=settings.BATCH_TASK_SIZE,
+    )
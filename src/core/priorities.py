@@ -0,0 +1,38 @@
+"""Приоритеты задач: интерактивные запросы раньше массовых."""
+
+# От высшего к низшему
+PRIORITIES = ("high", "normal", "low")
+DEFAULT_PRIORITY = "normal"
+
+# Приоритет сообщения Celery. В транспорте Redis у каждого приоритета свой
+# список, и воркер забирает задачи из списка с меньшим номером первым.
+CELERY_PRIORITY_STEPS = [0, 3, 6, 9]
+# Разделитель имени очереди и приоритета в именах списков: parse.http:6
+CELERY_PRIORITY_SEP = ":"
+_CELERY_PRIORITIES = {"high": 0, "normal": 3, "low": 6}
+
+
+def priority_rank(priority: str) -> int:
+    """0 - высший приоритет; чем больше, тем позже."""
+    return PRIORITIES.index(priority)
+
+
+def celery_priority(priority: str) -> int:
+    """Приоритет сообщения Celery для приоритета задачи."""
+    return _CELERY_PRIORITIES[priority]
+
+
+def priority_name(step: int | None) -> str:
+    """Приоритет задачи по приоритету сообщения Celery (None - приоритет по умолчанию)."""
+    if step is None:
+        return DEFAULT_PRIORITY
+    for priority in reversed(PRIORITIES):
+        if step >= _CELERY_PRIORITIES[priority]:
+            return priority
+    return PRIORITIES[0]
+
+
+def lane_key(queue: str, priority: str) -> str:
+    """Имя списка Redis, в котором транспорт Celery хранит задачи очереди с этим приоритетом."""
+    step = celery_priority(priority)
+    return f"{queue}{CELERY_PRIORITY_SEP}{step}" if step else queue
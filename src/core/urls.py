@@ -0,0 +1,47 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Параметры, которые не влияют на содержимое страницы
+IGNORED_QUERY_PREFIXES = ("utm_",)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Приводит URL к каноническому виду, чтобы одинаковые страницы давали один ключ.
+
+    Схема и хост - в нижнем регистре, порт по умолчанию убирается,
+    пустой путь становится "/", параметры запроса сортируются,
+    utm-метки и фрагмент (#...) отбрасываются.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    netloc = host
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo = f"{userinfo}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(IGNORED_QUERY_PREFIXES)
+    ))
+
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def url_hash(url: str) -> str:
+    """SHA-1 (hex, 40 символов) от канонического URL."""
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def url_domain(url: str) -> str:
+    """Хост URL в нижнем регистре (без порта) - для фильтра задач по домену."""
+    return (urlsplit(url.strip()).hostname or "").lower()
@@ -1,4 +1,4 @@
-from src.db.database import Database
+from src.db.database import AsyncDatabase, Database
 from src.db.models import Base, ScrapingTask
 from src.db.session import get_db_session, create_session_dependency
 from src.db.crud import (
@@ -12,6 +12,7 @@ from src.db.crud import (
 
 __all__ = [
     "Database",
+    "AsyncDatabase",
     "Base",
     "ScrapingTask",
     "get_db_session",
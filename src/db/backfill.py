@@ -0,0 +1,130 @@
+"""
+Пакетное заполнение теневых колонок scraping_tasks между миграциями
+10_compact_tasks.sql и 11_compact_tasks_cutover.sql.
+
+Запуск из корня репозитория (POSTGRES_DSN из окружения):
+
+    python -m src.db.backfill --batch-size 5000 --pause 0.1
+
+Строки обходятся по первичному ключу пакетами по batch-size; каждый пакет -
+отдельная короткая транзакция, блокируются только его строки. Уже
+заполненные строки (новые и изменённые после миграции 10 заполняет
+триггер) не перезаписываются. Прерванный запуск можно продолжить с
+--after <последний id из лога> или просто запустить заново.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+_BATCH_STATEMENT = text("""
+WITH batch AS (
+    SELECT id FROM scraping_tasks
+    WHERE id > :after
+    ORDER BY id
+    LIMIT :batch_size
+),
+updated AS (
+    UPDATE scraping_tasks AS t
+    SET id_uuid = t.id::uuid,
+        leader_uuid = t.leader_id::uuid,
+        status_code = COALESCE(t.status, 'pending')::task_status,
+        domain = COALESCE(
+            t.domain,
+            lower(substring(t.url from '^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)'))
+        )
+    FROM batch
+    WHERE t.id = batch.id
+      AND (
+          t.id_uuid IS NULL
+          OR t.status_code IS NULL
+          OR (t.leader_id IS NOT NULL AND t.leader_uuid IS NULL)
+          OR t.domain IS NULL
+      )
+    RETURNING 1
+)
+SELECT (SELECT max(id) FROM batch) AS last_id, (SELECT count(*) FROM updated) AS updated
+""")
+
+
+def backfill(
+    engine: Engine,
+    batch_size: int = 5000,
+    pause: float = 0.1,
+    after: str = "",
+    max_retries: int = 5,
+) -> int:
+    """
+    Заполняет id_uuid, leader_uuid, status_code и domain у существующих строк.
+
+    Args:
+        engine: Синхронный движок PostgreSQL.
+        batch_size: Строк в одной транзакции.
+        pause: Пауза между пакетами, секунд (запас для автовакуума и реплик).
+        after: Продолжить с id больше этого.
+        max_retries: Сколько раз подряд повторять пакет после ошибки БД.
+
+    Returns:
+        Сколько строк обновлено.
+
+    Raises:
+        OperationalError: Пакет не прошёл max_retries раз подряд.
+    """
+    total = 0
+    failures = 0
+    while True:
+        started = time.monotonic()
+        try:
+            with engine.begin() as connection:
+                # Строку держит воркер - ждём недолго и повторяем пакет, а не висим
+                connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+                row = connection.execute(
+                    _BATCH_STATEMENT, {"after": after, "batch_size": batch_size}
+                ).one()
+        except OperationalError as e:
+            failures += 1
+            if failures > max_retries:
+                raise
+            logger.warning(f"BACKFILL: пакет после id {after!r} не прошёл ({failures}/{max_retries}): {e}")
+            time.sleep(max(pause, 1.0))
+            continue
+        failures = 0
+        if row.last_id is None:
+            break
+        after = row.last_id
+        total += row.updated
+        logger.info(
+            f"BACKFILL: до id {after}: обновлено {row.updated} "
+            f"(всего {total}) за {time.monotonic() - started:.2f}с"
+        )
+        if pause:
+            time.sleep(pause)
+    logger.info(f"BACKFILL: готово, обновлено {total} строк")
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    from src.core.config import Settings
+    from src.db.database import Database
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--batch-size", type=int, default=5000, help="Строк в одной транзакции")
+    arg_parser.add_argument("--pause", type=float, default=0.1, help="Пауза между пакетами, секунд")
+    arg_parser.add_argument("--after", default="", help="Продолжить с id больше этого")
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    database = Database(Settings().POSTGRES_DSN.unicode_string())
+    backfill(database.engine, batch_size=args.batch_size, pause=args.pause, after=args.after)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
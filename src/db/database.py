@@ -1,12 +1,96 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+# Асинхронные драйверы для синхронных схем DSN
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def pool_options(
+    db_url: str,
+    pool_size: int = 10,
+    max_overflow: int = 20,
+    pool_timeout: float = 30.0,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+) -> dict:
+    """Параметры пула для create_engine; SQLite пул не настраивается (свой пул на файл)."""
+    if make_url(db_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping,
+    }
+
+
+def _gevent_wait_callback(conn, timeout=None) -> None:
+    """Ожидание ответа PostgreSQL через gevent: пока psycopg2 ждёт сокет, работают другие green-потоки."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Неожиданный результат poll: {state}")
+
+
+def make_psycopg2_green() -> bool:
+    """
+    Делает psycopg2 кооперативным под gevent (то же, что psycogreen).
+
+    monkey-patching gevent не затрагивает psycopg2: libpq ждёт сокет сам,
+    и один запрос к базе останавливает все green-потоки процесса. Вызывать
+    до создания первого соединения.
+
+    Returns:
+        True, если gevent активен и psycopg2 переключён.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    if not monkey.is_module_patched("socket"):
+        return False
+    from psycopg2 import extensions
+
+    extensions.set_wait_callback(_gevent_wait_callback)
+    return True
+
+
+def async_url(db_url: str) -> str:
+    """DSN с асинхронным драйвером: postgresql:// -> postgresql+asyncpg://."""
+    url = make_url(db_url)
+    driver = _ASYNC_DRIVERS.get(url.drivername)
+    if driver is not None:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
 class Database:
     """
     Класс, отвечающий за подключение к PostgreSQL.
     """
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url, echo=False)
+    def __init__(self, db_url: str, **pool) -> None:
+        """
+        Args:
+            db_url: DSN базы.
+            **pool: pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping.
+        """
+        self._engine = create_engine(db_url, echo=False, **pool_options(db_url, **pool))
 
         self._session_factory = sessionmaker(
             autocommit=False,
@@ -20,4 +104,39 @@ class Database:
 
     @property
     def session_factory(self):
-        return self._session_factory
\ No newline at end of file
+        return self._session_factory
+
+
+class AsyncDatabase:
+    """
+    Подключение к PostgreSQL через asyncpg для асинхронных эндпоинтов API.
+
+    Сессии не сбрасывают атрибуты после commit: объекты читаются уже
+    после закрытия сессии, а ленивая загрузка в асинхронном коде невозможна.
+    """
+    def __init__(self, db_url: str, **pool) -> None:
+        """
+        Args:
+            db_url: DSN базы; синхронный драйвер заменяется асинхронным.
+            **pool: Как у Database.
+        """
+        url = async_url(db_url)
+        self._engine = create_async_engine(url, echo=False, **pool_options(url, **pool))
+
+        self._session_factory = async_sessionmaker(
+            bind=self._engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def session_factory(self):
+        return self._session_factory
+
+    async def dispose(self) -> None:
+        """Закрывает соединения пула (при остановке приложения)."""
+        await self._engine.dispose()
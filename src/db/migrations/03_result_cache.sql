@@ -0,0 +1,8 @@
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS method VARCHAR(20) DEFAULT 'http';
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS url_hash CHAR(40);
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Поиск свежего результата для кэша: последний успешный парсинг URL этим методом
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_url_hash_method_completed
+    ON scraping_tasks (url_hash, method, completed_at)
+    WHERE status = 'done';
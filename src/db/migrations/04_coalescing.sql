@@ -0,0 +1,11 @@
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS leader_id TEXT;
+
+-- Поиск задачи, которая уже парсит этот URL
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_in_flight
+    ON scraping_tasks (url_hash, method)
+    WHERE status IN ('pending', 'processing') AND leader_id IS NULL;
+
+-- Присоединённые задачи обновляются вместе с ведущей
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_leader_id
+    ON scraping_tasks (leader_id)
+    WHERE leader_id IS NOT NULL;
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS page_validators (
+    url_hash CHAR(40) PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    result JSONB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
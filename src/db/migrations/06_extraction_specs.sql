@@ -0,0 +1 @@
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS spec TEXT;
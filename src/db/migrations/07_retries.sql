@@ -0,0 +1,9 @@
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP;
+
+-- "retrying" тоже считается задачей в работе для схлопывания дубликатов
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_in_flight_v2
+    ON scraping_tasks (url_hash, method)
+    WHERE status IN ('pending', 'processing', 'retrying') AND leader_id IS NULL;
+DROP INDEX CONCURRENTLY IF EXISTS ix_scraping_tasks_in_flight;
+ALTER INDEX IF EXISTS ix_scraping_tasks_in_flight_v2 RENAME TO ix_scraping_tasks_in_flight;
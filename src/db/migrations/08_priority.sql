@@ -0,0 +1,2 @@
+-- Приоритет задачи: high (интерактивные запросы), normal, low (массовые)
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS priority VARCHAR(10) NOT NULL DEFAULT 'normal';
@@ -0,0 +1,14 @@
+-- Хост URL для фильтра GET /tasks?domain=
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS domain TEXT;
+
+-- Существующие строки заполняет пакетами python -m src.db.backfill (после 10_compact_tasks.sql)
+
+-- Keyset-пагинация по (created_at, id): любая страница - поиск по индексу и limit строк
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_created_id
+    ON scraping_tasks (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_status_created_id
+    ON scraping_tasks (status, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_domain_created_id
+    ON scraping_tasks (domain, created_at, id);
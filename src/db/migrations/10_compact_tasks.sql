@@ -0,0 +1,33 @@
+-- Компактная схема scraping_tasks, шаг 1 из 2 (без блокировки таблицы):
+-- id и leader_id - uuid (16 байт вместо 37), status - enum (4 байта).
+-- Новые значения пишутся в теневые колонки; новые и изменённые строки заполняет
+-- триггер, существующие - python -m src.db.backfill пакетами. Шаг 2 - 11_compact_tasks_cutover.sql.
+
+DO $$
+BEGIN
+    CREATE TYPE task_status AS ENUM ('pending', 'processing', 'retrying', 'done', 'error');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Колонки без DEFAULT: только изменение каталога, таблица не переписывается
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS id_uuid UUID;
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS leader_uuid UUID;
+ALTER TABLE scraping_tasks ADD COLUMN IF NOT EXISTS status_code task_status;
+
+CREATE OR REPLACE FUNCTION scraping_tasks_compact_sync() RETURNS trigger AS $$
+BEGIN
+    NEW.id_uuid := NEW.id::uuid;
+    NEW.leader_uuid := NEW.leader_id::uuid;
+    NEW.status_code := COALESCE(NEW.status, 'pending')::task_status;
+    IF NEW.domain IS NULL THEN
+        NEW.domain := lower(substring(NEW.url from '^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)'));
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS scraping_tasks_compact_sync ON scraping_tasks;
+CREATE TRIGGER scraping_tasks_compact_sync
+    BEFORE INSERT OR UPDATE ON scraping_tasks
+    FOR EACH ROW EXECUTE FUNCTION scraping_tasks_compact_sync();
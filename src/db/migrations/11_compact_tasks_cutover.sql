@@ -0,0 +1,87 @@
+-- Компактная схема scraping_tasks, шаг 2 из 2: переключение на теневые колонки.
+-- Перед ним на существующей базе: python -m src.db.backfill (иначе VALIDATE ниже
+-- упадёт на незаполненных строках, ничего не изменив).
+-- Транзакция переключения ниже несовместима с кодом обеих версий (пакетный UPDATE
+-- статусов сравнивает id как text или как uuid), поэтому её запускают при остановленных
+-- воркерах и API и сразу после неё выкатывают новый код: порядок - в README, "Миграции".
+
+-- Индексы по новым колонкам строятся без блокировки записи
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_id_uuid
+    ON scraping_tasks (id_uuid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_url_hash_method_completed_new
+    ON scraping_tasks (url_hash, method, completed_at)
+    WHERE status_code = 'done';
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_in_flight_new
+    ON scraping_tasks (url_hash, method)
+    WHERE status_code IN ('pending', 'processing', 'retrying') AND leader_uuid IS NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_leader_id_new
+    ON scraping_tasks (leader_uuid)
+    WHERE leader_uuid IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_created_id_new
+    ON scraping_tasks (created_at, id_uuid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_status_created_id_new
+    ON scraping_tasks (status_code, created_at, id_uuid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraping_tasks_domain_created_id_new
+    ON scraping_tasks (domain, created_at, id_uuid);
+
+-- Проверка заполненности: NOT VALID + VALIDATE не блокирует запись,
+-- а SET NOT NULL ниже использует проверенный CHECK вместо полного прохода под блокировкой
+ALTER TABLE scraping_tasks DROP CONSTRAINT IF EXISTS scraping_tasks_compact_filled;
+ALTER TABLE scraping_tasks ADD CONSTRAINT scraping_tasks_compact_filled
+    CHECK ((leader_id IS NULL) = (leader_uuid IS NULL)) NOT VALID;
+ALTER TABLE scraping_tasks VALIDATE CONSTRAINT scraping_tasks_compact_filled;
+ALTER TABLE scraping_tasks DROP CONSTRAINT IF EXISTS scraping_tasks_id_uuid_not_null;
+ALTER TABLE scraping_tasks ADD CONSTRAINT scraping_tasks_id_uuid_not_null
+    CHECK (id_uuid IS NOT NULL) NOT VALID;
+ALTER TABLE scraping_tasks VALIDATE CONSTRAINT scraping_tasks_id_uuid_not_null;
+ALTER TABLE scraping_tasks DROP CONSTRAINT IF EXISTS scraping_tasks_status_code_not_null;
+ALTER TABLE scraping_tasks ADD CONSTRAINT scraping_tasks_status_code_not_null
+    CHECK (status_code IS NOT NULL) NOT VALID;
+ALTER TABLE scraping_tasks VALIDATE CONSTRAINT scraping_tasks_status_code_not_null;
+
+-- Переключение: только изменения каталога, блокировка на доли секунды
+BEGIN;
+SET LOCAL lock_timeout = '5s';
+
+DROP VIEW IF EXISTS task_stats;
+DROP TRIGGER scraping_tasks_compact_sync ON scraping_tasks;
+ALTER TABLE scraping_tasks DROP CONSTRAINT scraping_tasks_compact_filled;
+
+-- Удаление колонки не переписывает таблицу; вместе с ней уходят старые PK и индексы
+ALTER TABLE scraping_tasks DROP COLUMN id;
+ALTER TABLE scraping_tasks DROP COLUMN leader_id;
+ALTER TABLE scraping_tasks DROP COLUMN status;
+
+ALTER TABLE scraping_tasks RENAME COLUMN id_uuid TO id;
+ALTER TABLE scraping_tasks RENAME COLUMN leader_uuid TO leader_id;
+ALTER TABLE scraping_tasks RENAME COLUMN status_code TO status;
+
+ALTER TABLE scraping_tasks ALTER COLUMN id SET NOT NULL;
+ALTER TABLE scraping_tasks ALTER COLUMN status SET NOT NULL;
+ALTER TABLE scraping_tasks DROP CONSTRAINT scraping_tasks_id_uuid_not_null;
+ALTER TABLE scraping_tasks DROP CONSTRAINT scraping_tasks_status_code_not_null;
+ALTER TABLE scraping_tasks ADD CONSTRAINT scraping_tasks_pkey PRIMARY KEY USING INDEX ix_scraping_tasks_id_uuid;
+ALTER TABLE scraping_tasks ALTER COLUMN id SET DEFAULT gen_random_uuid();
+ALTER TABLE scraping_tasks ALTER COLUMN status SET DEFAULT 'pending';
+
+ALTER INDEX ix_scraping_tasks_url_hash_method_completed_new RENAME TO ix_scraping_tasks_url_hash_method_completed;
+ALTER INDEX ix_scraping_tasks_in_flight_new RENAME TO ix_scraping_tasks_in_flight;
+ALTER INDEX ix_scraping_tasks_leader_id_new RENAME TO ix_scraping_tasks_leader_id;
+ALTER INDEX ix_scraping_tasks_created_id_new RENAME TO ix_scraping_tasks_created_id;
+ALTER INDEX ix_scraping_tasks_status_created_id_new RENAME TO ix_scraping_tasks_status_created_id;
+ALTER INDEX ix_scraping_tasks_domain_created_id_new RENAME TO ix_scraping_tasks_domain_created_id;
+
+CREATE OR REPLACE VIEW task_stats AS
+SELECT
+    status,
+    COUNT(*) as count,
+    AVG(EXTRACT(EPOCH FROM (completed_at - created_at))) as avg_duration
+FROM scraping_tasks
+GROUP BY status;
+
+COMMIT;
+
+DROP FUNCTION IF EXISTS scraping_tasks_compact_sync();
+
+-- Место старых колонок освобождается по мере обновления строк;
+-- сразу - pg_repack (без долгой блокировки) или VACUUM FULL (с блокировкой).
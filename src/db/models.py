@@ -1,17 +1,68 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Boolean, Column, Enum, String, DateTime, Index, Integer, JSON, Uuid, text
 from sqlalchemy.orm import DeclarativeBase
 
+# Значения типа task_status (src/db/migrations/10_compact_tasks.sql)
+TASK_STATUSES = ("pending", "processing", "retrying", "done", "error")
+
 class Base(DeclarativeBase):
     pass
 
 class ScrapingTask(Base):
     __tablename__ = "scraping_tasks"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        Index(
+            "ix_scraping_tasks_url_hash_method_completed",
+            "url_hash", "method", "completed_at",
+            postgresql_where=text("status = 'done'"),
+        ),
+        Index(
+            "ix_scraping_tasks_in_flight",
+            "url_hash", "method",
+            postgresql_where=text("status IN ('pending', 'processing', 'retrying') AND leader_id IS NULL"),
+        ),
+        Index(
+            "ix_scraping_tasks_leader_id",
+            "leader_id",
+            postgresql_where=text("leader_id IS NOT NULL"),
+        ),
+        # Keyset-пагинация GET /tasks по (created_at, id): без фильтра, по статусу, по домену
+        Index("ix_scraping_tasks_created_id", "created_at", "id"),
+        Index("ix_scraping_tasks_status_created_id", "status", "created_at", "id"),
+        Index("ix_scraping_tasks_domain_created_id", "domain", "created_at", "id"),
+    )
+    # Нативный uuid (16 байт) в PostgreSQL; в коде id - строка
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     url = Column(String, nullable=False)
-    status = Column(String, default="pending")
+    method = Column(String(20), default="http")
+    url_hash = Column(String(40), nullable=True)
+    # Хост URL в нижнем регистре (src.core.urls.url_domain)
+    domain = Column(String, nullable=True)
+    status: Column[str] = Column(Enum(*TASK_STATUSES, name="task_status"), default="pending", nullable=False)
+    # high / normal / low (src.core.priorities)
+    priority = Column(String(10), default="normal", nullable=False)
     result = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(String, nullable=True)
+    cache_hit = Column(Boolean, default=False, nullable=False)
+    # Имя спецификации извлечения, явно запрошенной клиентом
+    spec = Column(String, nullable=True)
+    # Сколько попыток завершились временной ошибкой и были перезапланированы
+    attempts = Column(Integer, default=0, nullable=False)
+    next_retry_at = Column(DateTime, nullable=True)
+    # Задача, к выполнению которой присоединена эта (тот же URL уже был в работе)
+    leader_id = Column(Uuid(as_uuid=False), nullable=True)
+
+
+class PageValidator(Base):
+    """Валидаторы HTTP-кэша и последний результат парсинга URL (method="http")."""
+
+    __tablename__ = "page_validators"
+    url_hash = Column(String(40), primary_key=True)
+    url = Column(String, nullable=False)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    result = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
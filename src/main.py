@@ -30,6 +30,11 @@ def create_app() -> FastAPI:
     )
 
     app.container = container
+
+    @app.on_event("shutdown")
+    async def dispose_db():
+        await container.task_event_hub().close()
+        await container.async_db().dispose()
     
     app.include_router(parser_router, tags=["Scrapers"])
 
@@ -1,14 +1,23 @@
 """Модуль парсеров."""
 
+from src.parsers.async_http import AsyncHttpParser
 from src.parsers.base import BaseParser
 from src.parsers.browser import SeleniumParser
-from src.parsers.exceptions import NetworkError, ParsingError
+from src.parsers.exceptions import (
+    BrowserRequiredError,
+    NetworkError,
+    ParsingError,
+    ScriptRenderedPageError,
+)
 from src.parsers.http import HttpParser
 
 __all__ = [
     "BaseParser",
     "HttpParser",
+    "AsyncHttpParser",
     "SeleniumParser",
     "ParsingError",
     "NetworkError",
+    "ScriptRenderedPageError",
+    "BrowserRequiredError",
 ]
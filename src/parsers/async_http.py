@@ -0,0 +1,248 @@
+"""Асинхронный HTTP парсер на основе httpx для массовой загрузки страниц."""
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_fixed,
+)
+
+from src.parsers.exceptions import NetworkError, ParsingError
+from src.parsers.html_backends import HtmlBackend
+from src.parsers.http import HttpParser, parse_retry_after
+from src.parsers.specs import ExtractionSpec
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Возвращает цикл событий текущего процесса, запуская его при первом вызове.
+
+    Цикл крутится в отдельном потоке (под gevent - в отдельном green-потоке),
+    поэтому синхронный код из любого потока или green-потока отдаёт ему
+    корутины, не поднимая свой цикл. После fork поток родителя в дочернем
+    процессе не работает - дочерний процесс запускает собственный цикл.
+    """
+    global _loop, _loop_thread, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="async-http-loop", daemon=True)
+            thread.start()
+            _loop = loop
+            _loop_thread = thread
+            _loop_pid = os.getpid()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Выполняет корутину в цикле событий процесса и ждёт результат.
+
+    В отличие от asyncio.run, вызовы из нескольких green-потоков gevent
+    (они делят один поток ОС) не конфликтуют и выполняются параллельно.
+    Нельзя вызывать из самого цикла процесса - это взаимная блокировка.
+    """
+    loop = _get_loop()
+    # Не asyncio.get_running_loop(): под gevent он виден из всех green-потоков
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync нельзя вызывать из цикла событий AsyncHttpParser")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class AsyncHttpParser(HttpParser):
+    """
+    Асинхронный парсер для статических сайтов.
+
+    Загружает страницы через httpx.AsyncClient, поэтому один процесс
+    воркера может держать сотни запросов одновременно, не занимая слот
+    на время сетевого ожидания. Число одновременных запросов ограничено
+    глобально (max_concurrency) и для каждого хоста (per_host_concurrency).
+
+    Извлечение данных и семантика ошибок такие же, как у HttpParser:
+    переопределённый в подклассе extract() работает для обоих парсеров.
+    """
+
+    def __init__(
+        self,
+        timeout: int = 10,
+        max_retries: int = 3,
+        retry_delay: int = 2,
+        max_concurrency: int = 200,
+        per_host_concurrency: int = 8,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        html_backend: str | HtmlBackend = "html.parser",
+        spec: ExtractionSpec | None = None,
+    ):
+        """
+        Args:
+            timeout: Таймаут HTTP-запроса в секундах.
+            max_retries: Максимальное количество повторных попыток.
+            retry_delay: Задержка между попытками в секундах.
+            max_concurrency: Максимум одновременных запросов на процесс.
+            per_host_concurrency: Максимум одновременных запросов к одному хосту.
+            async_transport: Транспорт httpx (для тестов и нестандартных сетей).
+            html_backend: Бэкенд разбора HTML (см. HttpParser).
+            spec: Декларативная спецификация полей (см. HttpParser).
+        """
+        super().__init__(
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            html_backend=html_backend,
+            spec=spec,
+        )
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.async_transport = async_transport
+
+    def _create_retry_decorator(self):
+        """Создаёт декоратор retry для корутин httpx."""
+        return retry(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_fixed(self.retry_delay),
+            retry=retry_if_exception_type((httpx.HTTPError,)),
+            reraise=True,
+        )
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Создаёт клиент с пулом соединений под глобальный лимит."""
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=limits,
+            follow_redirects=True,
+            transport=self.async_transport,
+        )
+
+    async def afetch(self, client: httpx.AsyncClient, url: str) -> str:
+        """
+        Асинхронно загружает HTML-страницу по URL с retry при ошибках.
+
+        Args:
+            client: Открытый httpx.AsyncClient.
+            url: URL страницы.
+
+        Returns:
+            HTML-код страницы.
+
+        Raises:
+            NetworkError: При сетевых ошибках после всех попыток.
+        """
+        retry_decorator = self._create_retry_decorator()
+
+        @retry_decorator
+        async def _fetch() -> str:
+            logger.info(f"Fetching URL: {url}")
+            response = await client.get(url)
+            response.raise_for_status()
+            logger.info(f"Successfully fetched {url}, status: {response.status_code}")
+            return response.text
+
+        try:
+            return await _fetch()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error for {url}: {e}")
+            raise NetworkError(
+                f"HTTP ошибка: {e}",
+                status_code=e.response.status_code,
+                retry_after=parse_retry_after(e.response.headers.get("Retry-After")),
+            ) from e
+        except httpx.HTTPError as e:
+            logger.error(f"Network error for {url}: {e}")
+            raise NetworkError(f"Сетевая ошибка: {e}") from e
+
+    async def aparse(self, url: str, client: httpx.AsyncClient | None = None) -> dict[str, Any]:
+        """
+        Асинхронный аналог parse().
+
+        Args:
+            url: URL страницы для парсинга.
+            client: Открытый клиент; если не передан, создаётся на один запрос.
+
+        Returns:
+            Словарь с данными: {"url": str, "title": str, "success": bool}.
+
+        Raises:
+            ParsingError: Если не удалось извлечь данные.
+            NetworkError: При сетевых ошибках.
+        """
+        if client is None:
+            async with self._create_client() as own_client:
+                html = await self.afetch(own_client, url)
+        else:
+            html = await self.afetch(client, url)
+        return self.extract(url, html)
+
+    async def aparse_many(
+        self, urls: list[str], return_exceptions: bool = False
+    ) -> list[dict[str, Any] | Exception]:
+        """
+        Параллельно парсит список URL с глобальным и per-host лимитами.
+
+        Ошибки ParsingError/NetworkError не прерывают пакет: для такого URL
+        в результат попадает {"url": str, "success": False, "error": str}.
+
+        Args:
+            urls: Список URL.
+            return_exceptions: Класть в результат само исключение вместо словаря
+                с ошибкой (нужно, чтобы решить, повторять ли URL).
+
+        Returns:
+            Результаты в том же порядке, что и urls.
+        """
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits: dict[str, asyncio.Semaphore] = {}
+
+        async def _parse_one(client: httpx.AsyncClient, url: str) -> dict[str, Any] | Exception:
+            host = urlsplit(url).netloc.lower()
+            host_limit = host_limits.setdefault(
+                host, asyncio.Semaphore(self.per_host_concurrency)
+            )
+            async with host_limit, global_limit:
+                try:
+                    return await self.aparse(url, client=client)
+                except (NetworkError, ParsingError) as e:
+                    if return_exceptions:
+                        return e
+                    return {"url": url, "success": False, "error": str(e)}
+
+        async with self._create_client() as client:
+            return list(await asyncio.gather(*(_parse_one(client, url) for url in urls)))
+
+    def parse(self, url: str) -> dict[str, Any]:
+        """
+        Синхронная обёртка над aparse() для совместимости с BaseParser.
+
+        Каждый вызов открывает свой клиент, поэтому для потока одиночных URL
+        она дороже HttpParser; ParserService использует AsyncHttpParser
+        только для пакетов. Из асинхронного кода используйте aparse().
+        """
+        return run_sync(self.aparse(url))
+
+    def parse_many(
+        self, urls: list[str], return_exceptions: bool = False
+    ) -> list[dict[str, Any] | Exception]:
+        """Синхронная обёртка над aparse_many(); пакеты из разных потоков идут параллельно."""
+        return run_sync(self.aparse_many(urls, return_exceptions=return_exceptions))
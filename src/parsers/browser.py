@@ -1,7 +1,8 @@
 """Selenium парсер для динамических сайтов."""
 
 import logging
-from typing import Any
+import time
+from typing import Any, cast
 
 from selenium import webdriver
 from selenium.common.exceptions import (
@@ -13,19 +14,52 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.exceptions import HTTPError
 
 from src.parsers.base import BaseParser
+from src.parsers.driver_pool import DriverPool
 from src.parsers.exceptions import NetworkError, ParsingError
+from src.parsers.specs import ExtractionSpec
 
 logger = logging.getLogger(__name__)
 
 
+def create_remote_driver(selenium_url: str, headless: bool = True) -> WebDriver:
+    """
+    Создаёт подключение к Remote WebDriver.
+
+    Raises:
+        NetworkError: Если Selenium недоступен: ответил ошибкой или не принимает
+            соединения (urllib3 бросает MaxRetryError, а не WebDriverException).
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    logger.info(f"Connecting to Selenium at {selenium_url}")
+    try:
+        driver = webdriver.Remote(
+            command_executor=selenium_url,
+            options=options,
+        )
+        logger.info("Successfully connected to Selenium")
+        return driver
+    except (WebDriverException, HTTPError, OSError) as e:
+        logger.error(f"Failed to connect to Selenium: {e}")
+        raise NetworkError(f"Не удалось подключиться к Selenium: {e}") from e
+
+
 class SeleniumParser(BaseParser):
     """
     Парсер для динамических сайтов с JavaScript.
     
     Использует Selenium Remote WebDriver для подключения
     к контейнеру selenium/standalone-chrome.
+
+    Если передан pool, сессия берётся из DriverPool и возвращается
+    в него при close(), а не закрывается.
     """
 
     def __init__(
@@ -33,49 +67,48 @@ class SeleniumParser(BaseParser):
         selenium_url: str = "http://selenium:4444/wd/hub",
         timeout: int = 10,
         headless: bool = True,
+        pool: DriverPool | None = None,
+        spec: ExtractionSpec | None = None,
     ):
         """
         Args:
             selenium_url: URL Selenium Remote WebDriver.
             timeout: Таймаут ожидания элементов в секундах.
             headless: Запускать браузер без GUI.
+            pool: Пул тёплых сессий; без него сессия создаётся на парсер.
+            spec: Декларативная спецификация полей; применяется к page_source.
         """
         self.selenium_url = selenium_url
         self.timeout = timeout
         self.headless = headless
+        self.pool = pool
+        self.spec = spec
         self._driver: WebDriver | None = None
+        self._pages = 0
 
     def _create_driver(self) -> WebDriver:
         """Создаёт подключение к Remote WebDriver."""
-        options = webdriver.ChromeOptions()
-        if self.headless:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        logger.info(f"Connecting to Selenium at {self.selenium_url}")
-        try:
-            driver = webdriver.Remote(
-                command_executor=self.selenium_url,
-                options=options,
-            )
-            logger.info("Successfully connected to Selenium")
-            return driver
-        except WebDriverException as e:
-            logger.error(f"Failed to connect to Selenium: {e}")
-            raise NetworkError(f"Не удалось подключиться к Selenium: {e}") from e
+        return create_remote_driver(self.selenium_url, headless=self.headless)
 
     def _get_driver(self) -> WebDriver:
-        """Возвращает драйвер, создаёт если не существует."""
+        """Возвращает драйвер, создаёт (или берёт из пула) если не существует."""
         if self._driver is None:
-            self._driver = self._create_driver()
+            if self.pool is not None:
+                self._driver = self.pool.acquire()
+            else:
+                self._driver = self._create_driver()
+            self._pages = 0
         return self._driver
 
     def close(self) -> None:
-        """Закрывает браузер и освобождает ресурсы."""
+        """Закрывает браузер (или возвращает сессию в пул) и освобождает ресурсы."""
         if self._driver is not None:
-            logger.info("Closing Selenium driver")
-            self._driver.quit()
+            if self.pool is not None:
+                logger.info("Returning Selenium driver to pool")
+                self.pool.release(self._driver, pages=self._pages)
+            else:
+                logger.info("Closing Selenium driver")
+                self._driver.quit()
             self._driver = None
 
     def wait_for_element(self, by: By, value: str, timeout: int | None = None) -> Any:
@@ -107,12 +140,44 @@ class SeleniumParser(BaseParser):
                 url=driver.current_url,
             ) from e
 
+    def extract(self, driver: WebDriver, url: str) -> dict[str, Any]:
+        """
+        Извлекает данные из страницы, открытой в текущей вкладке.
+
+        Используется и в parse(), и в parse_many(), поэтому для конкретных
+        сайтов достаточно переопределить этот метод.
+
+        Args:
+            driver: Драйвер, переключённый на вкладку со страницей.
+            url: Запрошенный URL (для результата и сообщений об ошибках).
+
+        Returns:
+            Словарь с данными: {"url": str, "title": str, "success": bool}.
+
+        Raises:
+            ParsingError: Если не удалось извлечь данные.
+        """
+        if self.spec is not None:
+            return self.spec.extract(url, driver.page_source)
+
+        title = driver.title
+        if not title:
+            raise ParsingError("Не удалось получить заголовок страницы", url=url)
+
+        logger.info(f"Parsed {url}: title='{title}'")
+
+        return {
+            "url": url,
+            "title": title,
+            "success": True,
+        }
+
     def parse(self, url: str) -> dict[str, Any]:
         """
         Парсит динамическую страницу.
 
         Базовая реализация: загружает страницу и возвращает заголовок.
-        Для конкретных сайтов нужно переопределить этот метод.
+        Для конкретных сайтов нужно переопределить метод extract().
 
         Args:
             url: URL страницы для парсинга.
@@ -128,24 +193,119 @@ class SeleniumParser(BaseParser):
 
         try:
             logger.info(f"Loading URL: {url}")
+            self._pages += 1
             driver.get(url)
+            return self.extract(driver, url)
 
-            title = driver.title
-            if not title:
-                raise ParsingError("Не удалось получить заголовок страницы", url=url)
+        except WebDriverException as e:
+            logger.error(f"WebDriver error for {url}: {e}")
+            raise NetworkError(f"Ошибка WebDriver: {e}") from e
+
+    def _open_tab(self, driver: WebDriver, url: str) -> str:
+        """Открывает URL в новой вкладке, не дожидаясь загрузки."""
+        driver.switch_to.new_window("tab")
+        # location.assign возвращает управление сразу, в отличие от driver.get
+        driver.execute_script("window.location.assign(arguments[0]);", url)
+        return driver.current_window_handle
+
+    def _tab_state(self, driver: WebDriver) -> tuple[str, str]:
+        """Возвращает (document.readyState, location.href) текущей вкладки."""
+        state, href = driver.execute_script(
+            "return [document.readyState, window.location.href];"
+        )
+        return state, href
+
+    def parse_many(
+        self,
+        urls: list[str],
+        max_tabs: int = 4,
+        page_timeout: float = 30.0,
+        poll_interval: float = 0.2,
+    ) -> list[dict[str, Any]]:
+        """
+        Парсит несколько URL параллельно во вкладках одной сессии.
+
+        Страницы загружаются одновременно в max_tabs вкладках; парсер
+        переключается между ними и забирает данные с тех, что уже загрузились.
+        Ошибка одного URL не прерывает пакет: для него в результат попадает
+        {"url": str, "success": False, "error": str}.
+
+        Args:
+            urls: Список URL.
+            max_tabs: Сколько вкладок держать открытыми одновременно.
+            page_timeout: Сколько секунд ждать загрузки одной страницы.
+            poll_interval: Пауза между обходами вкладок, если ни одна не готова.
+
+        Returns:
+            Результаты в том же порядке, что и urls.
+
+        Raises:
+            NetworkError: При проблемах с подключением к Selenium.
+        """
+        driver = self._get_driver()
+        results: list[dict[str, Any] | None] = [None] * len(urls)
+        queue = list(enumerate(urls))
+        open_tabs: dict[str, tuple[int, str, float]] = {}
 
-            logger.info(f"Parsed {url}: title='{title}'")
+        try:
+            home = driver.current_window_handle
+        except WebDriverException as e:
+            raise NetworkError(f"Ошибка WebDriver: {e}") from e
 
-            return {
-                "url": url,
-                "title": title,
-                "success": True,
-            }
+        def _finish(handle: str, result: dict[str, Any]) -> None:
+            index, _, _ = open_tabs.pop(handle)
+            results[index] = result
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except WebDriverException as e:
+                logger.warning(f"Failed to close tab {handle}: {e}")
 
+        while queue or open_tabs:
+            while queue and len(open_tabs) < max_tabs:
+                index, url = queue.pop(0)
+                logger.info(f"Loading URL in new tab: {url}")
+                self._pages += 1
+                try:
+                    handle = self._open_tab(driver, url)
+                except WebDriverException as e:
+                    logger.error(f"WebDriver error for {url}: {e}")
+                    results[index] = {"url": url, "success": False, "error": f"Ошибка WebDriver: {e}"}
+                    continue
+                open_tabs[handle] = (index, url, time.monotonic())
+
+            progressed = False
+            for handle, (index, url, started) in list(open_tabs.items()):
+                try:
+                    driver.switch_to.window(handle)
+                    state, href = self._tab_state(driver)
+                    if href.startswith("chrome-error://"):
+                        raise NetworkError(f"Страница не загрузилась: {url}")
+                    if state != "complete" or href == "about:blank":
+                        if time.monotonic() - started > page_timeout:
+                            raise NetworkError(f"Таймаут загрузки страницы: {url}")
+                        continue
+                    result = self.extract(driver, url)
+                except (ParsingError, NetworkError) as e:
+                    logger.error(f"Failed to parse {url}: {e}")
+                    result = {"url": url, "success": False, "error": str(e)}
+                except WebDriverException as e:
+                    logger.error(f"WebDriver error for {url}: {e}")
+                    result = {"url": url, "success": False, "error": f"Ошибка WebDriver: {e}"}
+                _finish(handle, result)
+                progressed = True
+
+            if open_tabs and not progressed:
+                time.sleep(poll_interval)
+
+        try:
+            driver.switch_to.window(home)
         except WebDriverException as e:
-            logger.error(f"WebDriver error for {url}: {e}")
             raise NetworkError(f"Ошибка WebDriver: {e}") from e
 
+        # Цикл выходит, только когда у каждого URL есть результат
+        return cast(list[dict[str, Any]], results)
+
     def __enter__(self):
         """Context manager: создаёт драйвер."""
         self._get_driver()
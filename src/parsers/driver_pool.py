@@ -0,0 +1,250 @@
+"""Пул тёплых сессий Selenium Remote WebDriver на процесс воркера."""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.parsers.exceptions import NetworkError
+
+logger = logging.getLogger(__name__)
+
+_CLEAR_STORAGE_SCRIPT = (
+    "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+)
+
+
+@dataclass
+class _PooledDriver:
+    """Сессия в пуле и её счётчики для решения о пересоздании."""
+
+    driver: WebDriver | None
+    created_at: float = field(default_factory=time.monotonic)
+    pages: int = 0
+
+
+class DriverPool:
+    """
+    Пул живых сессий Remote WebDriver.
+
+    Запуск браузерной сессии дороже загрузки страницы, поэтому сессии
+    переиспользуются между задачами. Перед выдачей сессия проверяется
+    (health check), после возврата очищается (cookies, storage, лишние
+    вкладки) и пересоздаётся после max_pages страниц или max_age секунд.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        max_size: int = 2,
+        max_pages: int = 100,
+        max_age: float = 600.0,
+        acquire_timeout: float = 60.0,
+        disposer: Callable[[WebDriver], None] | None = None,
+    ):
+        """
+        Args:
+            factory: Создаёт новую сессию (например, create_remote_driver).
+            max_size: Максимум одновременно открытых сессий.
+            max_pages: После скольких страниц сессия пересоздаётся.
+            max_age: Через сколько секунд сессия пересоздаётся.
+            acquire_timeout: Сколько ждать свободную сессию, если пул исчерпан.
+            disposer: Закрывает сессию; по умолчанию driver.quit().
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.acquire_timeout = acquire_timeout
+        self.disposer = disposer
+        self._idle: list[_PooledDriver] = []
+        self._in_use: dict[int, _PooledDriver] = {}
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Сколько сессий сейчас открыто (свободных и занятых)."""
+        with self._condition:
+            return len(self._idle) + len(self._in_use)
+
+    def _is_expired(self, pooled: _PooledDriver) -> bool:
+        return (
+            pooled.pages >= self.max_pages
+            or time.monotonic() - pooled.created_at >= self.max_age
+        )
+
+    def _is_healthy(self, driver: WebDriver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        # Упавший узел - MaxRetryError/OSError, а не WebDriverException; любая
+        # ошибка проверки означает мёртвую сессию, иначе запись осталась бы в _in_use
+        except Exception as e:
+            logger.warning(f"Pooled Selenium session is dead: {e}")
+            return False
+
+    def _dispose(self, driver: WebDriver) -> None:
+        try:
+            if self.disposer is not None:
+                self.disposer(driver)
+            else:
+                driver.quit()
+        except Exception as e:
+            logger.warning(f"Failed to quit Selenium session: {e}")
+
+    def _reset(self, driver: WebDriver) -> None:
+        """Возвращает сессию в чистое состояние: одна пустая вкладка без cookies."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.execute_script(_CLEAR_STORAGE_SCRIPT)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_script(_CLEAR_STORAGE_SCRIPT)
+        try:
+            # Через CDP удаляются cookies всех доменов, а не только текущего
+            driver.execute(
+                "executeCdpCommand",
+                {"cmd": "Network.clearBrowserCookies", "params": {}},
+            )
+        except WebDriverException:
+            driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def acquire(self) -> WebDriver:
+        """
+        Выдаёт здоровую сессию из пула или создаёт новую.
+
+        Raises:
+            NetworkError: Если сессию не удалось создать или дождаться.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while not self._idle and len(self._in_use) >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise NetworkError("Нет свободных сессий Selenium в пуле")
+                self._condition.wait(remaining)
+
+            # Пустая запись резервирует место под новую сессию, пока она создаётся
+            pooled = self._idle.pop() if self._idle else _PooledDriver(driver=None)
+            self._in_use[id(pooled)] = pooled
+
+        if pooled.driver is not None:
+            if not self._is_expired(pooled) and self._is_healthy(pooled.driver):
+                return pooled.driver
+            self._dispose(pooled.driver)
+            pooled.driver = None
+
+        try:
+            pooled.driver = self.factory()
+        except Exception:
+            self._forget(pooled)
+            raise
+        pooled.created_at = time.monotonic()
+        pooled.pages = 0
+        logger.info(f"Selenium pool: new session, pool size {self.size}")
+        return pooled.driver
+
+    def _find_in_use(self, driver: WebDriver) -> _PooledDriver | None:
+        for pooled in self._in_use.values():
+            if pooled.driver is driver:
+                return pooled
+        return None
+
+    def _forget(self, pooled: _PooledDriver) -> None:
+        with self._condition:
+            self._in_use.pop(id(pooled), None)
+            self._condition.notify()
+
+    def release(self, driver: WebDriver, pages: int = 0) -> None:
+        """
+        Возвращает сессию в пул.
+
+        Args:
+            driver: Сессия, полученная через acquire().
+            pages: Сколько страниц было загружено за время использования.
+        """
+        with self._condition:
+            pooled = self._find_in_use(driver)
+        if pooled is None:
+            self._dispose(driver)
+            return
+
+        pooled.pages += pages
+        keep = not self._is_expired(pooled)
+        if keep:
+            try:
+                self._reset(driver)
+            except Exception as e:
+                logger.warning(f"Failed to reset Selenium session, recycling: {e}")
+                keep = False
+        if not keep:
+            self._dispose(driver)
+
+        with self._condition:
+            self._in_use.pop(id(pooled), None)
+            if keep:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self) -> Iterator[WebDriver]:
+        """Context manager: acquire() и release() вокруг блока."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Закрывает все свободные сессии (занятые закроются при release)."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self.max_pages = 0
+        for pooled in idle:
+            if pooled.driver is not None:
+                self._dispose(pooled.driver)
+
+
+_pools: dict[str, DriverPool] = {}
+_pools_pid: int | None = None
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(key: str, factory: Callable[[], WebDriver], **kwargs) -> DriverPool:
+    """
+    Возвращает пул процесса для key (обычно URL Selenium), создавая при первом вызове.
+
+    Сессии принадлежат процессу, поэтому после fork пулы создаются заново.
+
+    Args:
+        key: Ключ пула.
+        factory: Фабрика сессий для нового пула.
+        **kwargs: Остальные параметры DriverPool.
+    """
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = DriverPool(factory, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def close_driver_pools() -> None:
+    """Закрывает все пулы процесса (при остановке воркера)."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -12,6 +12,21 @@ class ParsingError(Exception):
 class NetworkError(Exception):
     """Сетевая ошибка: таймаут, 5xx, недоступность."""
 
-    def __init__(self, message: str, status_code: int | None = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retry_after: float | None = None,
+    ):
         self.status_code = status_code
+        # Секунды из заголовка Retry-After (429/503), если сайт его прислал
+        self.retry_after = retry_after
         super().__init__(message)
+
+
+class ScriptRenderedPageError(ParsingError):
+    """Статический HTML - оболочка, контент рисует JavaScript (нужен браузер)."""
+
+
+class BrowserRequiredError(ParsingError):
+    """Для method="auto" нужен браузер, а этот воркер его не запускает."""
@@ -0,0 +1,46 @@
+"""Эвристики для выбора метода парсинга."""
+
+import re
+
+# Меньше стольких символов видимого текста при наличии скриптов - вероятно, оболочка SPA
+MIN_VISIBLE_TEXT = 200
+
+_SCRIPT = re.compile(r"<script\b", re.IGNORECASE)
+_BODY = re.compile(r"<body\b", re.IGNORECASE)
+_INVISIBLE = re.compile(
+    r"<(script|style|noscript|template|svg)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+_TAG = re.compile(r"<[^>]+>")
+_NOSCRIPT = re.compile(r"<noscript\b[^>]*>(.*?)</noscript\s*>", re.IGNORECASE | re.DOTALL)
+_ENABLE_JS_PHRASES = (
+    "enable javascript",
+    "javascript is required",
+    "requires javascript",
+    "включите javascript",
+)
+
+
+def looks_like_js_shell(html: str, min_visible_text: int = MIN_VISIBLE_TEXT) -> bool:
+    """
+    Похоже ли, что содержимое страницы рисует JavaScript.
+
+    Признаки: есть <script>, и видимого текста в <body> почти нет
+    (пустой <div id="root"> и бандл) или <noscript> просит включить
+    JavaScript, а текста немного.
+    """
+    if not _SCRIPT.search(html):
+        return False
+
+    body_start = _BODY.search(html)
+    body = html[body_start.start():] if body_start else html
+    visible = len("".join(_TAG.sub(" ", _INVISIBLE.sub(" ", body)).split()))
+    if visible < min_visible_text:
+        return True
+
+    # Многие SSR-сайты тоже просят включить JavaScript, поэтому только при скромном тексте
+    asks_for_js = any(
+        phrase in match.group(1).lower()
+        for match in _NOSCRIPT.finditer(html)
+        for phrase in _ENABLE_JS_PHRASES
+    )
+    return asks_for_js and visible < min_visible_text * 5
@@ -0,0 +1,188 @@
+"""Сменные бэкенды разбора HTML для HttpParser."""
+
+from abc import ABC, abstractmethod
+from bs4 import BeautifulSoup
+
+
+class HtmlDocument(ABC):
+    """
+    Разобранный HTML-документ.
+
+    Методы возвращают текст так же, как BeautifulSoup get_text(strip=True),
+    поэтому результат extract() не зависит от выбранного бэкенда.
+    """
+
+    @abstractmethod
+    def title(self) -> str | None:
+        """Текст первого <title> или None, если его нет."""
+        pass
+
+    @abstractmethod
+    def select_text(self, selector: str) -> list[str]:
+        """Тексты всех элементов по CSS-селектору."""
+        pass
+
+    @abstractmethod
+    def select_attr(self, selector: str, attr: str) -> list[str]:
+        """Значения атрибута attr у элементов по CSS-селектору (у которых он есть)."""
+        pass
+
+
+class HtmlBackend(ABC):
+    """Фабрика HtmlDocument поверх конкретной библиотеки."""
+
+    name: str
+
+    @abstractmethod
+    def parse(self, html: str) -> HtmlDocument:
+        """Разбирает HTML."""
+        pass
+
+
+class _SoupDocument(HtmlDocument):
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+
+    def title(self) -> str | None:
+        tag = self.soup.find("title")
+        return tag.get_text(strip=True) if tag is not None else None
+
+    def select_text(self, selector: str) -> list[str]:
+        return [tag.get_text(strip=True) for tag in self.soup.select(selector)]
+
+    def select_attr(self, selector: str, attr: str) -> list[str]:
+        return [tag[attr] for tag in self.soup.select(selector) if tag.has_attr(attr)]
+
+
+class SoupBackend(HtmlBackend):
+    """BeautifulSoup со встроенным html.parser (чистый Python, без зависимостей)."""
+
+    name = "html.parser"
+
+    def parse(self, html: str) -> HtmlDocument:
+        return _SoupDocument(BeautifulSoup(html, "html.parser"))
+
+
+def _lxml_text(element) -> str:
+    return "".join(part.strip() for part in element.itertext())
+
+
+class _LxmlDocument(HtmlDocument):
+    def __init__(self, root):
+        self.root = root
+
+    def title(self) -> str | None:
+        found = self.root.find(".//title")
+        return _lxml_text(found) if found is not None else None
+
+    def select_text(self, selector: str) -> list[str]:
+        return [_lxml_text(element) for element in self.root.cssselect(selector)]
+
+    def select_attr(self, selector: str, attr: str) -> list[str]:
+        return [
+            element.get(attr)
+            for element in self.root.cssselect(selector)
+            if element.get(attr) is not None
+        ]
+
+
+class LxmlBackend(HtmlBackend):
+    """lxml.html (libxml2); CSS-селекторы через cssselect."""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+
+        self._fromstring = lxml.html.document_fromstring
+
+    def parse(self, html: str) -> HtmlDocument:
+        if not html.strip():
+            # lxml не принимает пустой документ
+            html = "<html></html>"
+        try:
+            return _LxmlDocument(self._fromstring(html))
+        except ValueError:
+            # str с <?xml encoding=...?> lxml принимает только байтами
+            return _LxmlDocument(self._fromstring(html.encode("utf-8")))
+
+
+def _node_text(node) -> str:
+    return node.text(deep=True, strip=True)
+
+
+class _SelectolaxDocument(HtmlDocument):
+    def __init__(self, tree):
+        self.tree = tree
+
+    def title(self) -> str | None:
+        node = self.tree.css_first("title")
+        return _node_text(node) if node is not None else None
+
+    def select_text(self, selector: str) -> list[str]:
+        return [_node_text(node) for node in self.tree.css(selector)]
+
+    def select_attr(self, selector: str, attr: str) -> list[str]:
+        return [
+            node.attributes[attr]
+            for node in self.tree.css(selector)
+            if node.attributes.get(attr) is not None
+        ]
+
+
+class SelectolaxBackend(HtmlBackend):
+    """selectolax (C-движок Modest) - самый быстрый разбор и CSS-селекторы."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.parser import HTMLParser
+
+        self._parser = HTMLParser
+
+    def parse(self, html: str) -> HtmlDocument:
+        return _SelectolaxDocument(self._parser(html))
+
+
+HTML_BACKENDS: dict[str, type[HtmlBackend]] = {
+    SoupBackend.name: SoupBackend,
+    LxmlBackend.name: LxmlBackend,
+    SelectolaxBackend.name: SelectolaxBackend,
+}
+
+_instances: dict[str, HtmlBackend] = {}
+
+
+def get_html_backend(backend: str | HtmlBackend = "html.parser") -> HtmlBackend:
+    """
+    Возвращает бэкенд по имени (экземпляры без состояния, кэшируются).
+
+    Raises:
+        ValueError: Неизвестное имя бэкенда.
+        ImportError: Библиотека бэкенда не установлена.
+    """
+    if isinstance(backend, HtmlBackend):
+        return backend
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"Неизвестный HTML бэкенд: {backend}")
+    if backend not in _instances:
+        try:
+            _instances[backend] = HTML_BACKENDS[backend]()
+        except ImportError as e:
+            raise ImportError(
+                f"Для HTML бэкенда {backend} не установлена библиотека: {e.name}"
+            ) from e
+    return _instances[backend]
+
+
+def available_html_backends() -> list[str]:
+    """Имена бэкендов, библиотеки которых установлены."""
+    available = []
+    for name in HTML_BACKENDS:
+        try:
+            get_html_backend(name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
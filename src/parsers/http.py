@@ -1,10 +1,11 @@
 """HTTP парсер на основе requests с поддержкой retry."""
 
 import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import requests
-from bs4 import BeautifulSoup
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -13,29 +14,88 @@ from tenacity import (
 )
 
 from src.parsers.base import BaseParser
-from src.parsers.exceptions import NetworkError, ParsingError
+from src.parsers.exceptions import NetworkError, ParsingError, ScriptRenderedPageError
+from src.parsers.heuristics import looks_like_js_shell
+from src.parsers.html_backends import HtmlBackend, HtmlDocument, get_html_backend
+from src.parsers.revalidation import CachedPage, ValidatorStore
+from src.parsers.specs import ExtractionSpec
+from src.parsers.streaming import TitleExtractor, decode_chunks
+from src.parsers.transport import HttpTransport, get_transport
 
 logger = logging.getLogger(__name__)
 
 
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After в секундах: число секунд или HTTP-дата."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
 class HttpParser(BaseParser):
     """
     Парсер для статических сайтов и API.
     
-    Использует requests для HTTP-запросов и BeautifulSoup для парсинга HTML.
+    Использует requests для HTTP-запросов; HTML разбирается выбранным
+    бэкендом (html.parser, lxml, selectolax - см. html_backends.py).
+    Запросы идут через общий для процесса HttpTransport (keep-alive пул
+    и DNS-кэш), поэтому повторные запросы к сайту не открывают новое соединение.
     При сетевых ошибках автоматически делает повторные попытки (Tenacity).
+
+    Если передано хранилище валидаторов, повторный запрос страницы идёт
+    с If-None-Match / If-Modified-Since, и на 304 возвращается сохранённый
+    результат без загрузки тела и разбора HTML.
+
+    В потоковом режиме (streaming=True) тело читается чанками в
+    инкрементальный парсер, и загрузка прекращается, как только найдены
+    все нужные поля; кодировка берётся из заголовков и meta, без анализа
+    всего тела.
     """
 
-    def __init__(self, timeout: int = 10, max_retries: int = 3, retry_delay: int = 2):
+    # Размер чанка при потоковом чтении тела
+    STREAM_CHUNK_SIZE = 16 * 1024
+
+    def __init__(
+        self,
+        timeout: int = 10,
+        max_retries: int = 3,
+        retry_delay: int = 2,
+        transport: HttpTransport | None = None,
+        validator_store: ValidatorStore | None = None,
+        streaming: bool = False,
+        html_backend: str | HtmlBackend = "html.parser",
+        spec: ExtractionSpec | None = None,
+        reject_js_shell: bool = False,
+    ):
         """
         Args:
             timeout: Таймаут HTTP-запроса в секундах.
             max_retries: Максимальное количество повторных попыток.
             retry_delay: Задержка между попытками в секундах.
+            transport: HTTP-транспорт; по умолчанию общий транспорт процесса.
+            validator_store: Хранилище ETag / Last-Modified; без него запросы безусловные.
+            streaming: Читать тело потоком с ранним выходом (extract_stream) вместо extract.
+            html_backend: Бэкенд разбора HTML для extract() или его экземпляр.
+            spec: Декларативная спецификация полей; без неё извлекается только заголовок.
+            reject_js_shell: Бросать ScriptRenderedPageError, если страница похожа
+                на оболочку, которую рисует JavaScript (для method="auto").
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.transport = transport
+        self.validator_store = validator_store
+        self.streaming = streaming
+        self.html_backend = get_html_backend(html_backend)
+        self.spec = spec
+        self.reject_js_shell = reject_js_shell
 
     def _create_retry_decorator(self):
         """Создаёт декоратор retry с текущими настройками."""
@@ -56,25 +116,51 @@ class HttpParser(BaseParser):
         Returns:
             HTML-код страницы.
 
+        Raises:
+            NetworkError: При сетевых ошибках после всех попыток.
+        """
+        return self.fetch_response(url).text
+
+    def fetch_response(
+        self, url: str, headers: dict[str, str] | None = None, stream: bool = False
+    ) -> requests.Response:
+        """
+        Выполняет GET с retry и возвращает ответ (статус, заголовки, тело).
+
+        При stream=True тело не загружается до чтения, ответ нужно закрыть.
+        Ответ 304 ошибкой не считается.
+
         Raises:
             NetworkError: При сетевых ошибках после всех попыток.
         """
         retry_decorator = self._create_retry_decorator()
+        transport = self.transport or get_transport()
 
         @retry_decorator
-        def _fetch() -> str:
+        def _fetch() -> requests.Response:
             logger.info(f"Fetching URL: {url}")
-            response = requests.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            response = transport.get(url, timeout=self.timeout, headers=headers, stream=stream)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                response.close()
+                raise
             logger.info(f"Successfully fetched {url}, status: {response.status_code}")
-            return response.text
+            return response
 
         try:
             return _fetch()
         except requests.exceptions.HTTPError as e:
-            status_code = e.response.status_code if e.response else None
+            # Response с кодом ошибки ложен в bool, поэтому сравнение с None
+            response = e.response
+            status_code = response.status_code if response is not None else None
             logger.error(f"HTTP error for {url}: {e}")
-            raise NetworkError(f"HTTP ошибка: {e}", status_code=status_code) from e
+            raise NetworkError(
+                f"HTTP ошибка: {e}",
+                status_code=status_code,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                if response is not None else None,
+            ) from e
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error for {url}: {e}")
             raise NetworkError(f"Сетевая ошибка: {e}") from e
@@ -84,7 +170,7 @@ class HttpParser(BaseParser):
         Парсит страницу и извлекает данные.
 
         Это базовая реализация, которая возвращает заголовок страницы.
-        Для конкретных сайтов нужно переопределить этот метод.
+        Для конкретных сайтов нужно переопределить метод extract().
 
         Args:
             url: URL страницы для парсинга.
@@ -96,14 +182,73 @@ class HttpParser(BaseParser):
             ParsingError: Если не удалось извлечь данные.
             NetworkError: При сетевых ошибках.
         """
-        html = self.fetch(url)
-        soup = BeautifulSoup(html, "html.parser")
+        cached = self.validator_store.get(url) if self.validator_store else None
+        if cached is not None and cached.result.get("spec") != (self.spec.name if self.spec else None):
+            # Сохранённый результат извлечён другой спецификацией - нужен полный ответ
+            cached = None
+        # Потоковый режим умеет только заголовок; спецификации и проверке на JS-оболочку
+        # нужен весь документ
+        streaming = self.streaming and self.spec is None and not self.reject_js_shell
+        response = self.fetch_response(
+            url,
+            headers=cached.conditional_headers() if cached else None,
+            stream=streaming,
+        )
+        try:
+            if response.status_code == 304 and cached is not None:
+                logger.info(f"Not modified: {url}, reusing previous result")
+                return cached.result
+
+            if streaming:
+                result = self.extract_stream(url, response)
+            else:
+                html = response.text
+                if self.reject_js_shell and looks_like_js_shell(html):
+                    raise ScriptRenderedPageError("Контент страницы рисует JavaScript", url=url)
+                result = self.extract(url, html)
+        finally:
+            response.close()
+
+        if self.validator_store is not None:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.validator_store.save(url, CachedPage(etag, last_modified, result))
+        return result
+
+    def parse_html(self, html: str) -> HtmlDocument:
+        """
+        Разбирает HTML выбранным бэкендом.
+
+        Переопределённые в подклассах extract() должны использовать этот метод,
+        а не конкретную библиотеку, чтобы бэкенд оставался настраиваемым.
+        """
+        return self.html_backend.parse(html)
+
+    def extract(self, url: str, html: str) -> dict[str, Any]:
+        """
+        Извлекает данные из уже загруженного HTML.
+
+        Вынесено из parse(), чтобы синхронный и асинхронный парсеры
+        использовали одну и ту же логику извлечения.
+
+        Args:
+            url: URL страницы (для сообщений об ошибках и результата).
+            html: HTML-код страницы.
 
-        title_tag = soup.find("title")
-        if title_tag is None:
+        Returns:
+            Словарь с данными: {"url": str, "title": str, "success": bool}.
+
+        Raises:
+            ParsingError: Если не удалось извлечь данные.
+        """
+        if self.spec is not None:
+            return self.spec.extract(url, html)
+
+        title = self.parse_html(html).title()
+        if title is None:
             raise ParsingError("Не найден тег <title>", url=url)
 
-        title = title_tag.get_text(strip=True)
         logger.info(f"Parsed {url}: title='{title}'")
 
         return {
@@ -111,3 +256,37 @@ class HttpParser(BaseParser):
             "title": title,
             "success": True,
         }
+
+    def extract_stream(self, url: str, response: requests.Response) -> dict[str, Any]:
+        """
+        Извлекает данные, читая тело ответа чанками.
+
+        Чтение прекращается после первого </title>; оставшаяся часть
+        страницы не загружается и не разбирается. Результат такой же,
+        как у extract().
+
+        Args:
+            url: URL страницы.
+            response: Ответ, открытый с stream=True.
+
+        Raises:
+            ParsingError: Если не удалось извлечь данные.
+        """
+        extractor = TitleExtractor()
+        chunks = response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)
+        for text in decode_chunks(chunks, response.headers.get("Content-Type")):
+            extractor.feed(text)
+            if extractor.done:
+                break
+        else:
+            extractor.close()
+
+        if extractor.title is None:
+            raise ParsingError("Не найден тег <title>", url=url)
+
+        logger.info(f"Parsed {url} (streaming): title='{extractor.title}'")
+        return {
+            "url": url,
+            "title": extractor.title,
+            "success": True,
+        }
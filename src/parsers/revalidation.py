@@ -0,0 +1,42 @@
+"""Условные запросы (ETag / Last-Modified) для повторного парсинга."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CachedPage:
+    """Валидаторы страницы и результат её последнего парсинга."""
+
+    etag: str | None
+    last_modified: str | None
+    result: dict[str, Any]
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Заголовки If-None-Match / If-Modified-Since для повторного запроса."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ValidatorStore(ABC):
+    """
+    Хранилище валидаторов по URL.
+
+    Парсеры не знают, где оно лежит (БД, память), поэтому работают
+    только через этот интерфейс.
+    """
+
+    @abstractmethod
+    def get(self, url: str) -> CachedPage | None:
+        """Возвращает сохранённые валидаторы и результат для URL."""
+        pass
+
+    @abstractmethod
+    def save(self, url: str, page: CachedPage) -> None:
+        """Сохраняет валидаторы и результат после полного парсинга."""
+        pass
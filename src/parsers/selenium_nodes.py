@@ -0,0 +1,232 @@
+"""Балансировка сессий между несколькими Selenium-эндпоинтами."""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.parsers.browser import create_remote_driver
+from src.parsers.exceptions import NetworkError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SeleniumNode:
+    """Эндпоинт Selenium и его счётчики."""
+
+    url: str
+    healthy: bool = True
+    free_slots: int = 0
+    total_slots: int = 0
+    active_sessions: int = 0
+    sessions_created: int = 0
+    failures: int = 0
+    checked_at: float = 0.0
+    unhealthy_until: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "free_slots": self.free_slots,
+            "total_slots": self.total_slots,
+            "active_sessions": self.active_sessions,
+            "sessions_created": self.sessions_created,
+            "failures": self.failures,
+        }
+
+
+def _status_url(selenium_url: str) -> str:
+    """http://host:4444/wd/hub -> http://host:4444/status"""
+    parts = urlsplit(selenium_url)
+    path = parts.path.rstrip("/")
+    if path.endswith("/wd/hub"):
+        path = path[: -len("/wd/hub")]
+    return urlunsplit((parts.scheme, parts.netloc, f"{path}/status", "", ""))
+
+
+def _count_slots(status: dict[str, Any]) -> tuple[int, int]:
+    """Считает (свободные, все) слоты по ответу /status Selenium Grid 4."""
+    value = status.get("value", {})
+    nodes = value.get("nodes")
+    if not nodes:
+        # Старые standalone-образы не отдают слоты: считаем узел однослотовым
+        return (1, 1) if value.get("ready") else (0, 1)
+
+    free = total = 0
+    for node in nodes:
+        if node.get("availability", "UP") != "UP":
+            continue
+        for slot in node.get("slots", []):
+            total += 1
+            if slot.get("session") is None:
+                free += 1
+    return free, total
+
+
+class SeleniumBalancer:
+    """
+    Распределяет новые сессии по нескольким Selenium-эндпоинтам.
+
+    Сессия открывается на здоровом узле с наибольшим числом свободных
+    слотов (по /status, с кэшем на status_ttl секунд). Если create_remote_driver
+    падает с NetworkError, узел на unhealthy_cooldown секунд исключается
+    и сессия создаётся на следующем.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        headless: bool = True,
+        status_ttl: float = 5.0,
+        status_timeout: float = 2.0,
+        unhealthy_cooldown: float = 30.0,
+    ):
+        """
+        Args:
+            urls: URL Selenium Remote WebDriver (http://host:4444/wd/hub).
+            headless: Запускать браузер без GUI.
+            status_ttl: Сколько секунд считать ответ /status актуальным.
+            status_timeout: Таймаут запроса /status.
+            unhealthy_cooldown: На сколько секунд исключать упавший узел.
+        """
+        if not urls:
+            raise ValueError("Не задан ни один Selenium-эндпоинт")
+        self.headless = headless
+        self.status_ttl = status_ttl
+        self.status_timeout = status_timeout
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self.nodes = [SeleniumNode(url=url) for url in urls]
+        self._sessions: dict[int, SeleniumNode] = {}
+        self._lock = threading.Lock()
+
+    def _mark_unhealthy(self, node: SeleniumNode) -> None:
+        node.healthy = False
+        node.unhealthy_until = time.monotonic() + self.unhealthy_cooldown
+
+    def refresh(self, node: SeleniumNode) -> None:
+        """Запрашивает /status узла и обновляет его слоты и здоровье."""
+        # HTTP-запрос - без блокировки: остальные потоки тем временем создают
+        # и закрывают сессии на других узлах
+        try:
+            response = requests.get(_status_url(node.url), timeout=self.status_timeout)
+            response.raise_for_status()
+            free, total = _count_slots(response.json())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Selenium node {node.url} status check failed: {e}")
+            with self._lock:
+                self._mark_unhealthy(node)
+                node.checked_at = time.monotonic()
+            return
+        with self._lock:
+            node.free_slots = free
+            node.total_slots = total
+            node.healthy = total > 0
+            node.checked_at = time.monotonic()
+
+    def _ranked_nodes(self) -> list[SeleniumNode]:
+        """Здоровые узлы от наименее к наиболее загруженному."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                node for node in self.nodes
+                if now >= node.unhealthy_until and now - node.checked_at >= self.status_ttl
+            ]
+            # Узел проверяет один поток; остальные до его ответа берут прежние слоты
+            for node in stale:
+                node.checked_at = now
+
+        for node in stale:
+            self.refresh(node)
+
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                node for node in self.nodes
+                if node.healthy and now >= node.unhealthy_until
+            ]
+            # Сначала узлы со свободными слотами; при равенстве - где меньше наших сессий
+            return sorted(candidates, key=lambda n: (-n.free_slots, n.active_sessions))
+
+    def create_driver(self) -> WebDriver:
+        """
+        Создаёт сессию на наименее загруженном здоровом узле.
+
+        Raises:
+            NetworkError: Если сессию не удалось создать ни на одном узле.
+        """
+        nodes = self._ranked_nodes()
+        if not nodes:
+            raise NetworkError("Нет доступных Selenium-узлов")
+
+        last_error: NetworkError | None = None
+        for node in nodes:
+            try:
+                driver = create_remote_driver(node.url, headless=self.headless)
+            except NetworkError as e:
+                logger.warning(f"Selenium node {node.url} failed, trying next: {e}")
+                with self._lock:
+                    node.failures += 1
+                    self._mark_unhealthy(node)
+                last_error = e
+                continue
+
+            with self._lock:
+                node.sessions_created += 1
+                node.active_sessions += 1
+                # Слот занят нами - не ждём следующего /status, чтобы не перегрузить узел
+                node.free_slots = max(node.free_slots - 1, 0)
+                self._sessions[id(driver)] = node
+            return driver
+
+        raise last_error or NetworkError("Нет доступных Selenium-узлов")
+
+    def release_driver(self, driver: WebDriver) -> None:
+        """Закрывает сессию и освобождает слот узла."""
+        with self._lock:
+            node = self._sessions.pop(id(driver), None)
+            if node is not None:
+                node.active_sessions = max(node.active_sessions - 1, 0)
+                node.free_slots = min(node.free_slots + 1, node.total_slots)
+        driver.quit()
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Счётчики по узлам: {url: {...}}."""
+        with self._lock:
+            return {node.url: node.as_dict() for node in self.nodes}
+
+
+_balancers: dict[tuple[str, ...], SeleniumBalancer] = {}
+_balancers_pid: int | None = None
+_balancers_lock = threading.Lock()
+
+
+def get_selenium_balancer(urls: list[str], **kwargs) -> SeleniumBalancer:
+    """Возвращает балансировщик процесса для набора эндпоинтов."""
+    global _balancers_pid
+    key = tuple(urls)
+    with _balancers_lock:
+        if _balancers_pid != os.getpid():
+            _balancers.clear()
+            _balancers_pid = os.getpid()
+        balancer = _balancers.get(key)
+        if balancer is None:
+            balancer = SeleniumBalancer(list(urls), **kwargs)
+            _balancers[key] = balancer
+        return balancer
+
+
+def get_selenium_stats() -> dict[str, dict[str, Any]]:
+    """Счётчики всех балансировщиков текущего процесса."""
+    with _balancers_lock:
+        balancers = list(_balancers.values()) if _balancers_pid == os.getpid() else []
+    stats: dict[str, dict[str, Any]] = {}
+    for balancer in balancers:
+        stats.update(balancer.get_stats())
+    return stats
@@ -0,0 +1,212 @@
+"""Декларативные спецификации извлечения данных для сайтов."""
+
+import fnmatch
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import lxml.html
+from cssselect import HTMLTranslator
+from lxml import etree
+
+from src.parsers.exceptions import ParsingError
+
+logger = logging.getLogger(__name__)
+
+SELECTOR_KINDS = ("css", "xpath")
+
+_css_translator = HTMLTranslator()
+
+
+@lru_cache(maxsize=4096)
+def compile_selector(kind: str, expression: str) -> etree.XPath:
+    """
+    Компилирует селектор в etree.XPath.
+
+    CSS переводится в XPath через cssselect. Кэш общий для процесса,
+    поэтому одинаковые селекторы разных спецификаций компилируются один раз.
+
+    Raises:
+        ValueError: Неизвестный тип или синтаксическая ошибка в селекторе.
+    """
+    if kind not in SELECTOR_KINDS:
+        raise ValueError(f"Неизвестный тип селектора: {kind}")
+    try:
+        if kind == "css":
+            expression = _css_translator.css_to_xpath(expression)
+        return etree.XPath(expression)
+    except Exception as e:
+        raise ValueError(f"Некорректный {kind}-селектор {expression!r}: {e}") from e
+
+
+def _text(node: Any) -> str:
+    # Результат XPath - элемент, строка (text(), @attr) или число
+    if isinstance(node, etree._Element):
+        return "".join(part.strip() for part in node.itertext())
+    return str(node).strip()
+
+
+@dataclass
+class FieldRule:
+    """
+    Правило для одного поля результата.
+
+    Ровно один из css / xpath. attr - взять атрибут вместо текста,
+    many - вернуть список всех совпадений, required - ParsingError,
+    если ничего не найдено.
+    """
+
+    name: str
+    css: str | None = None
+    xpath: str | None = None
+    attr: str | None = None
+    many: bool = False
+    required: bool = False
+    compiled: etree.XPath = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if (self.css is None) == (self.xpath is None):
+            raise ValueError(f"Поле {self.name}: нужен ровно один из css / xpath")
+        kind, expression = ("css", self.css) if self.css is not None else ("xpath", self.xpath)
+        self.compiled = compile_selector(kind, expression)
+
+    def evaluate(self, root: etree._Element) -> Any:
+        found = self.compiled(root)
+        if not isinstance(found, list):
+            # XPath вида count(...) или string(...)
+            found = [found]
+        if self.attr is not None:
+            values = [
+                node.get(self.attr)
+                for node in found
+                if isinstance(node, etree._Element) and node.get(self.attr) is not None
+            ]
+        else:
+            values = [_text(node) for node in found]
+        return values if self.many else (values[0] if values else None)
+
+
+@dataclass
+class ExtractionSpec:
+    """
+    Набор правил для сайта.
+
+    match - шаблоны, по которым спецификация выбирается автоматически:
+    домен ("example.com"), домен с поддоменами ("*.example.com")
+    или шаблон URL ("https://example.com/items/*").
+    """
+
+    name: str
+    fields: list[FieldRule]
+    match: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ExtractionSpec":
+        return cls(
+            name=data["name"],
+            match=list(data.get("match", [])),
+            fields=[FieldRule(**rule) for rule in data["fields"]],
+        )
+
+    def matches(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        for pattern in self.match:
+            if "://" in pattern:
+                if fnmatch.fnmatchcase(url, pattern):
+                    return True
+            elif fnmatch.fnmatchcase(host, pattern.lower()):
+                return True
+        return False
+
+    def extract(self, url: str, html: str) -> dict[str, Any]:
+        """
+        Разбирает документ один раз и вычисляет все поля на одном дереве.
+
+        Returns:
+            {"url", "title", "success", "spec", "data": {поле: значение}}.
+
+        Raises:
+            ParsingError: Не найдено обязательное поле.
+        """
+        root = _parse_document(html)
+        data = {}
+        for rule in self.fields:
+            value = rule.evaluate(root)
+            if rule.required and value in (None, []):
+                raise ParsingError(f"Не найдено поле {rule.name} ({self.name})", url=url)
+            data[rule.name] = value
+
+        title_node = root.find(".//title")
+        logger.info(f"Parsed {url} by spec {self.name}: {len(data)} fields")
+        return {
+            "url": url,
+            "title": _text(title_node) if title_node is not None else None,
+            "success": True,
+            "spec": self.name,
+            "data": data,
+        }
+
+
+def _parse_document(html: str) -> etree._Element:
+    if not html.strip():
+        html = "<html></html>"
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str с <?xml encoding=...?> lxml принимает только байтами
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+class SpecRegistry:
+    """
+    Реестр спецификаций: выбор по имени или по URL.
+
+    Загружается из JSON-файла вида {"specs": [{"name", "match", "fields"}, ...]};
+    селекторы компилируются при загрузке.
+    """
+
+    def __init__(self, specs: list[ExtractionSpec] | None = None):
+        self._specs: dict[str, ExtractionSpec] = {}
+        for spec in specs or []:
+            self.register(spec)
+
+    @classmethod
+    def from_file(cls, path: str | None) -> "SpecRegistry":
+        """Загружает реестр из файла; без пути - пустой реестр."""
+        if not path:
+            return cls()
+        with Path(path).open(encoding="utf-8") as f:
+            raw = json.load(f)
+        registry = cls([ExtractionSpec.from_dict(item) for item in raw["specs"]])
+        logger.info(f"Loaded {len(registry)} extraction specs from {path}")
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def register(self, spec: ExtractionSpec) -> None:
+        self._specs[spec.name] = spec
+
+    def get(self, name: str) -> ExtractionSpec | None:
+        return self._specs.get(name)
+
+    def resolve(self, url: str, name: str | None = None) -> ExtractionSpec | None:
+        """
+        Спецификация для задачи: явно указанная по имени, иначе первая подходящая по URL.
+
+        Raises:
+            ValueError: Спецификации с таким именем нет.
+        """
+        if name is not None:
+            spec = self._specs.get(name)
+            if spec is None:
+                raise ValueError(f"Неизвестная спецификация извлечения: {name}")
+            return spec
+        for spec in self._specs.values():
+            if spec.matches(url):
+                return spec
+        return None
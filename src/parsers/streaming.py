@@ -0,0 +1,121 @@
+"""Потоковое извлечение данных из HTML без загрузки страницы целиком."""
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Iterator
+
+# По спецификации HTML meta charset ищется в первых 1024 байтах
+PRESCAN_BYTES = 1024
+DEFAULT_ENCODING = "utf-8"
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE
+)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _known_encoding(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content_type: str | None, head: bytes) -> str:
+    """
+    Определяет кодировку по BOM, заголовку Content-Type и meta в начале документа.
+
+    Тело целиком не анализируется (в отличие от response.text).
+
+    Args:
+        content_type: Значение заголовка Content-Type.
+        head: Первые байты ответа (достаточно PRESCAN_BYTES).
+
+    Returns:
+        Имя кодировки для codecs; utf-8, если ничего не найдено.
+    """
+    for bom, bom_encoding in _BOMS:
+        if head.startswith(bom):
+            return bom_encoding
+
+    if content_type:
+        header = _HEADER_CHARSET.search(content_type)
+        encoding = _known_encoding(header.group(1)) if header else None
+        if encoding:
+            return encoding
+
+    meta = _META_CHARSET.search(head[:PRESCAN_BYTES])
+    encoding = _known_encoding(meta.group(1).decode("ascii", "ignore")) if meta else None
+    return encoding or DEFAULT_ENCODING
+
+
+def decode_chunks(chunks: Iterable[bytes], content_type: str | None) -> Iterator[str]:
+    """
+    Декодирует поток байтов по мере поступления.
+
+    Первые PRESCAN_BYTES буферизуются для поиска meta charset,
+    дальше каждый чанк декодируется сразу.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= PRESCAN_BYTES:
+            break
+
+    decoder = codecs.getincrementaldecoder(detect_encoding(content_type, head))(errors="replace")
+    if head:
+        yield decoder.decode(head)
+    for chunk in chunks:
+        if chunk:
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class TitleExtractor(HTMLParser):
+    """
+    Инкрементальный парсер, которому нужен только первый <title>.
+
+    После закрывающего </title> выставляет done - остаток документа
+    можно не загружать.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: str | None = None
+        self.done = False
+        self._in_title = False
+        self._parts: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._finish_title()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._parts.append(data)
+
+    def close(self):
+        super().close()
+        # Незакрытый <title> в конце документа
+        if self._in_title:
+            self._finish_title()
+
+    def _finish_title(self):
+        self._in_title = False
+        self.title = "".join(self._parts).strip()
+        self.done = True
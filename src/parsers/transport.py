@@ -0,0 +1,326 @@
+"""Общий HTTP-транспорт процесса: keep-alive пул соединений и DNS-кэш."""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.poolmanager import PoolManager
+
+logger = logging.getLogger(__name__)
+
+# Миксин подмешивается перед HTTPConnection/HTTPSConnection; для mypy он сам
+# наследует HTTPConnection, чтобы были видны _dns_host, port и _new_conn
+if TYPE_CHECKING:
+    _ConnectionBase = HTTPConnection
+else:
+    _ConnectionBase = object
+
+
+class DnsCache:
+    """
+    Потокобезопасный кэш DNS с TTL.
+
+    Хранит результат getaddrinfo для пары (host, port), чтобы повторные
+    подключения к одному домену не делали DNS-запрос каждый раз.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Args:
+            ttl: Время жизни записи в секундах.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple[str, int], tuple[float, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> list[str]:
+        """
+        Возвращает IP-адреса хоста (из кэша или через getaddrinfo).
+
+        Raises:
+            socket.gaierror: Если имя не резолвится.
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        # Порядок getaddrinfo сохраняем, дубликаты (по протоколам) убираем
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def demote(self, host: str, port: int, address: str) -> None:
+        """
+        Переносит адрес в конец записи: он не ответил, и следующие подключения
+        до истечения TTL сначала пробуют остальные адреса.
+        """
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry is not None and address in entry[1]:
+                addresses = [a for a in entry[1] if a != address] + [address]
+                self._entries[(host, port)] = (entry[0], addresses)
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Удаляет запись, например если ни один адрес не ответил."""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class TransportStats:
+    """Счётчики запросов и новых соединений по хостам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: dict[str, dict[str, int]] = {}
+
+    def _host(self, host: str) -> dict[str, int]:
+        return self._hosts.setdefault(host, {"requests": 0, "connections": 0})
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self._host(host)["requests"] += 1
+
+    def record_connection(self, host: str) -> None:
+        with self._lock:
+            self._host(host)["connections"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Возвращает копию счётчиков.
+
+        reused - сколько запросов ушло по уже открытому keep-alive соединению.
+        """
+        with self._lock:
+            hosts = {
+                host: {
+                    **counters,
+                    "reused": max(counters["requests"] - counters["connections"], 0),
+                }
+                for host, counters in self._hosts.items()
+            }
+        total_requests = sum(h["requests"] for h in hosts.values())
+        total_connections = sum(h["connections"] for h in hosts.values())
+        return {
+            "requests": total_requests,
+            "connections": total_connections,
+            "reused": max(total_requests - total_connections, 0),
+            "hosts": hosts,
+        }
+
+
+class _CachedDnsConnectionMixin(_ConnectionBase):
+    """
+    Подмешивается к соединениям urllib3: резолвит хост через DnsCache.
+
+    SNI и проверка сертификата по-прежнему используют исходное имя хоста,
+    подменяется только адрес, к которому открывается сокет.
+    """
+
+    dns_cache: DnsCache
+    stats: TransportStats
+
+    def _new_conn(self) -> socket.socket:
+        host = self._dns_host
+        addresses = self.dns_cache.resolve(host, self.port)
+        last_error: Exception | None = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    # Таймаут или отказ (connection refused) - адрес мёртв, пробуем следующий
+                    self.dns_cache.demote(host, self.port, address)
+                    last_error = e
+                    continue
+                self.stats.record_connection(host.rstrip("."))
+                return sock
+        finally:
+            # host (и SNI при TLS) urllib3 берёт из _dns_host, поэтому возвращаем имя
+            self._dns_host = host
+
+        # Ни один закэшированный адрес не ответил - при следующей попытке резолвим заново
+        self.dns_cache.invalidate(host, self.port)
+        if last_error is None:
+            raise OSError(f"DNS не вернул адресов для {host}")
+        raise last_error
+
+
+class _TransportPoolManager(PoolManager):
+    """PoolManager с DNS-кэшем и размером пула, заданным для каждого хоста."""
+
+    def __init__(
+        self,
+        dns_cache: DnsCache,
+        stats: TransportStats,
+        host_pool_sizes: dict[str, int],
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.host_pool_sizes = host_pool_sizes
+        attrs = {"dns_cache": dns_cache, "stats": stats}
+        http_connection = type(
+            "CachedDnsHTTPConnection", (_CachedDnsConnectionMixin, HTTPConnection), attrs
+        )
+        https_connection = type(
+            "CachedDnsHTTPSConnection", (_CachedDnsConnectionMixin, HTTPSConnection), attrs
+        )
+        self.pool_classes_by_scheme = {
+            "http": type("CachedDnsHTTPConnectionPool", (HTTPConnectionPool,), {
+                "ConnectionCls": http_connection,
+            }),
+            "https": type("CachedDnsHTTPSConnectionPool", (HTTPSConnectionPool,), {
+                "ConnectionCls": https_connection,
+            }),
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        maxsize = self.host_pool_sizes.get(host)
+        if maxsize is not None:
+            if request_context is None:
+                request_context = self.connection_pool_kw.copy()
+            request_context["maxsize"] = maxsize
+        return super()._new_pool(scheme, host, port, request_context)
+
+
+class _TransportAdapter(HTTPAdapter):
+    """HTTPAdapter, который строит _TransportPoolManager и считает запросы."""
+
+    def __init__(
+        self,
+        dns_cache: DnsCache,
+        stats: TransportStats,
+        host_pool_sizes: dict[str, int],
+        **kwargs,
+    ):
+        self.dns_cache = dns_cache
+        self.stats = stats
+        self.host_pool_sizes = host_pool_sizes
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TransportPoolManager(
+            dns_cache=self.dns_cache,
+            stats=self.stats,
+            host_pool_sizes=self.host_pool_sizes,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs,
+        )
+
+    def send(self, request, *args, **kwargs):
+        host = requests.utils.urlparse(request.url).hostname or ""
+        self.stats.record_request(host)
+        return super().send(request, *args, **kwargs)
+
+
+class HttpTransport:
+    """
+    Общий для процесса HTTP-транспорт поверх requests.Session.
+
+    Держит keep-alive соединения в пуле, поэтому повторные запросы к тому же
+    сайту не платят за TCP/TLS handshake, а DNS-кэш убирает лишние запросы
+    к резолверу. Экземпляр на процесс воркера возвращает get_transport().
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 100,
+        pool_maxsize: int = 10,
+        host_pool_sizes: dict[str, int] | None = None,
+        dns_ttl: float = 300.0,
+    ):
+        """
+        Args:
+            pool_connections: Сколько пулов (хостов) держать одновременно.
+            pool_maxsize: Размер пула соединений на хост по умолчанию.
+            host_pool_sizes: Размер пула для отдельных хостов, {"example.com": 50}.
+            dns_ttl: Время жизни записей DNS-кэша в секундах.
+        """
+        self.dns_cache = DnsCache(ttl=dns_ttl)
+        self.stats = TransportStats()
+        self.session = requests.Session()
+
+        adapter = _TransportAdapter(
+            dns_cache=self.dns_cache,
+            stats=self.stats,
+            host_pool_sizes=dict(host_pool_sizes or {}),
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        """GET-запрос через общий пул соединений."""
+        return self.session.get(url, timeout=timeout, **kwargs)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика переиспользования соединений и DNS-кэша."""
+        return {
+            **self.stats.snapshot(),
+            "dns": {"hits": self.dns_cache.hits, "misses": self.dns_cache.misses},
+        }
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.session.close()
+
+
+_transport: HttpTransport | None = None
+_transport_pid: int | None = None
+_transport_config: dict[str, Any] = {}
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """
+    Возвращает HttpTransport текущего процесса, создавая его при первом вызове.
+
+    Сокеты нельзя делить между процессами, поэтому после fork (prefork-пул
+    Celery) дочерний процесс создаёт собственный транспорт с теми же настройками.
+    """
+    global _transport, _transport_pid
+    with _transport_lock:
+        if _transport is None or _transport_pid != os.getpid():
+            _transport = HttpTransport(**_transport_config)
+            _transport_pid = os.getpid()
+        return _transport
+
+
+def configure_transport(**kwargs) -> None:
+    """
+    Задаёт параметры HttpTransport для процесса.
+
+    Транспорт пересоздаётся лениво при следующем get_transport().
+    """
+    global _transport, _transport_pid
+    with _transport_lock:
+        if _transport is not None and _transport_pid == os.getpid():
+            _transport.close()
+        _transport_config.clear()
+        _transport_config.update(kwargs)
+        _transport = None
+        _transport_pid = None
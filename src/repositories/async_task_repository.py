@@ -0,0 +1,178 @@
+import asyncio
+
+from datetime import datetime
+
+from sqlalchemy import insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.core.priorities import DEFAULT_PRIORITY
+from src.core.urls import url_domain, url_hash
+from src.db.models import ScrapingTask
+from src.repositories.status_cache import TaskStatusCache, status_view
+from src.repositories.task_repository import (
+    assign_leaders,
+    group_leaders,
+    in_flight_statement,
+    new_task_rows,
+    pick_leader,
+)
+
+
+class AsyncTaskRepository:
+    """
+    Асинхронный вариант TaskRepository для эндпоинтов API.
+
+    Только то, что нужно API: создание задач и чтение статуса. Обновления
+    статусов выполняет воркер через синхронный TaskRepository.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        status_cache: TaskStatusCache | None = None,
+    ):
+        """
+        Args:
+            session_factory: Фабрика асинхронных сессий.
+            status_cache: Кэш статусов: get_statuses читает из него
+                и дозаполняет его из БД.
+        """
+        self.session_factory = session_factory
+        self.status_cache = status_cache
+
+    async def add(
+        self,
+        url: str,
+        method: str,
+        coalesce: bool = False,
+        spec: str | None = None,
+        priority: str = DEFAULT_PRIORITY,
+    ) -> ScrapingTask:
+        """Создаёт задачу; coalesce - как в TaskRepository.add."""
+        async with self.session_factory() as session:
+            key = (url_hash(url), method, spec)
+            leader_id = None
+            if coalesce:
+                candidates = (await self._lock_in_flight(session, [key])).get(key, [])
+                leader_id = pick_leader(candidates, priority)
+            task = ScrapingTask(
+                url=url,
+                method=method,
+                url_hash=key[0],
+                domain=url_domain(url),
+                spec=spec,
+                priority=priority,
+                leader_id=leader_id,
+            )
+            session.add(task)
+            await session.commit()
+            await session.refresh(task)
+            return task
+
+    async def add_many(self, items: list[tuple[str, str, str | None, str]]) -> list[str]:
+        """Создаёт задачи одним bulk INSERT; items - четвёрки (url, method, spec, priority)."""
+        return [task_id for task_id, _ in await self._insert_many(items, coalesce=False)]
+
+    async def add_many_coalesced(
+        self, items: list[tuple[str, str, str | None, str]]
+    ) -> list[tuple[str, str | None]]:
+        """Как TaskRepository.add_many_coalesced."""
+        return await self._insert_many(items, coalesce=True)
+
+    async def _insert_many(
+        self, items: list[tuple[str, str, str | None, str]], coalesce: bool
+    ) -> list[tuple[str, str | None]]:
+        if not items:
+            return []
+        rows = new_task_rows(items)
+        async with self.session_factory() as session:
+            if coalesce:
+                keys = list({(row["url_hash"], row["method"], row["spec"]) for row in rows})
+                assign_leaders(rows, await self._lock_in_flight(session, keys))
+            await session.execute(insert(ScrapingTask), rows)
+            await session.commit()
+        return [(row["id"], row["leader_id"]) for row in rows]
+
+    @staticmethod
+    async def _lock_in_flight(
+        session: AsyncSession, keys: list[tuple[str, str, str | None]]
+    ) -> dict[tuple[str, str, str | None], list[tuple[str, str]]]:
+        """Как TaskRepository._lock_in_flight (FOR SHARE до конца транзакции)."""
+        return group_leaders((await session.execute(in_flight_statement(keys))).all(), keys)
+
+    async def get_by_id(self, task_id: str) -> ScrapingTask | None:
+        async with self.session_factory() as session:
+            return await session.scalar(select(ScrapingTask).where(ScrapingTask.id == task_id))
+
+    async def get_many(self, task_ids: list[str]) -> list[ScrapingTask]:
+        """Задачи по id одним запросом; отсутствующих в ответе нет, порядок не гарантирован."""
+        if not task_ids:
+            return []
+        async with self.session_factory() as session:
+            return list(await session.scalars(
+                select(ScrapingTask).where(ScrapingTask.id.in_(task_ids))
+            ))
+
+    async def get_statuses(self, task_ids: list[str]) -> dict[str, dict]:
+        """
+        Статусы задач (status_view) через кэш; промахи читаются из БД одним запросом.
+
+        Returns:
+            {id задачи: status_view} для найденных задач.
+        """
+        if self.status_cache is None:
+            return {view["id"]: view for view in map(status_view, await self.get_many(task_ids))}
+
+        # Клиент Redis синхронный
+        views = await asyncio.to_thread(self.status_cache.get_many, task_ids)
+        missing = [task_id for task_id in task_ids if task_id not in views]
+        if missing:
+            loaded = [status_view(task) for task in await self.get_many(missing)]
+            await asyncio.to_thread(self.status_cache.fill, loaded)
+            views.update((view["id"], view) for view in loaded)
+        return views
+
+    async def list_page(
+        self,
+        limit: int,
+        after: tuple[datetime, str] | None = None,
+        statuses: list[str] | None = None,
+        domain: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[ScrapingTask]:
+        """
+        Страница задач от новых к старым (keyset по (created_at, id)).
+
+        Args:
+            limit: Размер страницы.
+            after: (created_at, id) последней задачи предыдущей страницы.
+            statuses: Только задачи с этими статусами.
+            domain: Только задачи этого хоста (url_domain).
+            created_after: created_at не раньше.
+            created_before: created_at раньше.
+
+        Каждую страницу отдаёт поиск по индексу (created_at, id), (status, created_at, id)
+        или (domain, created_at, id) - глубина страницы на стоимость не влияет.
+        """
+        statement = select(ScrapingTask)
+        if after is not None:
+            created_at, task_id = after
+            statement = statement.where(
+                tuple_(ScrapingTask.created_at, ScrapingTask.id) < tuple_(
+                    literal(created_at, ScrapingTask.created_at.type),
+                    literal(task_id, ScrapingTask.id.type),
+                )
+            )
+        if statuses:
+            statement = statement.where(ScrapingTask.status.in_(statuses))
+        if domain is not None:
+            statement = statement.where(ScrapingTask.domain == domain)
+        if created_after is not None:
+            statement = statement.where(ScrapingTask.created_at >= created_after)
+        if created_before is not None:
+            statement = statement.where(ScrapingTask.created_at < created_before)
+        statement = statement.order_by(
+            ScrapingTask.created_at.desc(), ScrapingTask.id.desc()
+        ).limit(limit)
+        async with self.session_factory() as session:
+            return list(await session.scalars(statement))
@@ -0,0 +1,180 @@
+import json
+import logging
+from datetime import datetime
+
+from redis import Redis, RedisError
+
+from src.db.models import ScrapingTask
+
+logger = logging.getLogger(__name__)
+
+# Канал Redis pub/sub со сменами статуса задачи: TASK_EVENTS_PREFIX + id
+TASK_EVENTS_PREFIX = "task:events:"
+
+# Статусы, которые присоединённая задача берёт у ведущей
+_FOLLOWER_STATUSES = ("pending", "processing", "retrying")
+
+# KEYS[1] - запись задачи, ARGV[1] - TTL, дальше пары поле/значение.
+# Заполнение из БД не перезаписывает поля, которые уже записал воркер:
+# снимок из БД мог быть прочитан до его последнего обновления.
+_FILL_SCRIPT = """
+for i = 2, #ARGV, 2 do
+    redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+
+def status_view(task: ScrapingTask) -> dict:
+    """Статус задачи в том виде, в каком его отдаёт GET /tasks."""
+    return {
+        "id": task.id,
+        "status": task.status,
+        "priority": task.priority,
+        "result": task.result,
+        "created_at": task.created_at,
+        "attempts": task.attempts,
+        "next_retry_at": task.next_retry_at,
+        "leader_id": task.leader_id,
+    }
+
+
+def _encode(value) -> str:
+    return json.dumps(value, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+def _decode(entry: dict) -> dict:
+    return {
+        (key.decode() if isinstance(key, bytes) else key): json.loads(value)
+        for key, value in entry.items()
+    }
+
+
+class TaskStatusCache:
+    """
+    Статусы задач в Redis для опроса GET /tasks без запроса в БД.
+
+    Воркер пишет смену статуса сквозь кэш (TaskRepository), API читает
+    из кэша и дозаполняет его из БД при промахе. Запись задачи - хэш,
+    поля - значения в JSON. Воркер знает только изменившиеся поля, поэтому
+    запись без created_at считается неполной и читается из БД.
+
+    Присоединённые задачи в БД получают статус ведущей в том же UPDATE;
+    в кэше их запись не обновляется, а статус и результат при чтении
+    берутся из записи ведущей.
+
+    Каждая смена статуса публикуется в канал задачи ({"id", "status"})
+    в том же обращении к Redis - по нему API будит ожидающих клиентов
+    (src.services.task_events). Запись в кэш идёт раньше публикации,
+    поэтому получивший событие клиент читает из кэша уже новый статус.
+
+    Ошибки Redis не мешают ни воркеру, ни API: чтение идёт в БД.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        ttl: int = 600,
+        prefix: str = "task:status:",
+        events_prefix: str = TASK_EVENTS_PREFIX,
+    ):
+        """
+        Args:
+            redis: Клиент Redis.
+            ttl: Сколько секунд хранить статус после последней записи; 0 - кэш
+                выключен (события публикуются).
+            prefix: Префикс ключей.
+            events_prefix: Префикс каналов событий.
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.events_prefix = events_prefix
+        self._fill = redis.register_script(_FILL_SCRIPT)
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.prefix}{task_id}"
+
+    def write_many(self, updates: list[tuple[str, dict]]) -> None:
+        """
+        Записывает изменившиеся поля задач (после commit в БД) и публикует смену статуса.
+
+        Args:
+            updates: Пары (id задачи, {поле: значение}), в полях есть status.
+        """
+        if not updates:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for task_id, fields in updates:
+                    if self.ttl:
+                        key = self._key(task_id)
+                        pipe.hset(key, mapping={name: _encode(value) for name, value in fields.items()})
+                        pipe.expire(key, self.ttl)
+                    pipe.publish(
+                        self.events_prefix + task_id,
+                        _encode({"id": task_id, "status": fields["status"]}),
+                    )
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"STATUS CACHE: не удалось записать {len(updates)} статусов: {e}")
+
+    def fill(self, views: list[dict]) -> None:
+        """Кладёт в кэш статусы, прочитанные из БД (status_view)."""
+        if not self.ttl or not views:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for view in views:
+                    args: list[int | str] = [self.ttl]
+                    for name, value in view.items():
+                        args += [name, _encode(value)]
+                    self._fill(keys=[self._key(view["id"])], args=args, client=pipe)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"STATUS CACHE: не удалось заполнить {len(views)} статусов: {e}")
+
+    def get_many(self, task_ids: list[str]) -> dict[str, dict]:
+        """
+        Статусы задач из кэша; задач без полной записи в ответе нет.
+
+        Returns:
+            {id задачи: status_view}.
+        """
+        if not self.ttl or not task_ids:
+            return {}
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for task_id in task_ids:
+                    pipe.hgetall(self._key(task_id))
+                entries = pipe.execute()
+
+            views = {}
+            for task_id, entry in zip(task_ids, entries):
+                if entry:
+                    view = _decode(entry)
+                    if "created_at" in view:
+                        views[task_id] = view
+
+            followers = [
+                view for view in views.values()
+                if view.get("leader_id") and view["status"] in _FOLLOWER_STATUSES
+            ]
+            if followers:
+                with self.redis.pipeline(transaction=False) as pipe:
+                    for view in followers:
+                        pipe.hmget(self._key(view["leader_id"]), ["status", "result"])
+                    leaders = pipe.execute()
+                for view, (status, result) in zip(followers, leaders):
+                    if status is None:
+                        # Ведущей нет в кэше - статус присоединённой знает только БД
+                        del views[view["id"]]
+                        continue
+                    view["status"] = json.loads(status)
+                    if result is not None and json.loads(result):
+                        view["result"] = json.loads(result)
+            return views
+        except RedisError as e:
+            logger.warning(f"STATUS CACHE: Redis недоступен, статусы читаются из БД: {e}")
+            return {}
@@ -0,0 +1,122 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from src.repositories.task_repository import TERMINAL_STATUSES, TaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedStatusWriter:
+    """
+    Write-behind запись статусов задач.
+
+    update_status() только кладёт смену статуса в буфер процесса.
+    Буфер сбрасывается одним bulk UPDATE (TaskRepository.update_status_many),
+    когда набралось max_batch задач или прошло flush_interval секунд,
+    и обязательно - при close() (остановка воркера).
+
+    Несколько смен статуса одной задачи до сброса схлопываются в одну:
+    в БД попадает последний статус ("processing" -> "done" = один UPDATE).
+    """
+
+    def __init__(
+        self,
+        task_repository: TaskRepository,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        """
+        Args:
+            task_repository: Репозиторий, через который выполняется bulk UPDATE.
+            max_batch: Сколько задач копить до принудительного сброса.
+            flush_interval: Максимальная задержка записи в секундах.
+        """
+        self.task_repository = task_repository
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Сериализует сами сбросы, чтобы порядок записей одной задачи не нарушался
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_pid: int | None = None
+        # Страховка для пулов без worker_process_shutdown (solo, threads)
+        atexit.register(self.close)
+
+    def _ensure_flusher(self) -> None:
+        # Поток не переживает fork, поэтому запускаем его лениво в процессе, который пишет
+        if self._thread_pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="status-writer", daemon=True
+        )
+        self._thread_pid = os.getpid()
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Уже залогировано в flush(), записи остались в буфере до следующего раза
+                pass
+
+    def update_status(self, task_id: str, status: str, result: dict | None = None, cache_hit: bool = False):
+        """Тот же контракт, что у TaskRepository.update_status, но запись отложена."""
+        with self._lock:
+            self._ensure_flusher()
+            entry = self._pending.setdefault(
+                task_id,
+                {"id": task_id, "result": None, "completed_at": None, "cache_hit": None},
+            )
+            entry["status"] = status
+            if result:
+                entry["result"] = result
+            if cache_hit:
+                entry["cache_hit"] = True
+            if status in TERMINAL_STATUSES:
+                entry["completed_at"] = datetime.utcnow()
+            should_flush = len(self._pending) >= self.max_batch
+
+        if should_flush:
+            self.flush()
+
+    def mark_retry(self, task_id: str, attempts: int, next_retry_at: datetime, error: str) -> None:
+        """
+        Перезапланирование пишется сразу, а не через буфер.
+
+        Сначала сбрасывается буфер, иначе отложенный "processing"
+        затёр бы "retrying" этой задачи.
+        """
+        self.flush()
+        self.task_repository.mark_retry(task_id, attempts, next_retry_at, error)
+
+    def flush(self) -> None:
+        """Записывает накопленные смены статуса одним запросом."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+
+            try:
+                self.task_repository.update_status_many(list(batch.values()))
+                logger.info(f"STATUS WRITER: записано {len(batch)} статусов")
+            except Exception as e:
+                logger.error(f"STATUS WRITER: ошибка записи {len(batch)} статусов: {e}")
+                with self._lock:
+                    # Возвращаем в буфер то, что не успело обновиться заново
+                    for task_id, entry in batch.items():
+                        self._pending.setdefault(task_id, entry)
+                raise
+
+    def close(self) -> None:
+        """Останавливает фоновый сброс и записывает остаток буфера."""
+        self._stop.set()
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
@@ -1,15 +1,132 @@
+import json
+import uuid
 from datetime import datetime
+from sqlalchemy import (
+    and_, Boolean, DateTime, Integer, String, Uuid, cast, column, func, insert, select, update, values
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
-from src.db.models import ScrapingTask
+from src.core.priorities import DEFAULT_PRIORITY, priority_rank
+from src.core.urls import url_domain, url_hash
+from src.db.models import TASK_STATUSES, ScrapingTask
+from src.repositories.status_cache import TaskStatusCache
+
+TERMINAL_STATUSES = ("done", "error")
+IN_FLIGHT_STATUSES = ("pending", "processing", "retrying")
+
+# Общие для TaskRepository и AsyncTaskRepository части создания задач
+
+def new_task_rows(items: list[tuple[str, str, str | None, str]]) -> list[dict]:
+    """Строки для bulk INSERT из (url, method, spec, priority); id генерируются заранее."""
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "url": url,
+            "method": method,
+            "url_hash": url_hash(url),
+            "domain": url_domain(url),
+            "spec": spec,
+            "priority": priority,
+            "leader_id": None,
+        }
+        for url, method, spec, priority in items
+    ]
+
+
+def in_flight_statement(keys: list[tuple[str, str, str | None]]):
+    """SELECT ведущих задач в работе для (url_hash, method, spec) с блокировкой FOR SHARE."""
+    return (
+        select(
+            ScrapingTask.id,
+            ScrapingTask.url_hash,
+            ScrapingTask.method,
+            ScrapingTask.spec,
+            ScrapingTask.priority,
+        )
+        .where(
+            ScrapingTask.url_hash.in_({key[0] for key in keys}),
+            ScrapingTask.status.in_(IN_FLIGHT_STATUSES),
+            ScrapingTask.leader_id.is_(None),
+        )
+        .order_by(ScrapingTask.created_at)
+        .with_for_update(read=True)
+    )
+
+
+def group_leaders(
+    rows, keys: list[tuple[str, str, str | None]]
+) -> dict[tuple[str, str, str | None], list[tuple[str, str]]]:
+    """Результат in_flight_statement по ключам: пары (id, priority) в порядке создания."""
+    wanted = set(keys)
+    leaders: dict[tuple[str, str, str | None], list[tuple[str, str]]] = {}
+    for row in rows:
+        key = (row.url_hash, row.method, row.spec)
+        if key in wanted:
+            leaders.setdefault(key, []).append((row.id, row.priority))
+    return leaders
+
+
+def pick_leader(candidates: list[tuple[str, str]], priority: str) -> str | None:
+    """Первая ведущая задача с приоритетом не ниже priority."""
+    for leader_id, leader_priority in candidates:
+        if priority_rank(leader_priority) <= priority_rank(priority):
+            return leader_id
+    return None
+
+
+def assign_leaders(rows: list[dict], leaders: dict) -> None:
+    """Проставляет leader_id; первое вхождение в пачке становится ведущим для остальных."""
+    for row in rows:
+        key = (row["url_hash"], row["method"], row["spec"])
+        candidates = leaders.setdefault(key, [])
+        row["leader_id"] = pick_leader(candidates, row["priority"])
+        if row["leader_id"] is None:
+            candidates.append((row["id"], row["priority"]))
+
 
 class TaskRepository:
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, status_cache: TaskStatusCache | None = None):
+        """
+        Args:
+            session_factory: Фабрика сессий SQLAlchemy.
+            status_cache: Кэш статусов для GET /tasks; смены статуса пишутся
+                в него после commit.
+        """
         self.session_factory = session_factory
+        self.status_cache = status_cache
 
-    def add(self, url: str) -> ScrapingTask:
+    def add(
+        self,
+        url: str,
+        method: str = "http",
+        coalesce: bool = False,
+        spec: str | None = None,
+        priority: str = DEFAULT_PRIORITY,
+    ) -> ScrapingTask:
+        """
+        Создаёт задачу.
+
+        При coalesce=True и уже выполняющейся задаче для того же URL, метода
+        и спецификации извлечения новая задача присоединяется к ней (leader_id) - отправлять её
+        в очередь не нужно, статус и результат придут от ведущей. Ведущая должна
+        быть не ниже по приоритету: срочный запрос не ждёт в очереди массовых.
+        """
         try:
             with self.session_factory() as session:
-                task = ScrapingTask(url=url)
+                key = (url_hash(url), method, spec)
+                leader_id = None
+                if coalesce:
+                    candidates = self._lock_in_flight(session, [key]).get(key, [])
+                    leader_id = pick_leader(candidates, priority)
+                task = ScrapingTask(
+                    url=url,
+                    method=method,
+                    url_hash=key[0],
+                    domain=url_domain(url),
+                    spec=spec,
+                    priority=priority,
+                    leader_id=leader_id,
+                )
                 session.add(task)
                 session.commit()
                 session.refresh(task)
@@ -17,17 +134,314 @@ class TaskRepository:
         except Exception as e:
             raise e
 
-    def update_status(self, task_id: str, status: str, result: dict = None):
+    def add_many(self, items: list[tuple[str, str, str | None, str]]) -> list[str]:
+        """
+        Создаёт задачи одним bulk INSERT.
+
+        Args:
+            items: Четвёрки (url, method, spec, priority).
+
+        Returns:
+            id задач; генерируются заранее, поэтому порядок совпадает с items.
+        """
+        return [task_id for task_id, _ in self._insert_many(items, coalesce=False)]
+
+    def add_many_coalesced(
+        self, items: list[tuple[str, str, str | None, str]]
+    ) -> list[tuple[str, str | None]]:
+        """
+        Как add_many, но с присоединением к уже выполняющимся задачам.
+
+        Дубликаты внутри пачки присоединяются к первому вхождению.
+
+        Returns:
+            Пары (id задачи, id ведущей задачи или None, если задачу нужно отправить в очередь).
+        """
+        return self._insert_many(items, coalesce=True)
+
+    def _insert_many(
+        self, items: list[tuple[str, str, str | None, str]], coalesce: bool
+    ) -> list[tuple[str, str | None]]:
+        if not items:
+            return []
+        rows = new_task_rows(items)
+        with self.session_factory() as session:
+            if coalesce:
+                keys = list({(row["url_hash"], row["method"], row["spec"]) for row in rows})
+                assign_leaders(rows, self._lock_in_flight(session, keys))
+            session.execute(insert(ScrapingTask), rows)
+            session.commit()
+        return [(row["id"], row["leader_id"]) for row in rows]
+
+    @staticmethod
+    def _lock_in_flight(
+        session: Session, keys: list[tuple[str, str, str | None]]
+    ) -> dict[tuple[str, str, str | None], list[tuple[str, str]]]:
+        """
+        Находит ведущие задачи в работе для (url_hash, method, spec).
+
+        Returns:
+            Для каждого ключа - пары (id, priority) в порядке создания.
+
+        Строки блокируются FOR SHARE до конца транзакции: ведущая не сможет
+        перейти в финальный статус, пока присоединённая задача не закоммичена,
+        и обновление присоединённых задач её не пропустит.
+        """
+        return group_leaders(session.execute(in_flight_statement(keys)).all(), keys)
+
+    def update_status(self, task_id: str, status: str, result: dict = None, cache_hit: bool = False):
         with self.session_factory() as session:
             task = session.query(ScrapingTask).filter(ScrapingTask.id == task_id).first()
             if task:
                 task.status = status
                 if result:
                     task.result = result
-                if status in ("done", "error"):
+                if cache_hit:
+                    task.cache_hit = True
+                if status in TERMINAL_STATUSES:
                     task.completed_at = datetime.utcnow()
+                session.flush()
+                self._update_followers(session, task_id, status, result, task.completed_at, cache_hit)
                 session.commit()
+                self._write_through([{"id": task_id, "status": status, "result": result}])
+
+    def mark_retry(self, task_id: str, attempts: int, next_retry_at: datetime, error: str) -> None:
+        """
+        Отмечает, что попытка не удалась и задача перезапланирована.
+
+        Статус становится "retrying", присоединённые задачи получают его же.
+        """
+        with self.session_factory() as session:
+            task = session.query(ScrapingTask).filter(ScrapingTask.id == task_id).first()
+            if task:
+                task.status = "retrying"
+                task.attempts = attempts
+                task.next_retry_at = next_retry_at
+                task.error_message = error
+                session.flush()
+                self._update_followers(session, task_id, "retrying", None, None)
+                session.commit()
+                if self.status_cache is not None:
+                    self.status_cache.write_many([(task_id, {
+                        "status": "retrying", "attempts": attempts, "next_retry_at": next_retry_at,
+                    })])
+
+    def _write_through(self, updates: list[dict]) -> None:
+        """Переносит смены статуса в кэш; пустые поля, как и в БД, не перезаписываются."""
+        if self.status_cache is None:
+            return
+        self.status_cache.write_many([
+            (
+                row["id"],
+                {
+                    "status": row["status"],
+                    **({"result": row["result"]} if row.get("result") else {}),
+                    **{
+                        name: row[name] for name in ("attempts", "next_retry_at")
+                        if row.get(name) is not None
+                    },
+                },
+            )
+            for row in updates
+        ])
+
+    @staticmethod
+    def _update_followers(
+        session: Session,
+        leader_id: str,
+        status: str,
+        result: dict | None,
+        completed_at: datetime | None,
+        cache_hit: bool | None = False,
+    ) -> None:
+        """Переносит статус ведущей задачи на присоединённые к ней."""
+        changes: dict = {"status": status}
+        if result:
+            changes["result"] = result
+        if cache_hit:
+            changes["cache_hit"] = True
+        if completed_at is not None and status in TERMINAL_STATUSES:
+            changes["completed_at"] = completed_at
+        (
+            session.query(ScrapingTask)
+            .filter(
+                ScrapingTask.leader_id == leader_id,
+                ScrapingTask.status.in_(IN_FLIGHT_STATUSES),
+            )
+            .update(changes, synchronize_session=False)
+        )
+
+    def update_status_many(self, updates: list[dict]) -> None:
+        """
+        Применяет пачку смен статуса одним запросом.
+
+        Args:
+            updates: Словари {"id", "status", "result", "completed_at", "cache_hit"},
+                для перезапланированных задач (как mark_retry) ещё "attempts",
+                "next_retry_at" и "error_message"; значения None (кроме status)
+                не перезаписываются. Присоединённым задачам переносятся только
+                status, result, completed_at и cache_hit.
+        """
+        if not updates:
+            return
+        with self.session_factory() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                session.execute(self._bulk_update_statement(updates))
+                session.execute(self._bulk_update_statement(updates, followers=True))
+            else:
+                # Без UPDATE ... FROM (VALUES) - executemany по первичному ключу
+                session.execute(
+                    update(ScrapingTask),
+                    [{k: v for k, v in row.items() if v is not None} for row in updates],
+                )
+                for row in updates:
+                    self._update_followers(
+                        session,
+                        row["id"],
+                        row["status"],
+                        row.get("result"),
+                        row.get("completed_at"),
+                        row.get("cache_hit"),
+                    )
+            session.commit()
+        self._write_through(updates)
+
+    @staticmethod
+    def _bulk_update_statement(updates: list[dict], followers: bool = False):
+        """
+        UPDATE scraping_tasks ... FROM (VALUES ...) AS v(...) WHERE id = v.id
+
+        При followers=True обновляются задачи, присоединённые к перечисленным
+        (WHERE leader_id = v.id), и только те, что ещё в работе.
+
+        Литералы VALUES PostgreSQL читает как text, поэтому id и status
+        приводятся к uuid и task_status явно.
+        """
+        rows = values(
+            column("id", String),
+            column("status", String),
+            column("result", String),
+            column("completed_at", DateTime),
+            column("cache_hit", Boolean),
+            column("attempts", Integer),
+            column("next_retry_at", DateTime),
+            column("error_message", String),
+            name="v",
+        ).data([
+            (
+                row["id"],
+                row["status"],
+                json.dumps(row["result"]) if row.get("result") is not None else None,
+                row.get("completed_at"),
+                row.get("cache_hit"),
+                row.get("attempts"),
+                row.get("next_retry_at"),
+                row.get("error_message"),
+            )
+            for row in updates
+        ])
+        task_id = cast(rows.c.id, Uuid)
+        changes = {
+            "status": cast(rows.c.status, ScrapingTask.status.type),
+            "result": func.coalesce(cast(rows.c.result, JSONB), ScrapingTask.result),
+            "completed_at": func.coalesce(
+                cast(rows.c.completed_at, DateTime), ScrapingTask.completed_at
+            ),
+            "cache_hit": func.coalesce(cast(rows.c.cache_hit, Boolean), ScrapingTask.cache_hit),
+        }
+        if followers:
+            condition = and_(
+                ScrapingTask.leader_id == task_id,
+                ScrapingTask.status.in_(IN_FLIGHT_STATUSES),
+            )
+        else:
+            condition = ScrapingTask.id == task_id
+            changes.update(
+                attempts=func.coalesce(cast(rows.c.attempts, Integer), ScrapingTask.attempts),
+                next_retry_at=func.coalesce(
+                    cast(rows.c.next_retry_at, DateTime), ScrapingTask.next_retry_at
+                ),
+                error_message=func.coalesce(rows.c.error_message, ScrapingTask.error_message),
+            )
+        return (
+            update(ScrapingTask)
+            .where(condition)
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
     
+    def find_fresh_result(
+        self, url: str, method: str, since: datetime, spec: str | None = None
+    ) -> tuple[datetime, dict] | None:
+        """
+        Последний успешный результат для URL, метода и спецификации, завершённый не раньше since.
+
+        URL сравнивается по хэшу канонической формы (src.core.urls.url_hash).
+        """
+        with self.session_factory() as session:
+            row = (
+                session.query(ScrapingTask.completed_at, ScrapingTask.result)
+                .filter(
+                    ScrapingTask.url_hash == url_hash(url),
+                    ScrapingTask.method == method,
+                    ScrapingTask.spec.is_(None) if spec is None else ScrapingTask.spec == spec,
+                    ScrapingTask.status == "done",
+                    ScrapingTask.completed_at >= since,
+                )
+                .order_by(ScrapingTask.completed_at.desc())
+                .first()
+            )
+            if row is None or row.result is None:
+                return None
+            return row.completed_at, row.result
+
+    def find_fresh_results(
+        self, keys: list[tuple[str, str, str | None, datetime]]
+    ) -> list[tuple[datetime, dict] | None]:
+        """
+        find_fresh_result для многих URL одним запросом.
+
+        Args:
+            keys: (url, method, spec, since) - как аргументы find_fresh_result.
+
+        Returns:
+            (completed_at, result) или None - в том же порядке, что и keys.
+        """
+        if not keys:
+            return []
+        hashes = [url_hash(url) for url, _, _, _ in keys]
+        # Последний успешный результат на (url_hash, method, spec) среди запрошенных URL
+        ranked = (
+            select(
+                ScrapingTask.url_hash,
+                ScrapingTask.method,
+                ScrapingTask.spec,
+                ScrapingTask.completed_at,
+                ScrapingTask.result,
+                func.row_number().over(
+                    partition_by=(ScrapingTask.url_hash, ScrapingTask.method, ScrapingTask.spec),
+                    order_by=ScrapingTask.completed_at.desc(),
+                ).label("rank"),
+            )
+            .where(
+                ScrapingTask.url_hash.in_(set(hashes)),
+                ScrapingTask.status == "done",
+                ScrapingTask.completed_at >= min(since for _, _, _, since in keys),
+            )
+            .subquery()
+        )
+        with self.session_factory() as session:
+            latest = {
+                (row.url_hash, row.method, row.spec): (row.completed_at, row.result)
+                for row in session.execute(select(ranked).where(ranked.c.rank == 1))
+            }
+        found = []
+        for hash_, (_, method, spec, since) in zip(hashes, keys):
+            entry = latest.get((hash_, method, spec))
+            fresh = entry is not None and entry[0] >= since and entry[1] is not None
+            found.append(entry if fresh else None)
+        return found
+
     def get_by_id(self, task_id: str) -> ScrapingTask:
         with self.session_factory() as session:
             return session.query(ScrapingTask).filter(ScrapingTask.id == task_id).first()
\ No newline at end of file
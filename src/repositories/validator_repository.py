@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.core.urls import url_hash
+from src.db.models import PageValidator
+from src.parsers.revalidation import CachedPage, ValidatorStore
+
+
+class ValidatorRepository(ValidatorStore):
+    """Хранит ETag / Last-Modified и последний результат по каноническому URL."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def get(self, url: str) -> CachedPage | None:
+        with self.session_factory() as session:
+            row = session.get(PageValidator, url_hash(url))
+            if row is None:
+                return None
+            return CachedPage(etag=row.etag, last_modified=row.last_modified, result=row.result)
+
+    def save(self, url: str, page: CachedPage) -> None:
+        values = {
+            "url_hash": url_hash(url),
+            "url": url,
+            "etag": page.etag,
+            "last_modified": page.last_modified,
+            "result": page.result,
+            "updated_at": datetime.utcnow(),
+        }
+        with self.session_factory() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                # Один INSERT ... ON CONFLICT вместо SELECT + INSERT/UPDATE
+                statement = pg_insert(PageValidator).values(**values)
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=[PageValidator.url_hash],
+                    set_={key: statement.excluded[key] for key in values if key != "url_hash"},
+                ))
+            else:
+                session.merge(PageValidator(**values))
+            session.commit()
@@ -0,0 +1,215 @@
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+
+from redis import Redis, RedisError
+
+from src.core.priorities import PRIORITIES, lane_key, priority_rank
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueueStats:
+    """Состояние очереди Celery: сколько ждёт и как быстро разбирается."""
+
+    queue: str
+    # Сообщений в очереди по приоритетам
+    depth: dict[str, int]
+    # Задач в секунду, завершённых воркерами за последнее окно
+    drain_rate: float
+    # Сообщений, взятых воркерами заранее (prefetch) и ждущих свободного слота, по приоритетам
+    reserved: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_depth(self) -> int:
+        return sum(self.depth.values()) + sum(self.reserved.values())
+
+    def depth_ahead(self, priority: str) -> int:
+        """Сколько задач с тем же или более высоким приоритетом ждёт раньше новой задачи."""
+        return sum(
+            count
+            for counts in (self.depth, self.reserved)
+            for name, count in counts.items()
+            if priority_rank(name) <= priority_rank(priority)
+        )
+
+    def estimated_wait(self, priority: str | None = None) -> float | None:
+        """
+        Ожидание новой задачи в секундах; None - оценить нельзя
+        (очередь не пуста, а за окно не завершилось ни одной задачи).
+        """
+        depth = self.total_depth if priority is None else self.depth_ahead(priority)
+        if depth == 0:
+            return 0.0
+        if self.drain_rate <= 0:
+            return None
+        return depth / self.drain_rate
+
+
+@dataclass
+class Admission:
+    """Решение по новой задаче: принять или попросить повторить через retry_after секунд."""
+
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class QueueMonitor:
+    """
+    Глубина очередей Celery и скорость их разбора; admission control для API.
+
+    Глубина - длины списков Redis по приоритетам (транспорт Redis хранит
+    каждый приоритет отдельным списком) плюс сообщения, которые воркеры уже
+    забрали из списков, но ещё не начали (prefetch). Их воркеры отмечают
+    сами (task_reserved/task_started) в sorted set на очередь и приоритет,
+    так что подсчёт - ZCOUNT, а не обход всех неподтверждённых сообщений.
+    Отложенные через countdown/eta задачи (слот лимита домена, повтор) не
+    отмечаются: до своего срока они не ждут слота воркера. Отметки старше
+    reserved_ttl не считаются - их оставил упавший воркер, а транспорт к
+    этому времени уже выдал сообщение снова. Скорость разбора - счётчики
+    завершённых задач по корзинам bucket секунд за последние window секунд;
+    их пишут воркеры (record_drain).
+
+    Задача не принимается, если оцененное ожидание для её приоритета больше
+    max_wait или в очереди перед ней больше max_depth задач. Ошибки Redis
+    не останавливают приём задач.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_wait: float = 300.0,
+        max_depth: int = 100_000,
+        window: int = 60,
+        bucket: int = 5,
+        stats_ttl: float = 1.0,
+        prefix: str = "queue:drained:",
+        reserved_prefix: str = "queue:reserved:",
+        reserved_ttl: int = 3600,
+    ):
+        """
+        Args:
+            redis: Клиент Redis брокера.
+            max_wait: Допустимое ожидание новой задачи в очереди, секунд.
+            max_depth: Сколько задач может быть в очереди перед новой,
+                пока скорость разбора неизвестна (или всегда).
+            window: За сколько последних секунд считать скорость разбора.
+            bucket: Размер корзины счётчика, секунд.
+            stats_ttl: Сколько секунд API переиспользует прочитанную статистику.
+            prefix: Префикс ключей счётчиков.
+            reserved_prefix: Префикс ключей взятых воркерами сообщений.
+            reserved_ttl: Через сколько секунд отметка о взятом сообщении
+                устаревает (visibility_timeout транспорта Redis).
+        """
+        self.redis = redis
+        self.max_wait = max_wait
+        self.max_depth = max_depth
+        self.window = window
+        self.bucket = bucket
+        self.stats_ttl = stats_ttl
+        self.prefix = prefix
+        self.reserved_prefix = reserved_prefix
+        self.reserved_ttl = reserved_ttl
+        self._cache: dict[str, tuple[float, QueueStats]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket_key(self, queue: str, index: int) -> str:
+        return f"{self.prefix}{queue}:{index}"
+
+    def _reserved_key(self, queue: str, priority: str) -> str:
+        return f"{self.reserved_prefix}{queue}:{priority}"
+
+    def task_reserved(self, queue: str, priority: str, task_id: str) -> None:
+        """Отмечает сообщение, которое воркер забрал из очереди и держит до свободного слота."""
+        key = self._reserved_key(queue, priority)
+        now = time.time()
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(key, {task_id: now})
+                pipe.zremrangebyscore(key, "-inf", now - self.reserved_ttl)
+                pipe.expire(key, self.reserved_ttl)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"QUEUE: не удалось отметить задачу {task_id} очереди {queue}: {e}")
+
+    def task_started(self, queue: str, priority: str, task_id: str) -> None:
+        """Снимает отметку task_reserved: задача заняла слот воркера."""
+        try:
+            self.redis.zrem(self._reserved_key(queue, priority), task_id)
+        except RedisError as e:
+            logger.warning(f"QUEUE: не удалось снять отметку задачи {task_id} очереди {queue}: {e}")
+
+    def record_drain(self, queue: str) -> None:
+        """Учитывает задачу, которую воркер забрал из очереди и завершил."""
+        key = self._bucket_key(queue, int(time.time() // self.bucket))
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, self.window + 2 * self.bucket)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"QUEUE: не удалось учесть задачу очереди {queue}: {e}")
+
+    def stats(self, queue: str) -> QueueStats:
+        """
+        Текущая статистика очереди (не старше stats_ttl секунд).
+
+        Raises:
+            RedisError: Redis недоступен.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(queue)
+            if cached is not None and now - cached[0] < self.stats_ttl:
+                return cached[1]
+
+        # Текущая корзина ещё заполняется - считаем только завершённые
+        timestamp = time.time()
+        current = int(timestamp // self.bucket)
+        buckets = max(1, self.window // self.bucket)
+        with self.redis.pipeline(transaction=False) as pipe:
+            for priority in PRIORITIES:
+                pipe.llen(lane_key(queue, priority))
+            for priority in PRIORITIES:
+                pipe.zcount(
+                    self._reserved_key(queue, priority), timestamp - self.reserved_ttl, "+inf"
+                )
+            pipe.mget([self._bucket_key(queue, current - i) for i in range(1, buckets + 1)])
+            *counts, drained = pipe.execute()
+
+        lengths, reserved = counts[:len(PRIORITIES)], counts[len(PRIORITIES):]
+        stats = QueueStats(
+            queue=queue,
+            depth=dict(zip(PRIORITIES, (int(length) for length in lengths))),
+            drain_rate=sum(int(count) for count in drained if count) / (buckets * self.bucket),
+            reserved=dict(zip(PRIORITIES, (int(count) for count in reserved))),
+        )
+        with self._lock:
+            self._cache[queue] = (now, stats)
+        return stats
+
+    def admit(self, queue: str, priority: str) -> Admission:
+        """Можно ли поставить в очередь ещё одну задачу с этим приоритетом."""
+        try:
+            stats = self.stats(queue)
+        except RedisError as e:
+            logger.warning(f"QUEUE: Redis недоступен, задача в {queue} принята без проверки: {e}")
+            return Admission(allowed=True)
+
+        depth = stats.depth_ahead(priority)
+        wait = stats.estimated_wait(priority)
+        if depth >= self.max_depth:
+            # Скорость неизвестна - предлагаем вернуться через весь бюджет ожидания
+            retry_after = self.max_wait if wait is None else wait - self.max_wait
+        elif wait is not None and wait > self.max_wait:
+            retry_after = wait - self.max_wait
+        else:
+            return Admission(allowed=True)
+
+        logger.info(
+            f"QUEUE: {queue} переполнена для {priority}: {depth} задач, "
+            f"ожидание {'неизвестно' if wait is None else f'{wait:.0f}с'}"
+        )
+        return Admission(allowed=False, retry_after=max(1.0, math.ceil(retry_after)))
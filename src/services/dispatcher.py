@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from src.core.priorities import DEFAULT_PRIORITY, celery_priority
+from src.repositories.async_task_repository import AsyncTaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Submission:
+    """Одна задача на парсинг в том виде, в каком её передают в Celery."""
+
+    url: str
+    method: str = "http"
+    max_age: int | None = None
+    spec: str | None = None
+    priority: str = DEFAULT_PRIORITY
+
+    def task_kwargs(self) -> dict:
+        return {"max_age": self.max_age, "spec": self.spec}
+
+
+class AsyncTaskDispatcher:
+    """
+    Создаёт записи ScrapingTask через AsyncTaskRepository и отправляет задачи в Celery.
+
+    Одиночные запросы (POST /parse) и пакеты (POST /parse/batch)
+    проходят через один и тот же код, отличается только размер порции.
+
+    При coalesce=True задача для URL, который уже парсится тем же методом,
+    не отправляется в очередь, а присоединяется к выполняющейся.
+
+    При batch_task_size > 1 пакетные задачи method="http" публикуются
+    сообщениями parse_batch_task по batch_task_size URL.
+
+    Клиент брокера Celery синхронный, поэтому публикация выполняется
+    в пуле потоков (одно обращение на порцию).
+    """
+
+    def __init__(
+        self,
+        task_repository: AsyncTaskRepository,
+        chunk_size: int = 500,
+        coalesce: bool = False,
+        batch_task_size: int = 1,
+    ):
+        """
+        Args:
+            task_repository: Репозиторий задач.
+            chunk_size: Сколько задач вставлять и публиковать за один раз.
+            coalesce: Присоединять дубликаты к задачам в работе.
+            batch_task_size: Сколько URL method="http" класть в одно сообщение;
+                1 - каждая задача отдельным parse_url_task.
+        """
+        self.task_repository = task_repository
+        self.chunk_size = chunk_size
+        self.coalesce = coalesce
+        self.batch_task_size = batch_task_size
+
+    def _chunks(self, submissions: list[Submission]):
+        """Порции по chunk_size: (порция, строки для add_many)."""
+        for start in range(0, len(submissions), self.chunk_size):
+            chunk = submissions[start:start + self.chunk_size]
+            yield chunk, [(s.url, s.method, s.spec, s.priority) for s in chunk]
+
+    @staticmethod
+    def _to_publish(
+        created: list[tuple[str, str | None]], chunk: list[Submission]
+    ) -> list[tuple[str, Submission]]:
+        """Задачи порции, которые нужно отправить в очередь (не присоединённые)."""
+        return [
+            (task_id, submission)
+            for (task_id, leader_id), submission in zip(created, chunk)
+            if leader_id is None
+        ]
+
+    @staticmethod
+    def _is_joined(task) -> bool:
+        if task.leader_id is None:
+            return False
+        logger.info(f"DISPATCHER: задача {task.id} присоединена к {task.leader_id}")
+        return True
+
+    @staticmethod
+    def _log_created(created: list[tuple[str, str | None]]) -> None:
+        coalesced = sum(1 for _, leader_id in created if leader_id is not None)
+        logger.info(f"DISPATCHER: создано {len(created)} задач, присоединено {coalesced}")
+
+    def _publish_one(self, task_id: str, submission: Submission) -> None:
+        from src.worker.tasks import parse_url_task
+
+        parse_url_task.apply_async(
+            args=[submission.url, submission.method],
+            kwargs=submission.task_kwargs(),
+            task_id=task_id,
+            priority=celery_priority(submission.priority),
+        )
+
+    def _publish(self, tasks: list[tuple[str, Submission]]) -> None:
+        from src.worker.tasks import parse_batch_task, parse_url_task
+
+        if not tasks:
+            return
+
+        batches: dict[str, list[dict]] = {}
+        if self.batch_task_size > 1:
+            single = []
+            for task_id, submission in tasks:
+                if submission.method == "http":
+                    batches.setdefault(submission.priority, []).append(
+                        {"task_id": task_id, "url": submission.url, **submission.task_kwargs()}
+                    )
+                else:
+                    single.append((task_id, submission))
+            tasks = single
+
+        # Одно соединение и один producer на порцию вместо захвата из пула на каждое сообщение
+        with parse_url_task.app.producer_or_acquire() as producer:
+            for priority, items in batches.items():
+                for start in range(0, len(items), self.batch_task_size):
+                    parse_batch_task.apply_async(
+                        args=[items[start:start + self.batch_task_size]],
+                        priority=celery_priority(priority),
+                        producer=producer,
+                    )
+            for task_id, submission in tasks:
+                parse_url_task.apply_async(
+                    args=[submission.url, submission.method],
+                    kwargs=submission.task_kwargs(),
+                    task_id=task_id,
+                    priority=celery_priority(submission.priority),
+                    producer=producer,
+                )
+
+    async def asubmit(self, submission: Submission) -> str:
+        """Создаёт одну задачу и отправляет её в очередь. Возвращает id задачи."""
+        task = await self.task_repository.add(
+            submission.url,
+            submission.method,
+            coalesce=self.coalesce,
+            spec=submission.spec,
+            priority=submission.priority,
+        )
+        if not self._is_joined(task):
+            await asyncio.to_thread(self._publish_one, str(task.id), submission)
+        return str(task.id)
+
+    async def asubmit_many(self, submissions: list[Submission]) -> list[str]:
+        """
+        Создаёт и отправляет задачи пакетом.
+
+        Каждая порция из chunk_size задач вставляется одним bulk INSERT
+        и публикуется через одно соединение с брокером.
+
+        Returns:
+            id задач в том же порядке, что и submissions.
+        """
+        created: list[tuple[str, str | None]] = []
+        for chunk, items in self._chunks(submissions):
+            if self.coalesce:
+                rows = await self.task_repository.add_many_coalesced(items)
+            else:
+                rows = [(task_id, None) for task_id in await self.task_repository.add_many(items)]
+            await asyncio.to_thread(self._publish, self._to_publish(rows, chunk))
+            created.extend(rows)
+        self._log_created(created)
+        return [task_id for task_id, _ in created]
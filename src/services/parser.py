@@ -1,9 +1,24 @@
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from src.parsers.async_http import AsyncHttpParser
 from src.parsers.http import HttpParser
 from src.parsers.browser import SeleniumParser
+from src.parsers.driver_pool import DriverPool, get_driver_pool
+from src.parsers.revalidation import ValidatorStore
+from src.parsers.selenium_nodes import get_selenium_balancer
+from src.parsers.exceptions import BrowserRequiredError, NetworkError, ParsingError
+from src.parsers.specs import ExtractionSpec
+from src.services.routing import MemoryRoutingStore, RoutingStore, route_key
 
 logger = logging.getLogger(__name__)
 
+HTTP_ENGINES = ("sync", "async")
+
+# Маршруты для method="auto", если общее хранилище не передано
+_local_routing_store = MemoryRoutingStore()
+
 class ParserService:
     """
     Фасад (обертка) над парсерами Павла.
@@ -11,24 +26,195 @@ class ParserService:
     и вернуть результат в едином формате.
     """
 
+    def __init__(
+        self,
+        http_engine: str = "sync",
+        http_max_retries: int = 3,
+        http_max_concurrency: int = 200,
+        http_per_host_concurrency: int = 8,
+        http_streaming: bool = False,
+        http_html_backend: str = "html.parser",
+        selenium_urls: list[str] | None = None,
+        selenium_pool_size: int = 2,
+        selenium_max_pages: int = 100,
+        selenium_max_age: float = 600.0,
+        validator_store: ValidatorStore | None = None,
+        extraction_spec: ExtractionSpec | None = None,
+        routing_store: RoutingStore | None = None,
+        browser_fallback: bool = True,
+    ):
+        """
+        Args:
+            http_engine: Чем обрабатывать пакеты method="http" (parse_many):
+                "sync" - HttpParser (requests) в пуле потоков, "async" - AsyncHttpParser
+                (httpx). Одиночный URL всегда парсится HttpParser.
+            http_max_retries: Попыток запроса внутри парсера; 1 - без повторов
+                (повторы делает воркер через перезапуск задачи).
+            http_max_concurrency: Глобальный лимит запросов для AsyncHttpParser.
+            http_per_host_concurrency: Лимит запросов к одному хосту для AsyncHttpParser.
+            http_streaming: Потоковое извлечение с ранним выходом в HttpParser.
+            http_html_backend: Бэкенд разбора HTML: html.parser, lxml или selectolax.
+            selenium_urls: URL Selenium-эндпоинтов; сессии балансируются между ними.
+            selenium_pool_size: Сколько тёплых сессий Selenium держать на процесс.
+            selenium_max_pages: После скольких страниц сессия пересоздаётся.
+            selenium_max_age: Через сколько секунд сессия пересоздаётся.
+            validator_store: Хранилище ETag / Last-Modified для условных запросов
+                (используется синхронным HttpParser).
+            extraction_spec: Спецификация полей для этой задачи; без неё - только заголовок.
+            routing_store: Где method="auto" запоминает метод для домена;
+                по умолчанию - память процесса.
+            browser_fallback: Может ли method="auto" запускать Selenium в этом
+                процессе; иначе вместо эскалации - BrowserRequiredError.
+        """
+        if http_engine not in HTTP_ENGINES:
+            raise ValueError(f"Неизвестный HTTP движок: {http_engine}")
+        self.http_engine = http_engine
+        self.http_max_retries = http_max_retries
+        self.http_max_concurrency = http_max_concurrency
+        self.http_per_host_concurrency = http_per_host_concurrency
+        self.http_streaming = http_streaming
+        self.http_html_backend = http_html_backend
+        self.selenium_urls = selenium_urls or ["http://selenium:4444/wd/hub"]
+        self.selenium_pool_size = selenium_pool_size
+        self.selenium_max_pages = selenium_max_pages
+        self.selenium_max_age = selenium_max_age
+        self.validator_store = validator_store
+        self.extraction_spec = extraction_spec
+        self.routing_store = routing_store or _local_routing_store
+        self.browser_fallback = browser_fallback
+
+    def _create_http_parser(self, reject_js_shell: bool = False, batch: bool = False) -> HttpParser:
+        # Асинхронный парсер - только для пакетов: для одного URL asyncio.run поднимал бы
+        # новый цикл событий и клиент httpx (рукопожатие, DNS) без всякой параллельности.
+        # Одиночный URL идёт через HttpParser с общим keep-alive транспортом процесса.
+        # Проверка на JS-оболочку есть только у синхронного парсера
+        if self.http_engine == "async" and batch and not reject_js_shell:
+            return AsyncHttpParser(
+                max_retries=self.http_max_retries,
+                max_concurrency=self.http_max_concurrency,
+                per_host_concurrency=self.http_per_host_concurrency,
+                html_backend=self.http_html_backend,
+                spec=self.extraction_spec,
+            )
+        return HttpParser(
+            max_retries=self.http_max_retries,
+            validator_store=self.validator_store,
+            streaming=self.http_streaming,
+            html_backend=self.http_html_backend,
+            spec=self.extraction_spec,
+            reject_js_shell=reject_js_shell,
+        )
+
+    def _get_driver_pool(self) -> DriverPool:
+        # Пул и балансировщик живут на уровне процесса, а сервис создаётся на каждую задачу
+        balancer = get_selenium_balancer(self.selenium_urls)
+        return get_driver_pool(
+            ",".join(self.selenium_urls),
+            factory=balancer.create_driver,
+            disposer=balancer.release_driver,
+            max_size=self.selenium_pool_size,
+            max_pages=self.selenium_max_pages,
+            max_age=self.selenium_max_age,
+        )
+
     def parse(self, url: str, method: str) -> dict:
         logger.info(f"SERVICE: Запрос на парсинг {url} методом {method}")
 
         try:
             if method == "http":
-                parser = HttpParser()
+                parser = self._create_http_parser()
                 return parser.parse(url)
-            
+
             elif method == "selenium":
-                parser = SeleniumParser(selenium_url="http://selenium:4444/wd/hub")
-                try:
-                    return parser.parse(url)
-                finally:
-                    parser.close()
-            
+                return self._parse_selenium(url)
+
+            elif method == "auto":
+                return self._parse_auto(url)
+
             else:
                 raise ValueError(f"Неизвестный метод парсинга: {method}")
 
         except Exception as e:
             logger.error(f"SERVICE ERROR: Ошибка при парсинге {url}: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def parse_many(self, urls: list[str], method: str = "http") -> list[dict | Exception]:
+        """
+        Парсит пакет URL одним парсером, параллельно.
+
+        Запросы идут одновременно с лимитами http_max_concurrency и
+        http_per_host_concurrency. Ошибка одного URL не прерывает пакет:
+        на его месте в результате - исключение (ParsingError / NetworkError).
+
+        Returns:
+            Результаты или исключения в том же порядке, что и urls.
+
+        Raises:
+            ValueError: Метод не "http" - пакетами парсится только HTTP.
+        """
+        if method != "http":
+            raise ValueError(f"Пакетный парсинг поддерживает только http, а не {method}")
+        if not urls:
+            return []
+        logger.info(f"SERVICE: Пакет из {len(urls)} URL методом {method}")
+
+        parser = self._create_http_parser(batch=True)
+        if isinstance(parser, AsyncHttpParser):
+            return parser.parse_many(urls, return_exceptions=True)
+
+        host_limits: dict[str, threading.Semaphore] = {}
+        for url in urls:
+            host_limits.setdefault(
+                urlsplit(url).netloc.lower(), threading.Semaphore(self.http_per_host_concurrency)
+            )
+
+        def _parse_one(url: str) -> dict | Exception:
+            with host_limits[urlsplit(url).netloc.lower()]:
+                try:
+                    return parser.parse(url)
+                except (NetworkError, ParsingError) as e:
+                    logger.error(f"SERVICE ERROR: Ошибка при парсинге {url}: {e}")
+                    return e
+
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.http_max_concurrency)) as pool:
+            return list(pool.map(_parse_one, urls))
+
+    def _parse_selenium(self, url: str) -> dict:
+        parser = SeleniumParser(pool=self._get_driver_pool(), spec=self.extraction_spec)
+        try:
+            return parser.parse(url)
+        finally:
+            parser.close()
+
+    def _parse_auto(self, url: str) -> dict:
+        """
+        Сначала дешёвый HTTP, браузер - только если статический результат не годится.
+
+        Эскалация в Selenium происходит на ParsingError: нет <title>, страница -
+        JS-оболочка (ScriptRenderedPageError), не найдено обязательное поле
+        спецификации. Сетевые ошибки не эскалируются. Сработавший метод
+        запоминается для домена, и следующие задачи идут сразу им.
+        """
+        domain = route_key(url)
+        route = self.routing_store.get(domain)
+
+        if route == "selenium":
+            if not self.browser_fallback:
+                raise BrowserRequiredError(f"{domain} парсится только браузером", url=url)
+            logger.info(f"SERVICE: {domain} -> selenium (маршрут известен)")
+            return {**self._parse_selenium(url), "method": "selenium"}
+
+        try:
+            # Для нового домена проверяем и на JS-оболочку; для известного HTTP - обычный парсер
+            result = self._create_http_parser(reject_js_shell=route is None).parse(url)
+        except ParsingError as e:
+            if not self.browser_fallback:
+                raise BrowserRequiredError(f"{domain}: HTTP не подошёл ({e})", url=url) from e
+            logger.info(f"SERVICE: {domain}: HTTP не подошёл ({e}), пробуем selenium")
+            result = self._parse_selenium(url)
+            self.routing_store.set(domain, "selenium")
+            return {**result, "method": "selenium"}
+
+        if route is None:
+            self.routing_store.set(domain, "http")
+        return {**result, "method": "http"}
@@ -0,0 +1,91 @@
+import logging
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] - счётчик выполненных задач очереди, KEYS[2..] - списки приоритетов
+# от высшего к низшему. ARGV[1] - раз в сколько задач поднимать отстающие.
+# Транспорт Redis кладёт новые сообщения слева (LPUSH), а воркер забирает
+# справа (BRPOP): RPOP - самая старая задача, RPUSH - следующая на выдачу.
+_PROMOTE_SCRIPT = """
+local served = redis.call('INCR', KEYS[1])
+if served % tonumber(ARGV[1]) ~= 0 then
+    return 0
+end
+local promoted = 0
+local busy = redis.call('LLEN', KEYS[2]) > 0
+for i = 3, #KEYS do
+    if busy then
+        local message = redis.call('RPOP', KEYS[i])
+        if message then
+            redis.call('RPUSH', KEYS[2], message)
+            promoted = promoted + 1
+        end
+    end
+    busy = busy or redis.call('LLEN', KEYS[i]) > 0
+end
+return promoted
+"""
+
+
+class StarvationGuard:
+    """
+    Защита низких приоритетов от голодания в очереди Celery на Redis.
+
+    Воркер всегда забирает задачу из списка высшего непустого приоритета,
+    поэтому при постоянном потоке срочных задач массовые не выполнялись бы
+    совсем. Раз в every выполненных задач очереди из каждого списка, над
+    которым есть непустой более высокий, самая старая задача переносится
+    в начало списка высшего приоритета. Так каждый приоритет получает
+    не меньше 1/every пропускной способности.
+
+    Ошибки Redis не останавливают обработку задач.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        priority_steps: list[int],
+        every: int = 10,
+        sep: str = ":",
+        prefix: str = "priority:served:",
+    ):
+        """
+        Args:
+            redis: Клиент Redis брокера.
+            priority_steps: Приоритеты сообщений в очереди, от высшего к низшему
+                (как broker_transport_options["priority_steps"]).
+            every: Раз в сколько выполненных задач поднимать отстающие; 0 - выключено.
+            sep: Разделитель имени очереди и приоритета (broker_transport_options["sep"]).
+            prefix: Префикс ключей счётчиков.
+        """
+        self.redis = redis
+        self.priority_steps = sorted(priority_steps)
+        self.every = every
+        self.sep = sep
+        self.prefix = prefix
+        self._promote = redis.register_script(_PROMOTE_SCRIPT)
+
+    def lane_key(self, queue: str, priority: int) -> str:
+        """Имя списка Redis, в котором лежат сообщения очереди с этим приоритетом."""
+        return f"{queue}{self.sep}{priority}" if priority else queue
+
+    def task_done(self, queue: str) -> int:
+        """
+        Учитывает выполненную задачу очереди.
+
+        Returns:
+            Сколько задач поднято в начало очереди.
+        """
+        if not self.every:
+            return 0
+        keys = [self.prefix + queue] + [self.lane_key(queue, pri) for pri in self.priority_steps]
+        try:
+            promoted = int(self._promote(keys=keys, args=[self.every]))
+        except RedisError as e:
+            logger.warning(f"PRIORITY: Redis недоступен, очередь {queue} без защиты от голодания: {e}")
+            return 0
+        if promoted:
+            logger.info(f"PRIORITY: {queue}: поднято {promoted} задач с низким приоритетом")
+        return promoted
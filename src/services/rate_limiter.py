@@ -0,0 +1,196 @@
+import logging
+from dataclasses import dataclass
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+# Token bucket: KEYS[1] - состояние корзины, KEYS[2] - сниженная после 429/503 скорость.
+# Время берётся у Redis, чтобы часы воркеров не влияли на лимит.
+# При пустой корзине токен всё равно берётся: запас уходит в минус, и вызывающий
+# получает будущий слот - через -tokens/rate секунд, когда долг погасится.
+# Слот дальше ARGV[3] секунд не резервируется: запас не меняется, а вызывающему
+# предлагается спросить снова через ARGV[3] секунд.
+# Ответ: {сейчас ли, через сколько секунд, зарезервирован ли слот}.
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_delay = tonumber(ARGV[3])
+local penalty = redis.call('GET', KEYS[2])
+if penalty then
+    rate = math.min(rate, tonumber(penalty))
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 1
+local reserved = 1
+local wait = 0
+if tokens - 1 < 0 then
+    allowed = 0
+    wait = (1 - tokens) / rate
+    if wait > max_delay then
+        reserved = 0
+        wait = max_delay
+    end
+end
+if reserved == 1 then
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 60)
+return {allowed, tostring(wait), reserved}
+"""
+
+# Снижение скорости после 429/503: KEYS как выше.
+# ARGV: настроенная скорость, минимальная, множитель, TTL снижения, Retry-After.
+_PENALIZE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[2]) or ARGV[1])
+local rate = math.max(tonumber(ARGV[2]), current * tonumber(ARGV[3]))
+redis.call('SET', KEYS[2], rate, 'EX', tonumber(ARGV[4]))
+local retry_after = tonumber(ARGV[5])
+if retry_after > 0 then
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    -- Отрицательный запас: следующий токен появится не раньше Retry-After.
+    -- Уже выданные слоты (долг больше) не прощаются.
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = -retry_after * rate
+    if state[1] then
+        local refilled = tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * current
+        tokens = math.min(tokens, refilled)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(-tokens / rate) + 60)
+end
+return tostring(rate)
+"""
+
+
+@dataclass
+class Reservation:
+    """
+    Результат попытки взять токен: можно ли идти сейчас, а иначе - через
+    сколько секунд наступит слот, закреплённый за вызывающим (reserved),
+    или, если очередь к домену длиннее max_delay, когда спросить снова.
+    """
+
+    allowed: bool
+    retry_after: float = 0.0
+    reserved: bool = True
+
+
+class DomainRateLimiter:
+    """
+    Лимит запросов к домену, общий для всех воркеров (token bucket в Redis).
+
+    Скорость (запросов в секунду) задаётся для домена и распространяется
+    на поддомены; для остальных - default_rate. После ответа 429/503
+    скорость домена умножается на backoff (не ниже min_rate) на
+    penalty_ttl секунд, затем возвращается к настроенной.
+
+    Отказ в acquire тоже резервирует токен: запас корзины уходит в минус,
+    и каждый отложенный вызывающий получает свой слот в будущем. Повторно
+    брать токен в этот слот не нужно - иначе все отложенные задачи
+    просыпались бы одновременно и снова делили один токен. Очередь слотов
+    не длиннее max_delay секунд: сообщение с большим countdown транспорт
+    Redis выдал бы повторно по visibility_timeout.
+
+    Ошибки Redis не останавливают парсинг: лимит в этом случае не применяется.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        default_rate: float = 2.0,
+        burst: int = 5,
+        domain_rates: dict[str, float] | None = None,
+        min_rate: float = 0.05,
+        backoff: float = 0.5,
+        penalty_ttl: int = 600,
+        max_delay: float = 600.0,
+        prefix: str = "ratelimit:",
+    ):
+        """
+        Args:
+            redis: Клиент Redis.
+            default_rate: Запросов в секунду к домену без своей настройки.
+            burst: Сколько запросов подряд можно сделать без ожидания.
+            domain_rates: Скорость для доменов, например {"example.com": 0.5}.
+            min_rate: Ниже этой скорости автоматическое снижение не опускается.
+            backoff: Во сколько раз умножать скорость после 429/503.
+            penalty_ttl: Сколько секунд действует сниженная скорость.
+            max_delay: Насколько вперёд резервировать слоты, секунд.
+            prefix: Префикс ключей Redis.
+        """
+        self.redis = redis
+        self.default_rate = default_rate
+        self.burst = burst
+        self.domain_rates = {domain.lower(): rate for domain, rate in (domain_rates or {}).items()}
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.penalty_ttl = penalty_ttl
+        self.max_delay = max_delay
+        self.prefix = prefix
+        self._acquire = redis.register_script(_ACQUIRE_SCRIPT)
+        self._penalize = redis.register_script(_PENALIZE_SCRIPT)
+
+    def rate_for(self, domain: str) -> float:
+        """Настроенная скорость: точное совпадение или ближайший родительский домен."""
+        parts = domain.lower().split(".")
+        for i in range(len(parts)):
+            rate = self.domain_rates.get(".".join(parts[i:]))
+            if rate is not None:
+                return rate
+        return self.default_rate
+
+    def _keys(self, domain: str) -> list[str]:
+        return [f"{self.prefix}{domain}:bucket", f"{self.prefix}{domain}:penalty"]
+
+    def acquire(self, domain: str) -> Reservation:
+        """Берёт токен для запроса к домену (сейчас или в будущем слоте); не блокирует."""
+        try:
+            allowed, wait, reserved = self._acquire(
+                keys=self._keys(domain), args=[self.rate_for(domain), self.burst, self.max_delay]
+            )
+        except RedisError as e:
+            logger.warning(f"RATE LIMIT: Redis недоступен, {domain} без лимита: {e}")
+            return Reservation(allowed=True)
+        return Reservation(
+            allowed=bool(int(allowed)), retry_after=float(wait), reserved=bool(int(reserved))
+        )
+
+    def penalize(self, domain: str, retry_after: float | None = None) -> float | None:
+        """
+        Снижает скорость домена после 429/503.
+
+        Args:
+            domain: Домен.
+            retry_after: Значение Retry-After в секундах, если сайт его прислал.
+
+        Returns:
+            Новая скорость или None, если Redis недоступен.
+        """
+        try:
+            rate = float(self._penalize(
+                keys=self._keys(domain),
+                args=[
+                    self.rate_for(domain),
+                    self.min_rate,
+                    self.backoff,
+                    self.penalty_ttl,
+                    retry_after or 0,
+                ],
+            ))
+        except RedisError as e:
+            logger.warning(f"RATE LIMIT: не удалось снизить скорость {domain}: {e}")
+            return None
+        logger.info(f"RATE LIMIT: {domain} ответил отказом, скорость снижена до {rate:.3f}/с")
+        return rate
@@ -0,0 +1,125 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from src.core.urls import normalize_url
+from src.repositories.task_repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Кэш результатов парсинга по (канонический URL, метод, спецификация извлечения).
+
+    Свежесть задаётся на каждый запрос (max_age), поэтому в кэше хранится
+    время получения результата, а не фиксированный TTL. Первый уровень -
+    LRU в памяти процесса с ограничением по числу записей, второй -
+    последний успешный результат в scraping_tasks.
+    """
+
+    def __init__(self, task_repository: TaskRepository, max_entries: int = 10000):
+        """
+        Args:
+            task_repository: Репозиторий для поиска свежего результата в БД.
+            max_entries: Максимум записей в памяти; лишние вытесняются по LRU.
+        """
+        self.task_repository = task_repository
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str, str | None], tuple[datetime, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key: tuple[str, str, str | None], fetched_at: datetime, result: dict) -> None:
+        with self._lock:
+            self._entries[key] = (fetched_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, url: str, method: str, max_age: int, spec: str | None = None) -> dict | None:
+        """
+        Возвращает результат не старше max_age секунд или None.
+        """
+        key = (normalize_url(url), method, spec)
+        since = datetime.utcnow() - timedelta(seconds=max_age)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= since:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        found = self.task_repository.find_fresh_result(url, method, since, spec=spec)
+        if found is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        fetched_at, result = found
+        self._store(key, fetched_at, result)
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def get_many(
+        self, requests: list[tuple[str, str, int, str | None]]
+    ) -> list[dict | None]:
+        """
+        get для многих URL: промахи памяти ищутся в БД одним запросом.
+
+        Args:
+            requests: (url, method, max_age, spec).
+
+        Returns:
+            Результаты или None в том же порядке, что и requests.
+        """
+        now = datetime.utcnow()
+        results: list[dict | None] = [None] * len(requests)
+        misses: list[tuple[int, tuple[str, str, str | None], datetime]] = []
+        with self._lock:
+            for i, (url, method, max_age, spec) in enumerate(requests):
+                key = (normalize_url(url), method, spec)
+                since = now - timedelta(seconds=max_age)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] >= since:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results[i] = entry[1]
+                else:
+                    misses.append((i, key, since))
+
+        if not misses:
+            return results
+        found = self.task_repository.find_fresh_results([
+            (requests[i][0], method, spec, since) for i, (_, method, spec), since in misses
+        ])
+        for (i, key, _), entry in zip(misses, found):
+            if entry is None:
+                continue
+            fetched_at, result = entry
+            results[i] = result
+            self._store(key, fetched_at, result)
+        with self._lock:
+            hit = sum(1 for entry in found if entry is not None)
+            self.hits += hit
+            self.misses += len(found) - hit
+        return results
+
+    def put(self, url: str, method: str, result: dict, spec: str | None = None) -> None:
+        """Запоминает свежий результат парсинга."""
+        self._store((normalize_url(url), method, spec), datetime.utcnow(), result)
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики попаданий, промахов и вытеснений."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,40 @@
+import random
+from dataclasses import dataclass
+
+from src.parsers.exceptions import NetworkError
+
+# Коды ответа, после которых повтор имеет смысл
+TRANSIENT_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Когда и через сколько повторять задачу после сетевой ошибки.
+
+    Задержка растёт экспоненциально (base_delay * 2^attempt, не больше
+    max_delay) с разбросом в половину интервала, чтобы воркеры не повторяли
+    запросы к одному хосту синхронно. Retry-After сервера важнее: раньше
+    него повтора не будет.
+    """
+
+    max_retries: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 600.0
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        """Сетевая ошибка без ответа (таймаут, обрыв) или временный код ответа."""
+        if not isinstance(error, NetworkError):
+            return False
+        return error.status_code is None or error.status_code in TRANSIENT_STATUS_CODES
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """attempt - номер неудавшейся попытки, с 0."""
+        return attempt < self.max_retries and self.is_transient(error)
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Секунды до следующей попытки."""
+        interval = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = interval / 2 + random.uniform(0, interval / 2)
+        return max(delay, retry_after or 0.0)
@@ -0,0 +1,81 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+ROUTABLE_METHODS = ("http", "selenium")
+
+
+def route_key(url: str) -> str:
+    """Ключ маршрута - хост в нижнем регистре."""
+    return (urlsplit(url).hostname or "").lower()
+
+
+class RoutingStore(ABC):
+    """Запомненный по домену метод, которым страницы парсятся успешно."""
+
+    @abstractmethod
+    def get(self, domain: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def set(self, domain: str, method: str) -> None:
+        pass
+
+
+class MemoryRoutingStore(RoutingStore):
+    """Маршруты в памяти процесса (по умолчанию и для тестов)."""
+
+    def __init__(self):
+        self._routes: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, domain: str) -> str | None:
+        with self._lock:
+            return self._routes.get(domain)
+
+    def set(self, domain: str, method: str) -> None:
+        with self._lock:
+            self._routes[domain] = method
+
+
+class RedisRoutingStore(RoutingStore):
+    """
+    Маршруты в Redis, общие для всех воркеров.
+
+    У записи есть TTL: сайт мог перейти на SSR или наоборот, поэтому
+    время от времени HTTP снова пробуется первым. Ошибки Redis не
+    роняют парсинг - маршрут просто считается неизвестным.
+    """
+
+    def __init__(self, redis: Redis, ttl: int = 7 * 24 * 3600, prefix: str = "routing:method:"):
+        """
+        Args:
+            redis: Клиент Redis.
+            ttl: Сколько секунд помнить выбранный метод.
+            prefix: Префикс ключей.
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, domain: str) -> str | None:
+        try:
+            value = self.redis.get(self.prefix + domain)
+        except RedisError as e:
+            logger.warning(f"ROUTING: Redis недоступен, маршрут {domain} неизвестен: {e}")
+            return None
+        if value is None:
+            return None
+        method = value.decode() if isinstance(value, bytes) else str(value)
+        return method if method in ROUTABLE_METHODS else None
+
+    def set(self, domain: str, method: str) -> None:
+        try:
+            self.redis.set(self.prefix + domain, method, ex=self.ttl)
+        except RedisError as e:
+            logger.warning(f"ROUTING: не удалось сохранить маршрут {domain} -> {method}: {e}")
@@ -0,0 +1,17 @@
+from redis import Redis
+
+from src.services.worker_stats import WorkerStatsStore
+
+
+class SeleniumStatsStore(WorkerStatsStore):
+    """
+    Счётчики Selenium-узлов (get_selenium_stats) всех процессов воркеров в Redis.
+
+    Балансировщик живёт в процессе, который открывает сессии, поэтому процесс
+    публикует свои счётчики {url узла: {...}} после браузерной задачи.
+    """
+
+    label = "SELENIUM STATS"
+
+    def __init__(self, redis: Redis, ttl: int = 300, prefix: str = "selenium:stats:"):
+        super().__init__(redis, ttl=ttl, prefix=prefix)
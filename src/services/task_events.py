@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+
+from redis import RedisError
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from src.repositories.status_cache import TASK_EVENTS_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """События смены статуса для набора задач, на которые подписан один клиент API."""
+
+    def __init__(self, hub: "TaskEventHub"):
+        self.hub = hub
+        self.task_ids: set[str] = set()
+        self._queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+
+    async def add(self, task_ids: list[str]) -> None:
+        """Подписывается ещё на задачи (например, на ведущую присоединённой задачи)."""
+        new = set(task_ids) - self.task_ids
+        if new:
+            self.task_ids |= new
+            await self.hub._attach(self, new)
+
+    async def get(self, timeout: float) -> tuple[str, dict] | None:
+        """Следующее событие (id задачи, событие) или None, если за timeout секунд его не было."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _put(self, task_id: str, event: dict) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (task_id, event))
+
+
+class TaskEventHub:
+    """
+    Раздача событий смены статуса задач подписчикам внутри процесса API.
+
+    Сам по себе работает в пределах процесса (dispatch); RedisTaskEventHub
+    получает события воркеров через Redis pub/sub.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, task_ids: list[str]):
+        """Подписка на задачи на время блока with."""
+        subscription = Subscription(self)
+        try:
+            await subscription.add(task_ids)
+            yield subscription
+        finally:
+            await self._detach(subscription)
+
+    def dispatch(self, task_id: str, event: dict) -> None:
+        """Передаёт событие задачи её подписчикам; можно вызывать из любого потока."""
+        for subscription in list(self._subscribers.get(task_id, ())):
+            subscription._put(task_id, event)
+
+    async def _attach(self, subscription: Subscription, task_ids: set[str]) -> list[str]:
+        """Returns: задачи, на которые до этого никто не был подписан."""
+        first = []
+        for task_id in task_ids:
+            subscribers = self._subscribers.setdefault(task_id, set())
+            if not subscribers:
+                first.append(task_id)
+            subscribers.add(subscription)
+        return first
+
+    async def _detach(self, subscription: Subscription) -> list[str]:
+        """Returns: задачи, на которые больше никто не подписан."""
+        last = []
+        for task_id in subscription.task_ids:
+            subscribers = self._subscribers.get(task_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[task_id]
+                last.append(task_id)
+        return last
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisTaskEventHub(TaskEventHub):
+    """
+    События смены статуса из Redis pub/sub (их публикует TaskStatusCache воркера).
+
+    Одно соединение pub/sub на процесс API независимо от числа ожидающих
+    клиентов: на канал задачи подписываемся, пока его ждёт хотя бы один
+    клиент. Если Redis недоступен, события не приходят и ожидание
+    заканчивается по таймауту.
+    """
+
+    def __init__(self, redis: Redis, prefix: str = TASK_EVENTS_PREFIX, poll_interval: float = 1.0):
+        """
+        Args:
+            redis: Асинхронный клиент Redis.
+            prefix: Префикс каналов (как у TaskStatusCache).
+            poll_interval: Сколько секунд ждать сообщение за один опрос соединения.
+        """
+        super().__init__()
+        self.redis = redis
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self._pubsub: PubSub | None = None
+        self._reader: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def _attach(self, subscription: Subscription, task_ids: set[str]) -> list[str]:
+        async with self._lock:
+            first = await super()._attach(subscription, task_ids)
+            if first:
+                # pubsub() не ходит в Redis - соединение откроет subscribe
+                if self._pubsub is None:
+                    self._pubsub = self.redis.pubsub()
+                try:
+                    await self._pubsub.subscribe(*(self.prefix + task_id for task_id in first))
+                except RedisError as e:
+                    logger.warning(f"TASK EVENTS: Redis недоступен, события задач не придут: {e}")
+                if self._reader is None or self._reader.done():
+                    self._reader = asyncio.create_task(self._read(self._pubsub))
+            return first
+
+    async def _detach(self, subscription: Subscription) -> list[str]:
+        async with self._lock:
+            last = await super()._detach(subscription)
+            if last and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*(self.prefix + task_id for task_id in last))
+                except RedisError as e:
+                    logger.warning(f"TASK EVENTS: не удалось отписаться от {len(last)} задач: {e}")
+            return last
+
+    async def _read(self, pubsub: PubSub) -> None:
+        while True:
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=self.poll_interval
+                )
+            except (RedisError, RuntimeError) as e:
+                # RuntimeError - соединение ещё не открыто (подписка не удалась)
+                logger.warning(f"TASK EVENTS: ошибка чтения событий: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                event = json.loads(message["data"])
+            except ValueError:
+                continue
+            self.dispatch(channel[len(self.prefix):], event)
+
+    async def close(self) -> None:
+        """Останавливает чтение и закрывает соединение pub/sub."""
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
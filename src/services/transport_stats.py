@@ -0,0 +1,17 @@
+from redis import Redis
+
+from src.services.worker_stats import WorkerStatsStore
+
+
+class TransportStatsStore(WorkerStatsStore):
+    """
+    Счётчики HttpTransport (get_transport().get_stats()) всех процессов воркеров в Redis.
+
+    По ним видно, работают ли keep-alive и DNS-кэш: reused - запросы по уже
+    открытому соединению, dns.hits - адреса из кэша без запроса к резолверу.
+    """
+
+    label = "HTTP STATS"
+
+    def __init__(self, redis: Redis, ttl: int = 300, prefix: str = "http:stats:"):
+        super().__init__(redis, ttl=ttl, prefix=prefix)
@@ -0,0 +1,64 @@
+import json
+import logging
+from typing import Any, cast
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerStatsStore:
+    """
+    Счётчики процессов воркеров в Redis.
+
+    Счётчики живут в памяти процесса, который выполняет задачи (дочерний
+    процесс prefork), поэтому ни inspect Celery, ни API сами их не видят.
+    Процесс публикует свои счётчики после задачи; запись живёт ttl секунд,
+    так что остановленные процессы пропадают из отчёта сами.
+
+    Ошибки Redis не мешают парсингу: счётчики просто не обновляются.
+    """
+
+    # Имя счётчиков в логах
+    label = "WORKER STATS"
+
+    def __init__(self, redis: Redis, ttl: int = 300, prefix: str = "worker:stats:"):
+        """
+        Args:
+            redis: Клиент Redis.
+            ttl: Сколько секунд хранить счётчики процесса после последней публикации.
+            prefix: Префикс ключей.
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def publish(self, worker: str, stats: dict[str, Any]) -> None:
+        """Записывает счётчики процесса worker."""
+        try:
+            self.redis.set(self.prefix + worker, json.dumps(stats), ex=self.ttl)
+        except RedisError as e:
+            logger.warning(f"{self.label}: не удалось записать счётчики {worker}: {e}")
+
+    def collect(self) -> dict[str, dict[str, Any]]:
+        """
+        Счётчики всех живых процессов.
+
+        Returns:
+            {процесс воркера: счётчики}.
+
+        Raises:
+            RedisError: Redis недоступен.
+        """
+        keys = sorted(self.redis.scan_iter(match=self.prefix + "*", count=100))
+        if not keys:
+            return {}
+        stats = {}
+        # Синхронный клиент: mget возвращает список, а не Awaitable
+        values = cast(list, self.redis.mget(keys))
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            key = key.decode() if isinstance(key, bytes) else key
+            stats[key[len(self.prefix):]] = json.loads(value)
+        return stats
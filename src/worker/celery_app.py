@@ -1,20 +1,164 @@
+import importlib
+import os
+import sys
+from dataclasses import dataclass
+
 from celery import Celery
+from kombu import Exchange, Queue
+
 from src.core.config import Settings
+from src.core.priorities import (
+    CELERY_PRIORITY_SEP,
+    CELERY_PRIORITY_STEPS,
+    DEFAULT_PRIORITY,
+    celery_priority,
+)
 
 settings = Settings()
 
-celery = Celery(
+
+def _import_trio_before_green_select() -> None:
+    """
+    Импортирует trio при активном gevent, пока в select есть epoll.
+
+    monkey-patching gevent убирает select.epoll, а trio (зависимость selenium)
+    создаёт на нём класс при импорте. httpcore импортирует trio, если тот
+    установлен, поэтому без этого импорт httpx и задач в воркере gevent
+    падает с AttributeError. Сам trio в воркере не запускается.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return
+    if "trio" in sys.modules or not monkey.is_module_patched("select"):
+        return
+    import select
+
+    setattr(select, "epoll", monkey.get_original("select", "epoll"))
+    try:
+        importlib.import_module("trio")
+    except ImportError:
+        pass
+    finally:
+        delattr(select, "epoll")
+
+
+# До include задач: они импортируют httpx
+_import_trio_before_green_select()
+
+PARSE_TASK_NAME = "src.worker.tasks.parse_url_task"
+# Пакет URL method="http" одним сообщением
+BATCH_TASK_NAME = "src.worker.tasks.parse_batch_task"
+
+# Очередь по методу парсинга. auto начинает с HTTP; если нужен браузер,
+# воркер HTTP-очереди сам перекладывает задачу в браузерную.
+QUEUE_BY_METHOD = {
+    "http": settings.CELERY_HTTP_QUEUE,
+    "auto": settings.CELERY_HTTP_QUEUE,
+    "selenium": settings.CELERY_BROWSER_QUEUE,
+}
+
+
+def queue_for(method: str) -> str:
+    """Очередь, в которую попадёт задача с этим методом."""
+    return QUEUE_BY_METHOD.get(method, settings.CELERY_HTTP_QUEUE)
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Роутер Celery: parse_url_task идёт в очередь своего метода, пакеты - в HTTP."""
+    if name == BATCH_TASK_NAME:
+        return {"queue": settings.CELERY_HTTP_QUEUE}
+    if name != PARSE_TASK_NAME:
+        return None
+    method = args[1] if args and len(args) > 1 else (kwargs or {}).get("method", "http")
+    return {"queue": queue_for(method)}
+
+
+celery_app = Celery(
     "worker",
-    broker=settings.REDIS_URL.unicode_string(),
-    backend=settings.REDIS_URL.unicode_string()
+    broker=str(settings.REDIS_URL),
+    backend=str(settings.REDIS_URL),
+    include=["src.worker.tasks"],
 )
 
-celery.conf.update(
+celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Своя direct-биржа на очередь: иначе Celery привязывает обе к бирже очереди по умолчанию
+    task_queues=tuple(
+        Queue(name, Exchange(name, type="direct"), routing_key=name)
+        for name in (settings.CELERY_HTTP_QUEUE, settings.CELERY_BROWSER_QUEUE)
+    ),
+    task_default_queue=settings.CELERY_HTTP_QUEUE,
+    task_routes=(route_task,),
+    # Приоритеты: отдельный список Redis на шаг, воркер читает их по порядку
+    broker_transport_options={
+        "priority_steps": CELERY_PRIORITY_STEPS,
+        "sep": CELERY_PRIORITY_SEP,
+    },
+    task_default_priority=celery_priority(DEFAULT_PRIORITY),
 )
 
-celery.autodiscover_tasks(["src.worker"])
\ No newline at end of file
+
+@dataclass(frozen=True)
+class WorkerProfile:
+    """Как запускать воркер для одной очереди: пул, параллелизм, prefetch."""
+
+    queue: str
+    pool: str
+    concurrency: int
+    prefetch_multiplier: int
+
+
+WORKER_PROFILES = {
+    # HTTP - ожидание сети: сотни green-потоков в одном процессе.
+    # Взятые заранее сообщения уже не обгонит срочная задача, поэтому prefetch 1
+    "http": WorkerProfile(
+        queue=settings.CELERY_HTTP_QUEUE,
+        pool=settings.WORKER_HTTP_POOL,
+        concurrency=settings.WORKER_HTTP_CONCURRENCY,
+        prefetch_multiplier=1,
+    ),
+    # Браузер - долгие задачи с тяжёлыми сессиями: несколько процессов, без запаса сообщений
+    "browser": WorkerProfile(
+        queue=settings.CELERY_BROWSER_QUEUE,
+        pool=settings.WORKER_BROWSER_POOL,
+        concurrency=settings.WORKER_BROWSER_CONCURRENCY,
+        prefetch_multiplier=1,
+    ),
+}
+
+
+def worker_argv(profile: str, extra: list[str] | None = None) -> list[str]:
+    """
+    Командная строка celery worker для профиля.
+
+    Пул передаётся флагом -P, а не через конфиг: только так Celery
+    успевает применить monkey-patching gevent/eventlet до импорта задач.
+
+    Raises:
+        ValueError: Неизвестный профиль.
+    """
+    if profile not in WORKER_PROFILES:
+        raise ValueError(f"Неизвестный профиль воркера: {profile}")
+    worker = WORKER_PROFILES[profile]
+    return [
+        "celery", "-A", "src.worker.celery_app:celery_app", "worker",
+        "-Q", worker.queue,
+        "-P", worker.pool,
+        "-c", str(worker.concurrency),
+        "--prefetch-multiplier", str(worker.prefetch_multiplier),
+        "-n", f"{profile}@%h",
+        *(extra or []),
+    ]
+
+
+if __name__ == "__main__":
+    # python -m src.worker.celery_app http --loglevel=info
+    if len(sys.argv) < 2:
+        sys.exit(f"Использование: python -m src.worker.celery_app {{{'|'.join(WORKER_PROFILES)}}} [опции celery]")
+    argv = worker_argv(sys.argv[1], sys.argv[2:])
+    os.execvp(argv[0], argv)
@@ -1,39 +1,418 @@
+import logging
+import os
+import random
 import time
-from celery import Celery
+from datetime import datetime, timedelta
+from celery.exceptions import Retry
+from celery.signals import task_postrun, task_prerun, task_received, worker_init, worker_process_shutdown
 from src.core.config import Settings
 from src.core.container import Container
+from src.core.priorities import priority_name
+from src.db.database import make_psycopg2_green
+from src.parsers.driver_pool import close_driver_pools
+from src.parsers.exceptions import BrowserRequiredError, NetworkError
+from src.parsers.selenium_nodes import get_selenium_stats
+from src.parsers.transport import configure_transport, get_transport
 from src.services.parser import ParserService
+from src.services.retry_policy import RetryPolicy
+from src.services.routing import route_key
+from src.worker.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
 
 settings = Settings()
 
-celery_app = Celery(
-    "worker",
-    broker=str(settings.REDIS_URL),
-    backend=str(settings.REDIS_URL)
+configure_transport(
+    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    host_pool_sizes=settings.HTTP_HOST_POOL_SIZES,
+    dns_ttl=settings.HTTP_DNS_TTL,
 )
 
 container = Container()
 
-@celery_app.task(bind=True) 
+retry_policy = RetryPolicy(
+    max_retries=settings.TASK_MAX_RETRIES,
+    base_delay=settings.TASK_RETRY_BASE_DELAY,
+    max_delay=settings.TASK_RETRY_MAX_DELAY,
+)
+
+
+def _status_repository():
+    """Куда писать статусы: напрямую в БД или через write-behind буфер."""
+    if settings.STATUS_WRITE_BEHIND:
+        return container.status_writer()
+    return container.task_repository()
+
+
+@worker_init.connect
+def _prepare_db_for_green_pool(sender=None, **kwargs):
+    # gevent: запрос psycopg2 не должен останавливать остальные green-потоки,
+    # а соединений в пуле должно хватать на все задачи процесса.
+    # worker_init приходит до первой задачи, т.е. до создания движка.
+    if make_psycopg2_green():
+        max_overflow = max(settings.DB_MAX_OVERFLOW, sender.concurrency - settings.DB_POOL_SIZE)
+        container.db.add_kwargs(max_overflow=max_overflow)
+        logger.info(f"DB: psycopg2 переключён на gevent, до {settings.DB_POOL_SIZE + max_overflow} соединений")
+
+
+@worker_process_shutdown.connect
+def _flush_status_writer(**kwargs):
+    if settings.STATUS_WRITE_BEHIND:
+        container.status_writer().close()
+
+
+@worker_process_shutdown.connect
+def _close_driver_pools(**kwargs):
+    stats = get_selenium_stats()
+    if stats:
+        logger.info(f"Selenium node stats: {stats}")
+    close_driver_pools()
+
+
+@worker_process_shutdown.connect
+def _log_transport_stats(**kwargs):
+    stats = get_transport().get_stats()
+    if stats["requests"]:
+        logger.info(f"HTTP transport stats: {stats}")
+
+
+def _create_parser_service(extraction_spec, browser_fallback: bool = True) -> ParserService:
+    return ParserService(
+        http_engine=settings.HTTP_ENGINE,
+        # Повторы - перезапуском задачи, а не ожиданием внутри слота воркера
+        http_max_retries=1,
+        http_max_concurrency=settings.HTTP_MAX_CONCURRENCY,
+        http_per_host_concurrency=settings.HTTP_PER_HOST_CONCURRENCY,
+        http_streaming=settings.HTTP_STREAMING,
+        http_html_backend=settings.HTTP_HTML_BACKEND,
+        selenium_urls=settings.selenium_urls,
+        selenium_pool_size=settings.SELENIUM_POOL_SIZE,
+        selenium_max_pages=settings.SELENIUM_MAX_PAGES,
+        selenium_max_age=settings.SELENIUM_MAX_AGE,
+        validator_store=container.validator_repository() if settings.HTTP_REVALIDATE else None,
+        extraction_spec=extraction_spec,
+        routing_store=container.routing_store(),
+        browser_fallback=browser_fallback,
+    )
+
+
+def _deferral_countdown(reservation) -> float:
+    """Когда вернуть отложенную лимитом задачу: к её слоту или, без слота, вразброс."""
+    if reservation.reserved:
+        return reservation.retry_after
+    # Без слота задачи вернутся одновременно - разносим их, чтобы не спрашивать лимит залпом
+    return reservation.retry_after * (1 + random.random() * 0.1)
+
+
+def _penalize_domain(url: str, error: Exception) -> None:
+    """Снижает скорость домена, если он ответил 429/503."""
+    if (
+        settings.RATE_LIMIT_ENABLED
+        and isinstance(error, NetworkError)
+        and error.status_code in (429, 503)
+    ):
+        container.rate_limiter().penalize(route_key(url), error.retry_after)
+
+
+# Число перезапусков ограничивает только RetryPolicy (по attempt): request.retries
+# считает и откладывания по лимиту домена, и перенос в браузерную очередь
+@celery_app.task(bind=True, max_retries=None)
 def parse_url_task(
     self, 
     url: str, 
     method: str,
+    max_age: int | None = None,
+    spec: str | None = None,
+    attempt: int = 0,
+    reserved: bool = False,
 ):
-    task_repository = container.task_repository()
+    """
+    attempt - номер попытки с 0; растёт при перезапуске после временной ошибки.
+    reserved - запуск в слот лимита домена, закреплённый при откладывании задачи:
+    токен уже взят, повторно его не берём.
+    """
+    task_repository = _status_repository()
 
     task_id = self.request.id
+    # Воркер HTTP-очереди (gevent) браузер не запускает
+    queue = (self.request.delivery_info or {}).get("routing_key")
+    browser_fallback = queue != settings.CELERY_HTTP_QUEUE
 
     try:
+        if max_age is not None:
+            cached = container.result_cache().get(url, method, max_age, spec=spec)
+            if cached is not None:
+                task_repository.update_status(task_id, "done", result=cached, cache_hit=True)
+                return cached
+
+        if settings.RATE_LIMIT_ENABLED and not reserved:
+            reservation = container.rate_limiter().acquire(route_key(url))
+            if not reservation.allowed:
+                # Не занимаем слот воркера ожиданием: задача вернётся в очередь к своему слоту,
+                # а если слоты расписаны дальше max_delay - спросит лимит снова
+                logger.info(f"RATE LIMIT: {url} отложена на {reservation.retry_after:.2f}с")
+                raise self.retry(
+                    countdown=_deferral_countdown(reservation),
+                    kwargs={
+                        "max_age": max_age,
+                        "spec": spec,
+                        "attempt": attempt,
+                        "reserved": reservation.reserved,
+                    },
+                )
+
         task_repository.update_status(task_id, "processing")
         
-        parser = ParserService()
+        parser = _create_parser_service(
+            container.spec_registry().resolve(url, spec), browser_fallback=browser_fallback
+        )
         result_data = parser.parse(url, method)
 
         task_repository.update_status(task_id, "done", result=result_data)
+        container.result_cache().put(url, method, result_data, spec=spec)
         
         return result_data
 
+    except Retry:
+        raise
+
+    except BrowserRequiredError as e:
+        logger.info(f"ROUTING: {url} передана в очередь {settings.CELERY_BROWSER_QUEUE}: {e}")
+        raise self.retry(
+            countdown=0,
+            queue=settings.CELERY_BROWSER_QUEUE,
+            kwargs={"max_age": max_age, "spec": spec, "attempt": attempt},
+        )
+
     except Exception as e:
+        _penalize_domain(url, e)
+
+        if retry_policy.should_retry(e, attempt):
+            countdown = retry_policy.delay(attempt, getattr(e, "retry_after", None))
+            next_retry_at = datetime.utcnow() + timedelta(seconds=countdown)
+            task_repository.mark_retry(task_id, attempt + 1, next_retry_at, str(e))
+            logger.info(f"RETRY: {url} попытка {attempt + 1} не удалась, повтор через {countdown:.1f}с")
+            raise self.retry(
+                countdown=countdown,
+                kwargs={"max_age": max_age, "spec": spec, "attempt": attempt + 1},
+                exc=e,
+            )
+
         task_repository.update_status(task_id, "error", result={"error": str(e)})
-        raise e
\ No newline at end of file
+        raise e
+
+
+@celery_app.task(bind=True)
+def parse_batch_task(self, items: list[dict]):
+    """
+    Пакет задач method="http" одним сообщением.
+
+    items - [{"task_id", "url", "max_age", "spec"}]. URL загружаются
+    параллельно одним парсером (на каждую спецификацию), готовые результаты
+    для max_age ищутся одним запросом, статусы (и перезапланирование после
+    ошибки) пишутся одним UPDATE до и одним после парсинга, но результат
+    или ошибка у каждого ScrapingTask свои. URL, упёршиеся в лимит домена или получившие временную
+    ошибку, перезапускаются отдельными parse_url_task с тем же id.
+    """
+    task_repository = container.task_repository()
+    # Перезапущенные по одному URL сохраняют приоритет пакета
+    priority = (self.request.delivery_info or {}).get("priority")
+
+    def _reschedule(item: dict, countdown: float, attempt: int = 0, reserved: bool = False) -> None:
+        parse_url_task.apply_async(
+            args=[item["url"], "http"],
+            kwargs={
+                "max_age": item.get("max_age"),
+                "spec": item.get("spec"),
+                "attempt": attempt,
+                "reserved": reserved,
+            },
+            task_id=item["task_id"],
+            countdown=countdown,
+            priority=priority,
+        )
+
+    # Готовые результаты для всех URL с max_age - одним запросом в БД
+    fresh = [item for item in items if item.get("max_age") is not None]
+    cached_results = dict(zip(
+        (item["task_id"] for item in fresh),
+        container.result_cache().get_many(
+            [(item["url"], "http", item["max_age"], item.get("spec")) for item in fresh]
+        ) if fresh else [],
+    ))
+
+    started: list[dict] = []
+    groups: dict[str | None, tuple] = {}
+    rescheduled: set[str] = set()
+    retries: list[tuple[dict, float]] = []
+    for item in items:
+        url, spec = item["url"], item.get("spec")
+        if item.get("max_age") is not None:
+            cached = cached_results[item["task_id"]]
+            if cached is not None:
+                started.append({
+                    "id": item["task_id"],
+                    "status": "done",
+                    "result": cached,
+                    "completed_at": datetime.utcnow(),
+                    "cache_hit": True,
+                })
+                continue
+
+        if settings.RATE_LIMIT_ENABLED:
+            reservation = container.rate_limiter().acquire(route_key(url))
+            if not reservation.allowed:
+                _reschedule(item, _deferral_countdown(reservation), reserved=reservation.reserved)
+                rescheduled.add(item["task_id"])
+                continue
+
+        try:
+            extraction_spec = container.spec_registry().resolve(url, spec)
+        except ValueError as e:
+            started.append({
+                "id": item["task_id"],
+                "status": "error",
+                "result": {"error": str(e)},
+                "completed_at": datetime.utcnow(),
+            })
+            continue
+        started.append({"id": item["task_id"], "status": "processing"})
+        name = extraction_spec.name if extraction_spec else None
+        groups.setdefault(name, (extraction_spec, []))[1].append(item)
+
+    task_repository.update_status_many(started)
+
+    finished: list[dict] = []
+    try:
+        for extraction_spec, group in groups.values():
+            results = _create_parser_service(extraction_spec).parse_many(
+                [item["url"] for item in group], "http"
+            )
+            for item, result in zip(group, results):
+                if not isinstance(result, Exception):
+                    finished.append({
+                        "id": item["task_id"],
+                        "status": "done",
+                        "result": result,
+                        "completed_at": datetime.utcnow(),
+                    })
+                    container.result_cache().put(item["url"], "http", result, spec=item.get("spec"))
+                    continue
+
+                _penalize_domain(item["url"], result)
+                if retry_policy.should_retry(result, 0):
+                    countdown = retry_policy.delay(0, getattr(result, "retry_after", None))
+                    # Как mark_retry, но в общем UPDATE пакета
+                    finished.append({
+                        "id": item["task_id"],
+                        "status": "retrying",
+                        "attempts": 1,
+                        "next_retry_at": datetime.utcnow() + timedelta(seconds=countdown),
+                        "error_message": str(result),
+                    })
+                    retries.append((item, countdown))
+                    rescheduled.add(item["task_id"])
+                    continue
+
+                finished.append({
+                    "id": item["task_id"],
+                    "status": "error",
+                    "result": {"error": str(result)},
+                    "completed_at": datetime.utcnow(),
+                })
+    except Exception as e:
+        # Сбой всего пакета: не оставляем задачи в processing
+        done = {row["id"] for row in finished} | rescheduled
+        finished.extend(
+            {"id": item["task_id"], "status": "error", "result": {"error": str(e)}, "completed_at": datetime.utcnow()}
+            for _, group in groups.values()
+            for item in group
+            if item["task_id"] not in done
+        )
+        raise
+    finally:
+        task_repository.update_status_many(finished)
+        # Повтор публикуется после записи retrying: иначе он мог бы начаться
+        # раньше и получить поверх своего processing статус пакета
+        for item, countdown in retries:
+            _reschedule(item, countdown, attempt=1)
+
+    summary = {
+        "done": sum(1 for row in started + finished if row["status"] == "done"),
+        "error": sum(1 for row in started + finished if row["status"] == "error"),
+        "rescheduled": len(rescheduled),
+    }
+    logger.info(f"BATCH: {len(items)} URL: {summary}")
+    return summary
+
+
+@task_received.connect
+def _mark_reserved(request=None, **kwargs):
+    # Отложенные через countdown/eta до своего срока слота не ждут - в глубину не входят
+    if request.name not in (parse_url_task.name, parse_batch_task.name) or request.eta:
+        return
+    delivery_info = request.delivery_info or {}
+    queue = delivery_info.get("routing_key")
+    if queue:
+        container.queue_monitor().task_reserved(
+            queue, priority_name(delivery_info.get("priority")), request.id
+        )
+
+
+@task_prerun.connect(sender=parse_batch_task)
+@task_prerun.connect(sender=parse_url_task)
+def _mark_started(task=None, **kwargs):
+    if task.request.eta:
+        return
+    delivery_info = task.request.delivery_info or {}
+    queue = delivery_info.get("routing_key")
+    if queue:
+        container.queue_monitor().task_started(
+            queue, priority_name(delivery_info.get("priority")), task.request.id
+        )
+
+
+@task_postrun.connect(sender=parse_batch_task)
+@task_postrun.connect(sender=parse_url_task)
+def _guard_low_priorities(task=None, **kwargs):
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if queue:
+        container.starvation_guard().task_done(queue)
+
+
+@task_postrun.connect(sender=parse_batch_task)
+@task_postrun.connect(sender=parse_url_task)
+def _record_drain(task=None, state=None, **kwargs):
+    # Перезапуск возвращает задачу в очередь - это не разбор
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if queue and state != "RETRY":
+        container.queue_monitor().record_drain(queue)
+
+
+@task_postrun.connect(sender=parse_url_task)
+def _publish_selenium_stats(task=None, **kwargs):
+    # Балансировщик живёт в дочернем процессе - наружу счётчики попадают через Redis
+    stats = get_selenium_stats()
+    if stats:
+        container.selenium_stats().publish(f"{task.request.hostname}:{os.getpid()}", stats)
+
+
+_transport_stats_published_at: float | None = None
+
+
+@task_postrun.connect(sender=parse_batch_task)
+@task_postrun.connect(sender=parse_url_task)
+def _publish_transport_stats(task=None, **kwargs):
+    # HTTP-задач много - пишем в Redis не после каждой, а раз в HTTP_STATS_INTERVAL
+    global _transport_stats_published_at
+    now = time.monotonic()
+    if (
+        _transport_stats_published_at is not None
+        and now - _transport_stats_published_at < settings.HTTP_STATS_INTERVAL
+    ):
+        return
+    stats = get_transport().get_stats()
+    if stats["requests"]:
+        _transport_stats_published_at = now
+        container.transport_stats().publish(f"{task.request.hostname}:{os.getpid()}", stats)
@@ -1,24 +1,40 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from dependency_injector import providers
 
 from src.main import app
 from src.db.models import Base
+from src.repositories.async_task_repository import AsyncTaskRepository
 from src.repositories.task_repository import TaskRepository
+from src.services.task_events import TaskEventHub
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Файл, а не :memory: - синхронный и асинхронный движки должны видеть одну базу
+SQLALCHEMY_DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{SQLALCHEMY_DATABASE_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool 
+    poolclass=NullPool,
 )
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Без пула: у каждого TestClient и asyncio.run свой цикл событий
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{SQLALCHEMY_DATABASE_PATH}",
+    poolclass=NullPool,
+)
+
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 @pytest.fixture(scope="function")
 def db_session():
     """
@@ -41,18 +57,34 @@ def repository(db_session):
 
     return TaskRepository(session_factory=lambda: db_session)
 
+@pytest.fixture(scope="function")
+def async_repository(db_session):
+    """
+    AsyncTaskRepository поверх той же тестовой базы, что и db_session.
+    """
+
+    return AsyncTaskRepository(session_factory=TestingAsyncSessionLocal)
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """
     Клиент для тестов API.
-    Подменяет провайдер task_repository, чтобы API использовало тестовую базу.
+    Подменяет провайдеры task_repository и async_task_repository,
+    чтобы API использовало тестовую базу, а события задач раздаются
+    внутри процесса (TaskEventHub.dispatch) вместо Redis.
     """
 
     test_repo_provider = providers.Factory(
         TaskRepository,
         session_factory=TestingSessionLocal
     )
+    test_async_repo_provider = providers.Factory(
+        AsyncTaskRepository,
+        session_factory=TestingAsyncSessionLocal
+    )
 
-    with app.container.task_repository.override(test_repo_provider):
+    with app.container.task_repository.override(test_repo_provider), \
+         app.container.async_task_repository.override(test_async_repo_provider), \
+         app.container.task_event_hub.override(providers.Singleton(TaskEventHub)):
         with TestClient(app) as c:
             yield c
\ No newline at end of file
@@ -47,4 +47,373 @@ def test_get_task_status_success(client, db_session):
     data = response.json()
     assert data["id"] == task_id
     assert data["status"] == "done"
-    assert data["result"] == {"data": "ok"}
\ No newline at end of file
+    assert data["result"] == {"data": "ok"}
+    assert data["attempts"] == 0
+    assert data["next_retry_at"] is None
+
+def test_create_batch_tasks(client, db_session):
+    from src.db.models import ScrapingTask
+    from src.worker.tasks import parse_url_task
+
+    urls = [f"https://example.com/{i}" for i in range(5)]
+
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery, \
+         patch.object(parse_url_task.app, "producer_or_acquire"):
+        response = client.post("/parse/batch", json={"urls": urls, "method": "http"})
+
+    assert response.status_code == 200
+    task_ids = response.json()["task_ids"]
+    assert len(task_ids) == 5
+
+    published = [(c[1]["task_id"], c[1]["args"][0]) for c in mock_celery.call_args_list]
+    assert published == list(zip(task_ids, urls))
+
+    rows = {t.id: t.url for t in db_session.query(ScrapingTask).all()}
+    assert [rows[task_id] for task_id in task_ids] == urls
+
+def test_create_batch_tasks_ndjson(client):
+    from src.worker.tasks import parse_url_task
+
+    body = "\n".join([
+        '{"url": "https://a.com", "method": "http"}',
+        '{"url": "not a url"}',
+        '',
+        '{"url": "https://b.com", "method": "selenium"}',
+    ])
+
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery, \
+         patch.object(parse_url_task.app, "producer_or_acquire"):
+        response = client.post(
+            "/parse/batch",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["task_ids"][0] is not None
+    assert data["task_ids"][1] is None
+    assert data["task_ids"][2] is not None
+    assert data["errors"][0]["line"] == 2
+
+    assert [c[1]["args"] for c in mock_celery.call_args_list] == [
+        ["https://a.com/", "http"],
+        ["https://b.com/", "selenium"],
+    ]
+
+def test_duplicate_parse_task_is_coalesced(client, db_session):
+    from src.db.models import ScrapingTask
+
+    payload = {"url": "https://python.org", "method": "http"}
+
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery:
+        first = client.post("/parse", json=payload).json()["task_id"]
+        second = client.post("/parse", json={"url": "https://PYTHON.org/", "method": "http"}).json()["task_id"]
+
+    assert first != second
+    mock_celery.assert_called_once()
+    assert db_session.query(ScrapingTask).filter_by(id=second).first().leader_id == first
+
+def test_unknown_extraction_spec(client):
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery:
+        response = client.post("/parse", json={"url": "https://python.org", "spec": "nope"})
+
+    assert response.status_code == 422
+    mock_celery.assert_not_called()
+
+def test_task_priority(client, db_session):
+    from src.core.priorities import celery_priority
+    from src.db.models import ScrapingTask
+    from src.worker.tasks import parse_url_task
+
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery, \
+         patch.object(parse_url_task.app, "producer_or_acquire"):
+        single = client.post("/parse", json={"url": "https://ui.com", "priority": "high"}).json()["task_id"]
+        batch = client.post("/parse/batch", json={"urls": ["https://bulk.com"]}).json()["task_ids"][0]
+        invalid = client.post("/parse", json={"url": "https://ui.com", "priority": "urgent"})
+
+    assert invalid.status_code == 422
+    assert [c[1]["priority"] for c in mock_celery.call_args_list] == [
+        celery_priority("high"),
+        celery_priority("low"),
+    ]
+    assert db_session.query(ScrapingTask).filter_by(id=single).first().priority == "high"
+    assert db_session.query(ScrapingTask).filter_by(id=batch).first().priority == "low"
+    assert client.get(f"/tasks/{single}").json()["priority"] == "high"
+
+def test_admission_control(client, db_session):
+    from unittest.mock import MagicMock
+    from src.db.models import ScrapingTask
+    from src.services.admission import Admission, QueueStats
+
+    monitor = MagicMock(max_wait=300.0)
+    monitor.admit.return_value = Admission(allowed=False, retry_after=42)
+    monitor.stats.return_value = QueueStats(
+        queue="q", depth={"high": 0, "normal": 100, "low": 500}, drain_rate=2.0
+    )
+
+    with client.app.container.queue_monitor.override(monitor), \
+         patch("src.worker.tasks.parse_url_task.apply_async") as mock_celery:
+        response = client.post("/parse", json={"url": "https://python.org", "priority": "low"})
+        batch = client.post("/parse/batch", json={"urls": ["https://a.com"]})
+        stats = client.get("/queue/stats").json()
+
+    assert response.status_code == batch.status_code == 429
+    assert response.headers["Retry-After"] == "42"
+    mock_celery.assert_not_called()
+    assert db_session.query(ScrapingTask).count() == 0
+
+    assert stats["max_wait"] == 300.0
+    assert {item["queue"] for item in stats["queues"]} == {"parse.http", "parse.browser"}
+    assert stats["queues"][0]["depth"] == 600
+    assert stats["queues"][0]["estimated_wait"] == 300.0
+
+def test_selenium_stats(client):
+    import json
+    from unittest.mock import MagicMock
+    from src.services.selenium_stats import SeleniumStatsStore
+
+    node = {"healthy": True, "active_sessions": 1, "failures": 0}
+    redis = MagicMock()
+    redis.scan_iter.return_value = [b"selenium:stats:browser@w1:42", b"selenium:stats:browser@w1:43"]
+    redis.mget.return_value = [json.dumps({"http://node-a:4444/wd/hub": node}), None]
+    store = SeleniumStatsStore(redis)
+
+    store.publish("browser@w1:42", {"http://node-a:4444/wd/hub": node})
+    assert redis.set.call_args.kwargs == {"ex": 300}
+
+    with client.app.container.selenium_stats.override(store):
+        response = client.get("/selenium/stats")
+
+    assert response.json() == {"workers": {"browser@w1:42": {"http://node-a:4444/wd/hub": node}}}
+
+def test_http_stats(client):
+    import json
+    from unittest.mock import MagicMock
+    from src.services.transport_stats import TransportStatsStore
+
+    stats = {"requests": 3, "connections": 1, "reused": 2, "dns": {"hits": 0, "misses": 1}}
+    redis = MagicMock()
+    redis.scan_iter.return_value = [b"http:stats:http@w1:42"]
+    redis.mget.return_value = [json.dumps(stats)]
+    store = TransportStatsStore(redis)
+
+    with client.app.container.transport_stats.override(store):
+        response = client.get("/http/stats")
+
+    redis.scan_iter.assert_called_once_with(match="http:stats:*", count=100)
+    assert response.json() == {"workers": {"http@w1:42": stats}}
+
+def test_batch_published_as_batch_tasks(async_repository):
+    import asyncio
+    from src.services.dispatcher import AsyncTaskDispatcher, Submission
+    from src.worker.tasks import parse_url_task
+
+    dispatcher = AsyncTaskDispatcher(async_repository, batch_task_size=2)
+    submissions = [Submission(url=f"https://example.com/{i}", priority="low") for i in range(3)]
+    submissions.append(Submission(url="https://spa.com", method="selenium"))
+
+    with patch("src.worker.tasks.parse_url_task.apply_async") as mock_single, \
+         patch("src.worker.tasks.parse_batch_task.apply_async") as mock_batch, \
+         patch.object(parse_url_task.app, "producer_or_acquire"):
+        task_ids = asyncio.run(dispatcher.asubmit_many(submissions))
+
+    batches = [c[1]["args"][0] for c in mock_batch.call_args_list]
+    assert [[item["task_id"] for item in batch] for batch in batches] == [task_ids[:2], [task_ids[2]]]
+    assert batches[0][0] == {
+        "task_id": task_ids[0], "url": "https://example.com/0", "max_age": None, "spec": None
+    }
+    mock_single.assert_called_once()
+    assert mock_single.call_args[1]["args"] == ["https://spa.com", "selenium"]
+
+def test_get_task_statuses(client, db_session):
+    from src.db.models import ScrapingTask
+    import uuid
+
+    done_id, pending_id, unknown_id = (str(uuid.uuid4()) for _ in range(3))
+    db_session.add_all([
+        ScrapingTask(id=done_id, url="http://a.com", status="done", result={"data": "ok"}),
+        ScrapingTask(id=pending_id, url="http://b.com"),
+    ])
+    db_session.commit()
+
+    response = client.get(f"/tasks?ids={pending_id},{done_id}&ids={unknown_id}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [task["id"] for task in data["tasks"]] == [pending_id, done_id]
+    assert data["tasks"][1]["result"] == {"data": "ok"}
+    assert "leader_id" not in data["tasks"][0]
+    assert data["not_found"] == [unknown_id]
+
+    assert client.get("/tasks?ids=not-a-uuid").status_code == 422
+    assert client.get("/tasks?ids=,").status_code == 422
+
+def test_get_task_status_long_poll(client, db_session):
+    import threading
+    import time
+    import uuid
+    from src.db.models import ScrapingTask
+
+    done_id, pending_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db_session.add_all([
+        ScrapingTask(id=done_id, url="http://a.com", status="done", result={"data": "ok"}),
+        ScrapingTask(id=pending_id, url="http://b.com"),
+    ])
+    db_session.commit()
+
+    started = time.monotonic()
+    assert client.get(f"/tasks/{done_id}?wait=5").json()["status"] == "done"
+    assert client.get(f"/tasks/{pending_id}?wait=0.2").json()["status"] == "pending"
+    assert time.monotonic() - started < 3
+
+    hub = client.app.container.task_event_hub()
+    responses = []
+    waiter = threading.Thread(
+        target=lambda: responses.append(client.get(f"/tasks/{pending_id}?wait=10"))
+    )
+    waiter.start()
+    for _ in range(200):
+        if pending_id in hub._subscribers:
+            break
+        time.sleep(0.01)
+
+    db_session.query(ScrapingTask).filter_by(id=pending_id).update(
+        {"status": "done", "result": {"data": "fresh"}}
+    )
+    db_session.commit()
+    hub.dispatch(pending_id, {"id": pending_id, "status": "done"})
+    waiter.join(timeout=5)
+
+    assert responses[0].json()["result"] == {"data": "fresh"}
+    assert pending_id not in hub._subscribers
+
+def test_stream_task_events(client, db_session):
+    import uuid
+    from src.db.models import ScrapingTask
+
+    done_id, unknown_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db_session.add(ScrapingTask(id=done_id, url="http://a.com", status="done"))
+    db_session.commit()
+
+    response = client.get(f"/tasks/events?ids={done_id},{unknown_id}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: status", "event: not_found"]
+    assert f'"id": "{done_id}"' in events[0][1]
+    assert client.get("/tasks/events?ids=bad").status_code == 422
+
+def test_follower_leader_finishes_before_subscribe(client, db_session):
+    import time
+    import uuid
+    from unittest.mock import patch
+    from src.db.models import ScrapingTask
+    from src.repositories.async_task_repository import AsyncTaskRepository
+
+    leader_id = str(uuid.uuid4())
+    follower_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    db_session.add(ScrapingTask(id=leader_id, url="http://a.com", status="processing"))
+    db_session.add_all(
+        ScrapingTask(id=follower_id, url="http://a.com", status="processing", leader_id=leader_id)
+        for follower_id in follower_ids
+    )
+    db_session.commit()
+
+    get_statuses = AsyncTaskRepository.get_statuses
+    reads = []
+
+    async def leader_finishes_after_first_read(self, task_ids):
+        views = await get_statuses(self, task_ids)
+        if not reads:
+            # Ведущая завершается между чтением статуса и подпиской на неё; события нет
+            db_session.query(ScrapingTask).filter(
+                ScrapingTask.id.in_([leader_id, *follower_ids])
+            ).update({"status": "done"}, synchronize_session=False)
+            db_session.commit()
+        reads.append(task_ids)
+        return views
+
+    with patch.object(AsyncTaskRepository, "get_statuses", leader_finishes_after_first_read):
+        started = time.monotonic()
+        assert client.get(f"/tasks/{follower_ids[0]}?wait=10").json()["status"] == "done"
+
+        reads.clear()
+        db_session.query(ScrapingTask).filter(ScrapingTask.id.in_(follower_ids)).update(
+            {"status": "processing"}, synchronize_session=False
+        )
+        db_session.query(ScrapingTask).filter_by(id=leader_id).update({"status": "processing"})
+        db_session.commit()
+        response = client.get(f"/tasks/events?ids={follower_ids[1]}")
+        assert time.monotonic() - started < 5
+
+    statuses = [line for line in response.text.split("\n") if line.startswith("data:")]
+    assert ['"status": "processing"' in statuses[0], '"status": "done"' in statuses[1]] == [True, True]
+
+def test_stream_rereads_without_events(client, db_session):
+    import threading
+    import time
+    import uuid
+    from unittest.mock import patch
+    from src.core.container import Container
+    from src.db.models import ScrapingTask
+
+    task_id = str(uuid.uuid4())
+    db_session.add(ScrapingTask(id=task_id, url="http://a.com", status="processing"))
+    db_session.commit()
+
+    # События не публикуются (Redis pub/sub недоступен): статус приходит при перечитывании
+    finish = threading.Timer(0.3, lambda: (
+        db_session.query(ScrapingTask).filter_by(id=task_id).update({"status": "done"}),
+        db_session.commit(),
+    ))
+    with patch.object(Container.settings, "TASK_EVENTS_HEARTBEAT", 0.1):
+        finish.start()
+        response = client.get(f"/tasks/events?ids={task_id}")
+        finish.join()
+
+    assert ": keep-alive" in response.text
+    assert response.text.count("event: status") == 2
+    assert '"status": "done"' in response.text
+
+def test_list_tasks_keyset(client, db_session):
+    from datetime import datetime, timedelta
+    from src.db.models import ScrapingTask
+
+    start = datetime(2024, 1, 1)
+    db_session.add_all([
+        ScrapingTask(
+            id=f"00000000-0000-0000-0000-{i:012d}",
+            url=f"https://{'shop' if i % 2 else 'blog'}.com/{i}",
+            domain="shop.com" if i % 2 else "blog.com",
+            status="done" if i < 6 else "pending",
+            # У 4 и 5 одинаковое время - порядок внутри определяет id
+            created_at=start + timedelta(minutes=min(i, 4)),
+        )
+        for i in range(8)
+    ])
+    db_session.commit()
+
+    pages, cursor = [], None
+    while True:
+        response = client.get("/tasks", params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([task["id"][-1] for task in data["tasks"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [["7", "6", "5"], ["4", "3", "2"], ["1", "0"]]
+
+    data = client.get("/tasks?status=done&domain=SHOP.com").json()
+    assert [task["id"][-1] for task in data["tasks"]] == ["5", "3", "1"]
+    assert "result" not in data["tasks"][0]
+
+    data = client.get("/tasks", params={
+        "created_after": "2024-01-01T00:01:00Z", "created_before": "2024-01-01T00:04:00+00:00",
+    }).json()
+    assert [task["id"][-1] for task in data["tasks"]] == ["3", "2", "1"]
+
+    assert client.get("/tasks?status=lost").status_code == 422
+    assert client.get("/tasks?cursor=garbage").status_code == 422
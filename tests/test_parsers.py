@@ -1,11 +1,22 @@
 """Тесты для модуля парсеров."""
 
+import socket
 from unittest.mock import MagicMock, Mock, patch
 
+import httpx
 import pytest
 import requests
 
-from src.parsers import HttpParser, NetworkError, ParsingError, SeleniumParser
+from src.parsers import (
+    AsyncHttpParser,
+    HttpParser,
+    NetworkError,
+    ParsingError,
+    SeleniumParser,
+)
+from src.parsers.driver_pool import DriverPool
+from src.parsers.selenium_nodes import SeleniumBalancer
+from src.parsers.transport import DnsCache, HttpTransport
 
 
 class TestHttpParser:
@@ -15,7 +26,7 @@ class TestHttpParser:
         """HttpParser возвращает dict при валидном HTML."""
         html = "<html><head><title>Test Page</title></head><body></body></html>"
 
-        with patch("src.parsers.http.requests.get") as mock_get:
+        with patch("src.parsers.transport.HttpTransport.get") as mock_get:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.text = html
@@ -34,7 +45,7 @@ class TestHttpParser:
         """ParsingError если нет тега title."""
         html = "<html><head></head><body></body></html>"
 
-        with patch("src.parsers.http.requests.get") as mock_get:
+        with patch("src.parsers.transport.HttpTransport.get") as mock_get:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.text = html
@@ -50,7 +61,7 @@ class TestHttpParser:
 
     def test_retry_on_network_error(self):
         """При сетевой ошибке делается несколько попыток."""
-        with patch("src.parsers.http.requests.get") as mock_get:
+        with patch("src.parsers.transport.HttpTransport.get") as mock_get:
             mock_get.side_effect = requests.exceptions.ConnectionError("Network error")
 
             parser = HttpParser(max_retries=3, retry_delay=0)
@@ -62,7 +73,7 @@ class TestHttpParser:
 
     def test_retry_on_500_error(self):
         """При 500 ошибке делается несколько попыток."""
-        with patch("src.parsers.http.requests.get") as mock_get:
+        with patch("src.parsers.transport.HttpTransport.get") as mock_get:
             mock_response = Mock()
             mock_response.status_code = 500
             mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -78,6 +89,668 @@ class TestHttpParser:
             assert exc_info.value.status_code == 500
             assert mock_get.call_count == 3
 
+    def test_429_status_and_retry_after(self):
+        """У NetworkError есть код ответа и Retry-After (Response с ошибкой ложен в bool)."""
+        import io
+
+        response = requests.Response()
+        response.status_code = 429
+        response.raw = io.BytesIO(b"")
+        response.headers["Retry-After"] = "7"
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response):
+            with pytest.raises(NetworkError) as exc_info:
+                HttpParser(max_retries=1, retry_delay=0).parse("https://example.com")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after == 7.0
+
+    def test_revalidation_not_modified(self):
+        """Повторный запрос условный, на 304 возвращается сохранённый результат."""
+        from src.parsers.revalidation import ValidatorStore
+
+        class MemoryStore(ValidatorStore):
+            def __init__(self):
+                self.pages = {}
+
+            def get(self, url):
+                return self.pages.get(url)
+
+            def save(self, url, page):
+                self.pages[url] = page
+
+        first = Mock(status_code=200, text="<title>Fresh</title>", headers={"ETag": '"v1"'})
+        not_modified = Mock(status_code=304, text="", headers={})
+        store = MemoryStore()
+
+        with patch("src.parsers.transport.HttpTransport.get") as mock_get:
+            mock_get.side_effect = [first, not_modified]
+            parser = HttpParser(validator_store=store)
+
+            assert parser.parse("https://example.com")["title"] == "Fresh"
+            assert store.pages["https://example.com"].etag == '"v1"'
+
+            result = parser.parse("https://example.com")
+
+        assert result["title"] == "Fresh"
+        assert mock_get.call_args_list[0].kwargs["headers"] is None
+        assert mock_get.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+class TestHtmlBackends:
+    """Бэкенды разбора HTML дают одинаковый результат."""
+
+    HTML = (
+        "<html><head><title>  Example &amp; Co  </title></head><body>"
+        '<p class="item"> one </p><p class="item">t<i>w</i>o</p>'
+        '<a href="/x">x</a><a>no href</a></body></html>'
+    )
+
+    @pytest.fixture(params=["html.parser", "lxml", "selectolax"])
+    def backend(self, request):
+        from src.parsers.html_backends import get_html_backend
+
+        try:
+            return get_html_backend(request.param)
+        except ImportError:
+            pytest.skip(f"{request.param} не установлен")
+
+    def test_extract_matches_reference(self, backend):
+        """HttpParser.extract() не зависит от бэкенда."""
+        expected = HttpParser().extract("https://example.com", self.HTML)
+
+        assert HttpParser(html_backend=backend).extract("https://example.com", self.HTML) == expected
+        with pytest.raises(ParsingError):
+            HttpParser(html_backend=backend).extract("https://example.com", "<html></html>")
+
+    def test_selectors(self, backend):
+        """CSS-селекторы для переопределённых extract()."""
+        document = backend.parse(self.HTML)
+
+        assert document.select_text("p.item") == ["one", "two"]
+        assert document.select_attr("a", "href") == ["/x"]
+
+    def test_unknown_backend(self):
+        """Неизвестное имя бэкенда - ValueError."""
+        with pytest.raises(ValueError):
+            HttpParser(html_backend="regex")
+
+
+class TestExtractionSpecs:
+    """Тесты декларативных спецификаций извлечения."""
+
+    HTML = (
+        "<html><head><title>Shop</title></head><body>"
+        '<h1 class="name"> Widget </h1><span class="price">9.99</span>'
+        '<ul><li><a href="/a">A</a></li><li><a href="/b">B</a></li></ul>'
+        "</body></html>"
+    )
+
+    @pytest.fixture
+    def registry(self):
+        from src.parsers.specs import ExtractionSpec, SpecRegistry
+
+        return SpecRegistry([ExtractionSpec.from_dict({
+            "name": "shop",
+            "match": ["*.shop.com", "https://example.com/items/*"],
+            "fields": [
+                {"name": "name", "css": "h1.name", "required": True},
+                {"name": "price", "xpath": "//span[@class='price']/text()"},
+                {"name": "links", "css": "ul a", "attr": "href", "many": True},
+                {"name": "missing", "css": ".nope"},
+            ],
+        })])
+
+    def test_extract(self, registry):
+        """Все поля извлекаются из одного разобранного документа."""
+        result = registry.get("shop").extract("https://www.shop.com/1", self.HTML)
+
+        assert result == {
+            "url": "https://www.shop.com/1",
+            "title": "Shop",
+            "success": True,
+            "spec": "shop",
+            "data": {"name": "Widget", "price": "9.99", "links": ["/a", "/b"], "missing": None},
+        }
+
+    def test_required_field(self, registry):
+        """Обязательное поле не найдено - ParsingError."""
+        with pytest.raises(ParsingError):
+            registry.get("shop").extract("https://www.shop.com/1", "<html><title>x</title></html>")
+
+    def test_resolve(self, registry):
+        """Выбор по имени, по домену и по шаблону URL."""
+        assert registry.resolve("https://www.shop.com/1").name == "shop"
+        assert registry.resolve("https://example.com/items/42").name == "shop"
+        assert registry.resolve("https://example.com/about") is None
+        assert registry.resolve("https://example.com/about", "shop").name == "shop"
+        with pytest.raises(ValueError):
+            registry.resolve("https://example.com", "unknown")
+
+    def test_selectors_compiled_once(self):
+        """Одинаковые селекторы компилируются один раз на процесс."""
+        from src.parsers.specs import FieldRule
+
+        first = FieldRule(name="a", css="div.compiled-once > p")
+        second = FieldRule(name="b", css="div.compiled-once > p")
+
+        assert first.compiled is second.compiled
+        with pytest.raises(ValueError):
+            FieldRule(name="bad", css="div[")
+
+    def test_http_parser_uses_spec(self, registry):
+        """HttpParser со спецификацией возвращает поля вместо одного заголовка."""
+        response = Mock(status_code=200, text=self.HTML, headers={})
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response) as mock_get:
+            result = HttpParser(streaming=True, spec=registry.get("shop")).parse("https://www.shop.com/1")
+
+        assert result["data"]["name"] == "Widget"
+        # Спецификации нужен весь документ, поэтому без потокового режима
+        assert mock_get.call_args.kwargs["stream"] is False
+
+
+class TestAutoMethod:
+    """Тесты method="auto": HTTP сначала, Selenium при неудаче, маршрут по домену."""
+
+    SHELL = (
+        "<html><head><title>App</title><script src='/bundle.js'></script></head>"
+        '<body><div id="root"></div><noscript>Please enable JavaScript</noscript></body></html>'
+    )
+
+    def test_looks_like_js_shell(self):
+        """Пустая оболочка со скриптами - да, обычная статья - нет."""
+        from src.parsers.heuristics import looks_like_js_shell
+
+        article = "<html><body><script>track()</script><p>" + "text " * 100 + "</p></body></html>"
+
+        assert looks_like_js_shell(self.SHELL)
+        assert not looks_like_js_shell(article)
+        assert not looks_like_js_shell("<html><body><p>short</p></body></html>")
+
+    def _service(self, store):
+        from src.services.parser import ParserService
+
+        service = ParserService(routing_store=store)
+        service._parse_selenium = Mock(return_value={"url": "u", "title": "Rendered", "success": True})
+        return service
+
+    def test_escalates_and_remembers_selenium(self):
+        """JS-оболочка по HTTP -> Selenium, следующий запрос сразу в Selenium."""
+        from src.services.routing import MemoryRoutingStore
+
+        store = MemoryRoutingStore()
+        service = self._service(store)
+        response = Mock(status_code=200, text=self.SHELL, headers={})
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response) as mock_get:
+            first = service.parse("https://spa.example.com/a", "auto")
+            second = service.parse("https://SPA.example.com/b", "auto")
+
+        assert first["method"] == second["method"] == "selenium"
+        assert store.get("spa.example.com") == "selenium"
+        assert mock_get.call_count == 1
+        assert service._parse_selenium.call_count == 2
+
+    def test_http_route_is_remembered(self):
+        """Удачный HTTP запоминается, Selenium не вызывается."""
+        from src.services.routing import MemoryRoutingStore
+
+        store = MemoryRoutingStore()
+        service = self._service(store)
+        html = "<html><head><title>Static</title></head><body><p>" + "text " * 100 + "</p></body></html>"
+        response = Mock(status_code=200, text=html, headers={})
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response):
+            result = service.parse("https://static.example.com", "auto")
+
+        assert result["title"] == "Static"
+        assert result["method"] == "http"
+        assert store.get("static.example.com") == "http"
+        service._parse_selenium.assert_not_called()
+
+    def test_without_browser_fallback(self):
+        """Процесс без браузера не эскалирует в Selenium, а сообщает, что нужен браузер."""
+        from src.parsers.exceptions import BrowserRequiredError
+        from src.services.parser import ParserService
+        from src.services.routing import MemoryRoutingStore
+
+        store = MemoryRoutingStore()
+        service = ParserService(routing_store=store, browser_fallback=False)
+        service._parse_selenium = Mock()
+        response = Mock(status_code=200, text=self.SHELL, headers={})
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response):
+            with pytest.raises(BrowserRequiredError):
+                service.parse("https://spa.example.com/a", "auto")
+
+        store.set("known.example.com", "selenium")
+        with pytest.raises(BrowserRequiredError):
+            service.parse("https://known.example.com/", "auto")
+
+        service._parse_selenium.assert_not_called()
+        assert store.get("spa.example.com") is None
+
+    def test_redis_store_errors_are_ignored(self):
+        """Недоступный Redis не роняет парсинг."""
+        from redis import RedisError
+        from src.services.routing import RedisRoutingStore
+
+        redis = MagicMock()
+        redis.get.side_effect = RedisError("down")
+        redis.set.side_effect = RedisError("down")
+        store = RedisRoutingStore(redis, ttl=60)
+
+        assert store.get("example.com") is None
+        store.set("example.com", "http")
+
+        redis.get.side_effect = None
+        redis.get.return_value = b"selenium"
+        assert store.get("example.com") == "selenium"
+
+
+class TestParseMany:
+    """Тесты пакетного парсинга в ParserService."""
+
+    def test_errors_do_not_stop_batch(self):
+        """Ошибка одного URL не прерывает пакет и возвращается исключением на его месте."""
+        import io
+
+        from src.services.parser import ParserService
+
+        def get(url, **kwargs):
+            if url.endswith("/missing"):
+                response = requests.Response()
+                response.status_code = 404
+                response.url = url
+                response.raw = io.BytesIO(b"")
+                return response
+            return Mock(status_code=200, text=f"<html><title>{url}</title></html>", headers={})
+
+        with patch("src.parsers.transport.HttpTransport.get", side_effect=get):
+            results = ParserService(http_max_retries=1).parse_many(
+                ["https://a.com/1", "https://a.com/missing", "https://b.com/2"]
+            )
+
+        assert results[0]["title"] == "https://a.com/1"
+        assert isinstance(results[1], NetworkError)
+        assert results[1].status_code == 404
+        assert results[2]["title"] == "https://b.com/2"
+
+        with pytest.raises(ValueError):
+            ParserService().parse_many(["https://a.com"], "selenium")
+
+    def test_async_engine_only_for_batches(self):
+        """HTTP_ENGINE=async включает httpx для пакетов, одиночный URL идёт через HttpParser."""
+        from src.services.parser import ParserService
+
+        service = ParserService(http_engine="async")
+
+        assert type(service._create_http_parser()) is HttpParser
+        assert isinstance(service._create_http_parser(batch=True), AsyncHttpParser)
+        with patch("src.parsers.transport.HttpTransport.get", return_value=Mock(
+            status_code=200, text="<html><title>One</title></html>", headers={}
+        )), patch.object(AsyncHttpParser, "parse") as async_parse:
+            assert service.parse("https://a.com/1", "http")["title"] == "One"
+        async_parse.assert_not_called()
+
+
+class TestDomainRateLimiter:
+    """Тесты лимита запросов к доменам."""
+
+    def _limiter(self, script_result=None, error=None, **kwargs):
+        from src.services.rate_limiter import DomainRateLimiter
+
+        script = MagicMock(return_value=script_result, side_effect=error)
+        redis = MagicMock()
+        redis.register_script.return_value = script
+        return DomainRateLimiter(redis, **kwargs), script
+
+    def test_rate_for_subdomains(self):
+        """Настройка домена действует на поддомены."""
+        limiter, _ = self._limiter(default_rate=2.0, domain_rates={"Example.com": 0.5})
+
+        assert limiter.rate_for("example.com") == 0.5
+        assert limiter.rate_for("www.example.com") == 0.5
+        assert limiter.rate_for("example.org") == 2.0
+
+    def test_acquire(self):
+        """Ответ скрипта превращается в Reservation."""
+        limiter, script = self._limiter(
+            script_result=[0, "1.5", 1], default_rate=2.0, burst=3, max_delay=60.0
+        )
+
+        reservation = limiter.acquire("example.com")
+
+        assert reservation.allowed is False
+        assert reservation.retry_after == 1.5
+        assert reservation.reserved is True
+        assert script.call_args.kwargs == {
+            "keys": ["ratelimit:example.com:bucket", "ratelimit:example.com:penalty"],
+            "args": [2.0, 3, 60.0],
+        }
+
+    def test_concurrent_acquires_reserve_spread_slots(self):
+        """
+        Отказ резервирует будущий слот: N одновременных acquire получают
+        ожидания с шагом 1/rate, а не одно и то же время. Дальше max_delay
+        слоты не резервируются, и долг корзины перестаёт расти.
+        """
+        state = {}
+
+        def bucket(keys, args, now=100.0):
+            # Арифметика _ACQUIRE_SCRIPT; Redis выполняет скрипт атомарно,
+            # поэтому одновременные вызовы идут строго друг за другом
+            rate, burst, max_delay = args
+            tokens, ts = state.get(keys[0], (burst, now))
+            tokens = min(burst, tokens + max(0, now - ts) * rate)
+            if tokens - 1 >= 0:
+                result = [1, "0", 1]
+            elif (1 - tokens) / rate > max_delay:
+                result = [0, str(max_delay), 0]
+            else:
+                result = [0, str((1 - tokens) / rate), 1]
+            if result[2]:
+                tokens -= 1
+            state[keys[0]] = (tokens, now)
+            return result
+
+        limiter, script = self._limiter(default_rate=2.0, burst=3, max_delay=3.0)
+        script.side_effect = bucket
+
+        reservations = [limiter.acquire("example.com") for _ in range(12)]
+
+        assert [r.allowed for r in reservations] == [True] * 3 + [False] * 9
+        assert [r.reserved for r in reservations] == [True] * 9 + [False] * 3
+        waits = [r.retry_after for r in reservations[3:]]
+        assert waits == [0.5 * i for i in range(1, 7)] + [3.0] * 3
+
+    def test_redis_down_allows(self):
+        """Без Redis лимит не применяется, а не блокирует парсинг."""
+        from redis import RedisError
+
+        limiter, _ = self._limiter(error=RedisError("down"))
+
+        assert limiter.acquire("example.com").allowed is True
+        assert limiter.penalize("example.com", 30) is None
+
+
+class TestStreamingExtraction:
+    """Тесты потокового извлечения в HttpParser."""
+
+    @staticmethod
+    def _response(chunks, content_type="text/html"):
+        consumed = []
+
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        response = Mock(status_code=200, headers={"Content-Type": content_type})
+        response.iter_content = iter_content
+        return response, consumed
+
+    def test_detect_encoding(self):
+        """Кодировка: BOM, затем заголовок, затем meta в начале документа."""
+        from src.parsers.streaming import detect_encoding
+
+        assert detect_encoding("text/html; charset=windows-1251", b"") == "cp1251"
+        assert detect_encoding("text/html", b'<meta charset="koi8-r">') == "koi8-r"
+        assert detect_encoding(
+            "text/html",
+            b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1251">',
+        ) == "cp1251"
+        assert detect_encoding("text/html; charset=bogus", b"") == "utf-8"
+        assert detect_encoding("text/html; charset=cp1251", b"\xef\xbb\xbf<html>") == "utf-8-sig"
+
+    def test_stops_after_title(self):
+        """После </title> остаток тела не читается."""
+        chunks = [b"<html><head><ti", b"tle>Early &amp; fast</title>", b"<body>" + b"x" * 1000, b"</body>"]
+        response, consumed = self._response(chunks)
+
+        result = HttpParser().extract_stream("https://example.com", response)
+
+        assert result == {"url": "https://example.com", "title": "Early & fast", "success": True}
+        assert len(consumed) < len(chunks)
+
+    def test_meta_charset(self):
+        """Кодировка из meta применяется без анализа всего тела."""
+        html = '<html><head><meta charset="windows-1251"><title>Привет</title></head></html>'
+        response, _ = self._response([html.encode("cp1251")])
+
+        assert HttpParser().extract_stream("https://example.com", response)["title"] == "Привет"
+
+    def test_no_title_raises_parsing_error(self):
+        """Без <title> поведение как у extract()."""
+        response, _ = self._response([b"<html><body>no title</body></html>"])
+
+        with pytest.raises(ParsingError):
+            HttpParser().extract_stream("https://example.com", response)
+
+    def test_parse_streaming(self):
+        """parse() в потоковом режиме открывает ответ с stream=True и закрывает его."""
+        response, _ = self._response([b"<title>Streamed</title>"])
+
+        with patch("src.parsers.transport.HttpTransport.get", return_value=response) as mock_get:
+            result = HttpParser(streaming=True).parse("https://example.com")
+
+        assert result["title"] == "Streamed"
+        assert mock_get.call_args.kwargs["stream"] is True
+        response.close.assert_called_once()
+
+
+class TestHttpTransport:
+    """Тесты для общего HTTP-транспорта."""
+
+    @pytest.fixture
+    def server_url(self):
+        """Локальный HTTP/1.1 сервер с keep-alive."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                body = b"<html><head><title>Local</title></head></html>"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://localhost:{server.server_port}"
+        server.shutdown()
+        server.server_close()
+
+    def test_connections_are_reused(self, server_url):
+        """Повторные запросы к хосту идут по одному keep-alive соединению."""
+        transport = HttpTransport()
+        parser = HttpParser(transport=transport)
+
+        for _ in range(3):
+            assert parser.parse(f"{server_url}/page")["title"] == "Local"
+
+        stats = transport.get_stats()
+        assert stats["hosts"]["localhost"] == {"requests": 3, "connections": 1, "reused": 2}
+        assert stats["dns"] == {"hits": 0, "misses": 1}
+
+    def test_dns_cache_ttl(self):
+        """DNS-запрос повторяется только после истечения TTL."""
+        addrinfo = [(2, 1, 6, "", ("10.0.0.1", 80))]
+
+        with patch("src.parsers.transport.socket.getaddrinfo", return_value=addrinfo) as mock_gai, \
+             patch("src.parsers.transport.time.monotonic", side_effect=[0, 10, 400]):
+            cache = DnsCache(ttl=300)
+
+            assert cache.resolve("example.com", 80) == ["10.0.0.1"]
+            assert cache.resolve("example.com", 80) == ["10.0.0.1"]
+            assert mock_gai.call_count == 1
+
+            cache.resolve("example.com", 80)
+            assert mock_gai.call_count == 2
+            assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_dead_address_is_skipped_and_demoted(self, server_url):
+        """Закэшированный адрес отказывает в соединении - запрос идёт на следующий, мёртвый уходит в конец."""
+        port = int(server_url.rsplit(":", 1)[1])
+        # 127.0.0.2 тоже loopback, но сервер слушает только 127.0.0.1
+        addrinfo = [(2, 1, 6, "", ("127.0.0.2", port)), (2, 1, 6, "", ("127.0.0.1", port))]
+        real_getaddrinfo = socket.getaddrinfo
+        transport = HttpTransport()
+        parser = HttpParser(transport=transport, max_retries=1)
+
+        # urllib3 резолвит уже подставленный IP тем же getaddrinfo - его не подменяем
+        def getaddrinfo(host, *args):
+            return addrinfo if host == "localhost" else real_getaddrinfo(host, *args)
+
+        with patch("src.parsers.transport.socket.getaddrinfo", side_effect=getaddrinfo):
+            assert parser.parse(f"{server_url}/page")["title"] == "Local"
+
+            assert transport.dns_cache.resolve("localhost", port) == ["127.0.0.1", "127.0.0.2"]
+
+    def test_per_host_pool_size(self):
+        """Размер пула задаётся отдельно для хоста."""
+        transport = HttpTransport(pool_maxsize=10, host_pool_sizes={"big.example.com": 50})
+        poolmanager = transport.session.get_adapter("https://").poolmanager
+
+        big = poolmanager.connection_from_host("big.example.com", 443, scheme="https")
+        other = poolmanager.connection_from_host("other.example.com", 443, scheme="https")
+
+        assert big.pool.maxsize == 50
+        assert other.pool.maxsize == 10
+
+
+class TestAsyncHttpParser:
+    """Тесты для AsyncHttpParser."""
+
+    def test_parse_success(self):
+        """AsyncHttpParser возвращает тот же dict, что и HttpParser."""
+        html = "<html><head><title>Async Page</title></head><body></body></html>"
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text=html))
+
+        parser = AsyncHttpParser(async_transport=transport)
+        result = parser.parse("https://example.com")
+
+        assert result == {"url": "https://example.com", "title": "Async Page", "success": True}
+
+    def test_retry_on_500_error(self):
+        """При 500 ошибке делается несколько попыток, затем NetworkError."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+
+        parser = AsyncHttpParser(max_retries=3, retry_delay=0, async_transport=httpx.MockTransport(handler))
+
+        with pytest.raises(NetworkError) as exc_info:
+            parser.parse("https://example.com")
+
+        assert exc_info.value.status_code == 500
+        assert len(calls) == 3
+
+    def test_parse_many_keeps_order_and_errors(self):
+        """parse_many возвращает результаты по порядку, ошибки не прерывают пакет."""
+
+        def handler(request):
+            if request.url.host == "broken.com":
+                return httpx.Response(200, text="<html></html>")
+            return httpx.Response(200, text=f"<title>{request.url.host}</title>")
+
+        parser = AsyncHttpParser(max_retries=1, async_transport=httpx.MockTransport(handler))
+        urls = ["https://a.com", "https://broken.com", "https://b.com"]
+
+        results = parser.parse_many(urls)
+
+        assert [r["url"] for r in results] == urls
+        assert results[0]["title"] == "a.com"
+        assert results[1]["success"] is False
+        assert "title" in results[1]["error"].lower()
+        assert results[2]["title"] == "b.com"
+
+    def test_per_host_concurrency_limit(self):
+        """К одному хосту одновременно уходит не больше per_host_concurrency запросов."""
+        import asyncio
+
+        active = 0
+        peak = 0
+
+        class SlowTransport(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                return httpx.Response(200, text="<title>ok</title>")
+
+        parser = AsyncHttpParser(per_host_concurrency=2, async_transport=SlowTransport())
+        parser.parse_many([f"https://example.com/{i}" for i in range(10)])
+
+        assert peak == 2
+
+    def test_parse_many_concurrent_under_gevent(self):
+        """Два пакета из разных green-потоков gevent выполняются одновременно, а не падают на asyncio.run."""
+        import json
+        import os
+        import subprocess
+        import sys
+        import textwrap
+
+        # monkey-patching необратим - проверяем в отдельном процессе, как в воркере -P gevent
+        script = textwrap.dedent("""
+            from gevent import monkey
+            monkey.patch_all()
+
+            # Как в воркере: celery -A импортирует приложение раньше задач и httpx
+            import src.worker.celery_app
+
+            import asyncio
+            import json
+            import time
+
+            import gevent
+            import httpx
+
+            from src.parsers.async_http import AsyncHttpParser
+
+            class SlowTransport(httpx.AsyncBaseTransport):
+                async def handle_async_request(self, request):
+                    await asyncio.sleep(0.2)
+                    return httpx.Response(200, text=f"<title>{request.url.host}</title>")
+
+            parser = AsyncHttpParser(max_retries=1, async_transport=SlowTransport())
+            started = time.monotonic()
+            jobs = [
+                gevent.spawn(parser.parse_many, [f"https://b{i}-{j}.com" for j in range(3)])
+                for i in range(2)
+            ]
+            gevent.joinall(jobs, raise_error=True)
+            print(json.dumps({
+                "titles": [[r["title"] for r in job.value] for job in jobs],
+                "elapsed": time.monotonic() - started,
+            }))
+        """)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {**os.environ, "PYTHONPATH": root}
+
+        proc = subprocess.run(
+            [sys.executable, "-c", script], cwd=root, env=env, capture_output=True, text=True, timeout=60,
+        )
+
+        assert proc.returncode == 0, proc.stderr
+        output = json.loads(proc.stdout.strip().splitlines()[-1])
+        assert output["titles"] == [[f"b{i}-{j}.com" for j in range(3)] for i in range(2)]
+        # Последовательно было бы 0.4 с
+        assert output["elapsed"] < 0.35
+
 
 class TestSeleniumParser:
     """Тесты для SeleniumParser."""
@@ -132,3 +805,265 @@ class TestSeleniumParser:
 
             with pytest.raises(NetworkError):
                 parser.parse("https://example.com")
+
+    def test_parse_many_uses_tabs(self):
+        """parse_many открывает URL во вкладках и собирает результаты по мере загрузки."""
+        pages = {
+            "https://a.com": ["loading", "complete"],
+            "https://b.com": ["complete"],
+            "https://empty.com": ["complete"],
+        }
+
+        class FakeDriver:
+            def __init__(self):
+                self.tabs = {"home": None}
+                self.current_window_handle = "home"
+                self.switch_to = Mock()
+                self.switch_to.new_window.side_effect = self._new_window
+                self.switch_to.window.side_effect = self._switch
+                self.closed = []
+
+            def _new_window(self, kind):
+                handle = f"tab{len(self.tabs)}"
+                self.tabs[handle] = None
+                self.current_window_handle = handle
+
+            def _switch(self, handle):
+                self.current_window_handle = handle
+
+            def execute_script(self, script, *args):
+                if args:
+                    self.tabs[self.current_window_handle] = args[0]
+                    return None
+                url = self.tabs[self.current_window_handle]
+                states = pages[url]
+                return [states.pop(0) if len(states) > 1 else states[0], url]
+
+            @property
+            def title(self):
+                url = self.tabs[self.current_window_handle]
+                return "" if url == "https://empty.com" else url.split("//")[1]
+
+            def close(self):
+                self.closed.append(self.current_window_handle)
+
+        driver = FakeDriver()
+        parser = SeleniumParser()
+        parser._driver = driver
+
+        results = parser.parse_many(list(pages), max_tabs=2, poll_interval=0)
+
+        assert [r["url"] for r in results] == list(pages)
+        assert results[0]["title"] == "a.com"
+        assert results[1]["title"] == "b.com"
+        assert results[2]["success"] is False
+        assert sorted(driver.closed) == ["tab1", "tab2", "tab3"]
+        assert driver.current_window_handle == "home"
+
+
+class TestDriverPool:
+    """Тесты для пула сессий Selenium."""
+
+    @staticmethod
+    def _make_driver():
+        driver = MagicMock()
+        driver.window_handles = ["main"]
+        return driver
+
+    def test_session_is_reused(self):
+        """Сессия возвращается в пул и выдаётся повторно без нового подключения."""
+        factory = Mock(side_effect=self._make_driver)
+        pool = DriverPool(factory)
+
+        with pool.session() as first:
+            pass
+        with pool.session() as second:
+            pass
+
+        assert first is second
+        factory.assert_called_once()
+        first.quit.assert_not_called()
+
+    def test_reset_between_uses(self):
+        """При возврате закрываются лишние вкладки и чистятся cookies."""
+        driver = self._make_driver()
+        driver.window_handles = ["main", "extra"]
+        pool = DriverPool(Mock(return_value=driver))
+
+        with pool.session():
+            pass
+
+        driver.close.assert_called_once()
+        driver.switch_to.window.assert_called_with("main")
+        driver.execute.assert_called_once_with(
+            "executeCdpCommand", {"cmd": "Network.clearBrowserCookies", "params": {}}
+        )
+        driver.get.assert_called_with("about:blank")
+
+    def test_recycle_after_max_pages(self):
+        """Сессия пересоздаётся после max_pages страниц."""
+        factory = Mock(side_effect=self._make_driver)
+        pool = DriverPool(factory, max_pages=2)
+
+        first = pool.acquire()
+        pool.release(first, pages=2)
+        second = pool.acquire()
+
+        assert first is not second
+        first.quit.assert_called_once()
+        assert factory.call_count == 2
+
+    def test_dead_session_is_replaced(self):
+        """Сессия, не прошедшая health check, заменяется новой."""
+        from selenium.common.exceptions import WebDriverException
+
+        factory = Mock(side_effect=self._make_driver)
+        pool = DriverPool(factory)
+
+        first = pool.acquire()
+        pool.release(first)
+        first.execute_script.side_effect = WebDriverException("session deleted")
+        second = pool.acquire()
+
+        assert first is not second
+        assert pool.size == 1
+
+    def test_unreachable_session_does_not_leak_slot(self):
+        """Узел сессии недоступен (MaxRetryError) - сессия заменяется, место в пуле не теряется."""
+        from urllib3.exceptions import MaxRetryError
+
+        factory = Mock(side_effect=self._make_driver)
+        pool = DriverPool(factory, max_size=1, acquire_timeout=0.1)
+
+        first = pool.acquire()
+        pool.release(first)
+        first.execute_script.side_effect = MaxRetryError(None, "/session", reason=ConnectionRefusedError())
+        second = pool.acquire()
+        pool.release(second)
+
+        assert first is not second
+        assert pool.size == 1
+        assert pool.acquire() is second
+
+    def test_selenium_parser_returns_driver_to_pool(self):
+        """SeleniumParser с пулом возвращает сессию в пул вместо quit()."""
+        driver = self._make_driver()
+        driver.title = "Pooled"
+        pool = DriverPool(Mock(return_value=driver))
+
+        with SeleniumParser(pool=pool) as parser:
+            assert parser.parse("https://example.com")["title"] == "Pooled"
+
+        driver.quit.assert_not_called()
+        assert pool.acquire() is driver
+
+
+class TestSeleniumBalancer:
+    """Тесты для балансировки между Selenium-эндпоинтами."""
+
+    URLS = ["http://node-a:4444/wd/hub", "http://node-b:4444/wd/hub"]
+
+    @staticmethod
+    def _status(free, total):
+        slots = [{"session": None}] * free + [{"session": {"id": "busy"}}] * (total - free)
+        response = Mock()
+        response.json.return_value = {"value": {"ready": free > 0, "nodes": [{"availability": "UP", "slots": slots}]}}
+        return response
+
+    def test_routes_to_least_loaded_node(self):
+        """Сессия открывается на узле с наибольшим числом свободных слотов."""
+        statuses = {
+            "http://node-a:4444/status": self._status(free=1, total=4),
+            "http://node-b:4444/status": self._status(free=3, total=4),
+        }
+
+        with patch("src.parsers.selenium_nodes.requests.get", side_effect=lambda url, timeout: statuses[url]), \
+             patch("src.parsers.selenium_nodes.create_remote_driver") as mock_create:
+            balancer = SeleniumBalancer(self.URLS)
+            balancer.create_driver()
+
+        mock_create.assert_called_once_with("http://node-b:4444/wd/hub", headless=True)
+        stats = balancer.get_stats()
+        assert stats["http://node-b:4444/wd/hub"]["active_sessions"] == 1
+        assert stats["http://node-b:4444/wd/hub"]["free_slots"] == 2
+
+    def test_failover_on_network_error(self):
+        """Если узел не создал сессию, она создаётся на следующем."""
+        statuses = {
+            "http://node-a:4444/status": self._status(free=4, total=4),
+            "http://node-b:4444/status": self._status(free=1, total=4),
+        }
+        driver = MagicMock()
+
+        def create(url, headless):
+            if "node-a" in url:
+                raise NetworkError("Не удалось подключиться к Selenium")
+            return driver
+
+        with patch("src.parsers.selenium_nodes.requests.get", side_effect=lambda url, timeout: statuses[url]), \
+             patch("src.parsers.selenium_nodes.create_remote_driver", side_effect=create):
+            balancer = SeleniumBalancer(self.URLS)
+            assert balancer.create_driver() is driver
+
+            stats = balancer.get_stats()
+            assert stats["http://node-a:4444/wd/hub"]["failures"] == 1
+            assert stats["http://node-a:4444/wd/hub"]["healthy"] is False
+
+            balancer.release_driver(driver)
+
+        driver.quit.assert_called_once()
+        assert balancer.get_stats()["http://node-b:4444/wd/hub"]["active_sessions"] == 0
+
+    def test_failover_on_refused_connection(self):
+        """Узел не принимает соединения (MaxRetryError urllib3) - сессия создаётся на следующем."""
+        from urllib3.exceptions import MaxRetryError
+
+        statuses = {
+            "http://node-a:4444/status": self._status(free=4, total=4),
+            "http://node-b:4444/status": self._status(free=1, total=4),
+        }
+        driver = MagicMock()
+
+        def remote(command_executor, options):
+            if "node-a" in command_executor:
+                raise MaxRetryError(None, "/session", reason=ConnectionRefusedError(111, "Connection refused"))
+            return driver
+
+        with patch("src.parsers.selenium_nodes.requests.get", side_effect=lambda url, timeout: statuses[url]), \
+             patch("src.parsers.browser.webdriver.Remote", side_effect=remote):
+            balancer = SeleniumBalancer(self.URLS)
+            assert balancer.create_driver() is driver
+
+        stats = balancer.get_stats()
+        assert stats["http://node-a:4444/wd/hub"]["failures"] == 1
+        assert stats["http://node-a:4444/wd/hub"]["healthy"] is False
+        assert stats["http://node-b:4444/wd/hub"]["active_sessions"] == 1
+
+    def test_status_probe_outside_lock(self):
+        """Запрос /status идёт без блокировки балансировщика."""
+        locked = []
+
+        def get(url, timeout):
+            locked.append(balancer._lock.locked())
+            return self._status(free=1, total=1)
+
+        with patch("src.parsers.selenium_nodes.requests.get", side_effect=get), \
+             patch("src.parsers.selenium_nodes.create_remote_driver"):
+            balancer = SeleniumBalancer(self.URLS)
+            balancer.create_driver()
+
+        assert locked == [False, False]
+        assert balancer.get_stats()["http://node-a:4444/wd/hub"]["total_slots"] == 1
+
+    def test_unreachable_status_excludes_node(self):
+        """Узел, не ответивший на /status, не получает сессий."""
+        def get(url, timeout):
+            if "node-a" in url:
+                raise requests.exceptions.ConnectionError("refused")
+            return self._status(free=1, total=1)
+
+        with patch("src.parsers.selenium_nodes.requests.get", side_effect=get), \
+             patch("src.parsers.selenium_nodes.create_remote_driver") as mock_create:
+            SeleniumBalancer(self.URLS).create_driver()
+
+        mock_create.assert_called_once_with("http://node-b:4444/wd/hub", headless=True)
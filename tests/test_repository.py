@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from src.db.models import ScrapingTask
 
 
@@ -36,4 +38,522 @@ def test_update_status(repository):
     updated_task = repository.get_by_id(task.id)
     assert updated_task.status == "done"
     assert updated_task.result == {"foo": "bar"}
-    assert updated_task.completed_at is not None
\ No newline at end of file
+    assert updated_task.completed_at is not None
+
+def test_add_many(repository, db_session):
+    """
+    Пакетное добавление задач сохраняет порядок id
+    """
+    urls = ["http://a.com", "http://b.com", "http://c.com"]
+    task_ids = repository.add_many([(url, "http", None, "normal") for url in urls])
+
+    assert len(task_ids) == 3
+    for task_id, url in zip(task_ids, urls):
+        task = repository.get_by_id(task_id)
+        assert task.url == url
+        assert task.method == "http"
+        assert task.url_hash is not None
+        assert task.status == "pending"
+        assert task.created_at is not None
+
+
+def test_update_status_many(repository):
+    """
+    Пакетное обновление статусов не затирает result, если он не передан
+    """
+    first, second = repository.add_many([("http://a.com", "http", None, "normal"), ("http://b.com", "http", None, "normal")])
+    repository.update_status(first, "processing", result={"old": True})
+
+    repository.update_status_many([
+        {"id": first, "status": "done", "result": None, "completed_at": None},
+        {"id": second, "status": "error", "result": {"error": "boom"}, "completed_at": datetime.utcnow()},
+    ])
+
+    first_task = repository.get_by_id(first)
+    second_task = repository.get_by_id(second)
+    assert first_task.status == "done"
+    assert first_task.result == {"old": True}
+    assert second_task.status == "error"
+    assert second_task.result == {"error": "boom"}
+    assert second_task.completed_at is not None
+
+
+def test_bulk_update_statement_postgres():
+    """
+    Для PostgreSQL используется один UPDATE ... FROM (VALUES ...)
+    """
+    from sqlalchemy.dialects import postgresql
+    from src.repositories.task_repository import TaskRepository
+
+    statement = TaskRepository._bulk_update_statement([
+        {"id": "a", "status": "done", "result": {"x": 1}, "completed_at": datetime.utcnow()},
+        {"id": "b", "status": "processing", "result": None, "completed_at": None},
+    ])
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("UPDATE") == 1
+    assert "FROM (VALUES" in sql
+    assert (
+        "AS v (id, status, result, completed_at, cache_hit, attempts, next_retry_at, error_message)"
+        in sql
+    )
+    assert "attempts=coalesce(CAST(v.attempts AS INTEGER), scraping_tasks.attempts)" in sql
+
+
+def test_buffered_status_writer(repository):
+    """
+    Write-behind: смены статуса схлопываются и пишутся одним сбросом
+    """
+    from unittest.mock import patch
+    from src.repositories.status_writer import BufferedStatusWriter
+
+    task_id = repository.add("http://example.com").id
+    writer = BufferedStatusWriter(repository, max_batch=100, flush_interval=60)
+
+    with patch.object(repository, "update_status_many", wraps=repository.update_status_many) as bulk:
+        writer.update_status(task_id, "processing")
+        writer.update_status(task_id, "done", result={"title": "ok"})
+
+        assert repository.get_by_id(task_id).status == "pending"
+
+        writer.close()
+
+    bulk.assert_called_once()
+    task = repository.get_by_id(task_id)
+    assert task.status == "done"
+    assert task.result == {"title": "ok"}
+    assert task.completed_at is not None
+
+
+def test_buffered_status_writer_flushes_on_size(repository):
+    """
+    Буфер сбрасывается сразу, когда набралось max_batch задач
+    """
+    from src.repositories.status_writer import BufferedStatusWriter
+
+    task_ids = repository.add_many([("http://a.com", "http", None, "normal"), ("http://b.com", "http", None, "normal")])
+    writer = BufferedStatusWriter(repository, max_batch=2, flush_interval=60)
+
+    writer.update_status(task_ids[0], "processing")
+    assert repository.get_by_id(task_ids[0]).status == "pending"
+
+    writer.update_status(task_ids[1], "processing")
+    assert [repository.get_by_id(t).status for t in task_ids] == ["processing", "processing"]
+    writer.close()
+
+
+def test_normalize_url():
+    """
+    Канонический вид URL: регистр, порт по умолчанию, порядок параметров, utm и фрагмент
+    """
+    from src.core.urls import normalize_url, url_hash
+
+    assert normalize_url("HTTP://Example.COM:80?b=2&a=1&utm_source=x#top") == "http://example.com/?a=1&b=2"
+    assert normalize_url("https://example.com:8443/path") == "https://example.com:8443/path"
+    assert url_hash("http://example.com/?a=1&b=2") == url_hash("http://EXAMPLE.com?b=2&a=1")
+    assert len(url_hash("http://example.com")) == 40
+
+
+def test_find_fresh_result(repository):
+    """
+    Свежий результат ищется по каноническому URL и методу среди завершённых задач
+    """
+    from datetime import timedelta
+
+    task = repository.add("http://example.com/?b=2&a=1", "http")
+    repository.update_status(task.id, "done", result={"title": "ok"})
+    since = datetime.utcnow() - timedelta(minutes=1)
+
+    found = repository.find_fresh_result("http://EXAMPLE.com?a=1&b=2", "http", since)
+    assert found is not None
+    assert found[1] == {"title": "ok"}
+
+    assert repository.find_fresh_result("http://example.com/?a=1&b=2", "selenium", since) is None
+    assert repository.find_fresh_result(
+        "http://example.com/?a=1&b=2", "http", datetime.utcnow() + timedelta(minutes=1)
+    ) is None
+
+
+def test_result_cache(repository):
+    """
+    Кэш результатов: попадание из памяти, из БД, промах и вытеснение по LRU
+    """
+    from src.services.result_cache import ResultCache
+
+    cache = ResultCache(repository, max_entries=2)
+
+    assert cache.get("http://a.com", "http", max_age=60) is None
+
+    cache.put("http://a.com", "http", {"title": "a"})
+    assert cache.get("http://A.com/", "http", max_age=60) == {"title": "a"}
+
+    cache.put("http://b.com", "http", {"title": "b"})
+    cache.put("http://c.com", "http", {"title": "c"})
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2}
+
+    # В памяти уже нет, но есть завершённая задача в БД
+    task = repository.add("http://a.com", "http")
+    repository.update_status(task.id, "done", result={"title": "from db"})
+    assert cache.get("http://a.com", "http", max_age=60) == {"title": "from db"}
+    assert cache.stats()["hits"] == 2
+
+
+def test_add_coalesces_in_flight(repository):
+    """
+    Повторная задача для URL в работе присоединяется к ведущей и получает её результат
+    """
+    leader = repository.add("http://example.com/?a=1", "http", coalesce=True)
+    follower = repository.add("http://EXAMPLE.com?a=1", "http", coalesce=True)
+    other_method = repository.add("http://example.com/?a=1", "selenium", coalesce=True)
+
+    assert leader.leader_id is None
+    assert follower.leader_id == leader.id
+    assert other_method.leader_id is None
+
+    repository.update_status(leader.id, "processing")
+    assert repository.get_by_id(follower.id).status == "processing"
+
+    repository.update_status(leader.id, "done", result={"title": "ok"})
+    follower_task = repository.get_by_id(follower.id)
+    assert follower_task.status == "done"
+    assert follower_task.result == {"title": "ok"}
+    assert follower_task.completed_at is not None
+
+    # Ведущая завершена - новая задача снова выполняется сама
+    assert repository.add("http://example.com/?a=1", "http", coalesce=True).leader_id is None
+
+
+def test_add_many_coalesced(repository):
+    """
+    Дубликаты в пачке и задачи в работе присоединяются, bulk UPDATE обновляет присоединённые
+    """
+    in_flight = repository.add("http://a.com", "http").id
+
+    created = repository.add_many_coalesced([
+        ("http://a.com/", "http", None, "normal"),
+        ("http://b.com", "http", None, "normal"),
+        ("http://B.com/", "http", None, "normal"),
+    ])
+    (first, first_leader), (second, second_leader), (third, third_leader) = created
+
+    assert first_leader == in_flight
+    assert second_leader is None
+    assert third_leader == second
+
+    repository.update_status_many([
+        {"id": in_flight, "status": "done", "result": {"title": "a"}, "completed_at": datetime.utcnow()},
+        {"id": second, "status": "error", "result": {"error": "boom"}, "completed_at": datetime.utcnow()},
+    ])
+
+    assert repository.get_by_id(first).result == {"title": "a"}
+    assert repository.get_by_id(third).status == "error"
+    assert repository.get_by_id(third).result == {"error": "boom"}
+
+
+def test_bulk_update_statement_followers_postgres():
+    """
+    Присоединённые задачи обновляются тем же UPDATE ... FROM (VALUES ...) по leader_id
+    """
+    from sqlalchemy.dialects import postgresql
+    from src.repositories.task_repository import TaskRepository
+
+    statement = TaskRepository._bulk_update_statement(
+        [{"id": "a", "status": "done", "result": {"x": 1}, "completed_at": datetime.utcnow()}],
+        followers=True,
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "scraping_tasks.leader_id = CAST(v.id AS UUID)" in sql
+    assert "status=CAST(v.status AS task_status)" in sql
+    assert "scraping_tasks.status IN" in sql
+    assert "attempts=" not in sql
+
+
+def test_validator_repository(db_session):
+    """
+    Валидаторы хранятся по каноническому URL и перезаписываются
+    """
+    from src.parsers.revalidation import CachedPage
+    from src.repositories.validator_repository import ValidatorRepository
+
+    validators = ValidatorRepository(session_factory=lambda: db_session)
+    assert validators.get("http://example.com") is None
+
+    validators.save("http://example.com", CachedPage('"v1"', None, {"title": "a"}))
+    validators.save("http://EXAMPLE.com/", CachedPage('"v2"', "Mon, 01 Jan 2024 00:00:00 GMT", {"title": "b"}))
+
+    page = validators.get("http://example.com")
+    assert page.etag == '"v2"'
+    assert page.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert page.result == {"title": "b"}
+
+
+def test_mark_retry(repository):
+    """
+    Перезапланированная задача хранит число попыток и время повтора, присоединённые - статус
+    """
+    leader = repository.add("http://flaky.com", "http", coalesce=True)
+    follower = repository.add("http://flaky.com", "http", coalesce=True)
+    next_retry_at = datetime(2030, 1, 1)
+
+    repository.mark_retry(leader.id, 2, next_retry_at, "HTTP ошибка: 503")
+
+    task = repository.get_by_id(leader.id)
+    assert task.status == "retrying"
+    assert task.attempts == 2
+    assert task.next_retry_at == next_retry_at
+    assert task.error_message == "HTTP ошибка: 503"
+    assert repository.get_by_id(follower.id).status == "retrying"
+
+    # Задача в повторе всё ещё в работе - новые дубликаты присоединяются к ней
+    assert repository.add("http://flaky.com", "http", coalesce=True).leader_id == leader.id
+
+
+def test_update_status_many_retrying(repository):
+    """
+    Перезапланирование в пакетном UPDATE - как mark_retry: попытки и время повтора у задачи,
+    статус - и у присоединённых
+    """
+    leader = repository.add("http://flaky.com", "http", coalesce=True)
+    follower = repository.add("http://flaky.com", "http", coalesce=True)
+    next_retry_at = datetime(2030, 1, 1)
+
+    repository.update_status_many([{
+        "id": leader.id,
+        "status": "retrying",
+        "attempts": 1,
+        "next_retry_at": next_retry_at,
+        "error_message": "HTTP ошибка: 503",
+    }])
+
+    task = repository.get_by_id(leader.id)
+    assert (task.status, task.attempts, task.next_retry_at) == ("retrying", 1, next_retry_at)
+    assert task.error_message == "HTTP ошибка: 503"
+    follower_task = repository.get_by_id(follower.id)
+    assert (follower_task.status, follower_task.attempts) == ("retrying", 0)
+
+
+def test_find_fresh_results(repository):
+    """
+    Свежие результаты для пакета URL - одним запросом, по последней завершённой задаче
+    """
+    from datetime import timedelta
+    from unittest.mock import patch
+    from src.services.result_cache import ResultCache
+
+    old, new, other = (
+        repository.add(url, method)
+        for url, method in [("http://a.com/", "http"), ("http://A.com", "http"), ("http://b.com", "selenium")]
+    )
+    repository.update_status_many([
+        {"id": old.id, "status": "done", "result": {"v": 1}, "completed_at": datetime.utcnow() - timedelta(minutes=5)},
+        {"id": new.id, "status": "done", "result": {"v": 2}, "completed_at": datetime.utcnow()},
+        {"id": other.id, "status": "done", "result": {"v": 3}, "completed_at": datetime.utcnow()},
+    ])
+    since = datetime.utcnow() - timedelta(minutes=1)
+
+    found = repository.find_fresh_results([
+        ("http://a.com", "http", None, since),
+        ("http://b.com", "http", None, since),
+        ("http://b.com", "selenium", None, since),
+        ("http://a.com", "http", "product", since),
+        ("http://a.com", "http", None, datetime.utcnow() + timedelta(minutes=1)),
+    ])
+    assert [entry and entry[1] for entry in found] == [{"v": 2}, None, {"v": 3}, None, None]
+
+    cache = ResultCache(repository)
+    cache.put("http://c.com", "http", {"v": 4})
+    with patch.object(repository, "find_fresh_results", wraps=repository.find_fresh_results) as lookup:
+        results = cache.get_many([
+            ("http://c.com", "http", 60, None),
+            ("http://a.com", "http", 60, None),
+            ("http://d.com", "http", 60, None),
+        ])
+    assert results == [{"v": 4}, {"v": 2}, None]
+    lookup.assert_called_once()
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_retry_policy():
+    """
+    Экспоненциальная задержка с разбросом, Retry-After важнее
+    """
+    from src.parsers.exceptions import NetworkError
+    from src.services.retry_policy import RetryPolicy
+
+    policy = RetryPolicy(max_retries=3, base_delay=2.0, max_delay=10.0)
+
+    assert 1.0 <= policy.delay(0) <= 2.0
+    assert 4.0 <= policy.delay(2) <= 8.0
+    assert 5.0 <= policy.delay(10) <= 10.0
+    assert policy.delay(0, retry_after=60) == 60
+
+    assert policy.should_retry(NetworkError("timeout"), 0)
+    assert policy.should_retry(NetworkError("busy", status_code=503), 2)
+    assert not policy.should_retry(NetworkError("busy", status_code=503), 3)
+    assert not policy.should_retry(NetworkError("gone", status_code=404), 0)
+    assert not policy.should_retry(ValueError("bug"), 0)
+
+
+def test_coalescing_respects_priority(repository):
+    """
+    Срочная задача не присоединяется к массовой в очереди, массовая к срочной - да
+    """
+    bulk = repository.add("http://shop.com/item", "http", coalesce=True, priority="low")
+    urgent = repository.add("http://shop.com/item", "http", coalesce=True, priority="high")
+    later_bulk = repository.add("http://shop.com/item", "http", coalesce=True, priority="low")
+
+    assert urgent.leader_id is None
+    assert later_bulk.leader_id == bulk.id
+
+    created = repository.add_many_coalesced([
+        ("http://shop.com/item", "http", None, "normal"),
+        ("http://new.com", "http", None, "low"),
+        ("http://new.com", "http", None, "high"),
+        ("http://new.com", "http", None, "normal"),
+    ])
+    assert created[0][1] == urgent.id
+    assert created[1][1] is None
+    assert created[2][1] is None
+    assert created[3][1] == created[2][0]
+
+
+def test_async_task_repository(async_repository, db_session):
+    """
+    AsyncTaskRepository поверх той же базы: создание, присоединение, чтение
+    """
+    import asyncio
+
+    repository = async_repository
+
+    async def scenario():
+        leader = await repository.add("http://async.com", "http", coalesce=True)
+        follower = await repository.add("http://async.com/", "http", coalesce=True)
+        created = await repository.add_many_coalesced([
+            ("http://async.com", "http", None, "low"),
+            ("http://other.com", "http", None, "normal"),
+        ])
+        plain = await repository.add_many([("http://plain.com", "http", None, "low")])
+        return leader, follower, created, plain, await repository.get_by_id(follower.id)
+
+    leader, follower, created, plain, loaded = asyncio.run(scenario())
+
+    assert follower.leader_id == leader.id
+    assert created[0][1] == leader.id
+    assert created[1][1] is None
+    assert loaded.leader_id == leader.id and loaded.status == "pending"
+    assert db_session.query(ScrapingTask).count() == 5
+    assert db_session.get(ScrapingTask, plain[0]).priority == "low"
+    assert db_session.get(ScrapingTask, plain[0]).domain == "plain.com"
+
+
+def test_database_urls():
+    from src.db.database import async_url, pool_options
+
+    assert async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_url("sqlite:///test.db") == "sqlite+aiosqlite:///test.db"
+    assert pool_options("postgresql+asyncpg://db/app", pool_size=5)["pool_size"] == 5
+    assert pool_options("postgresql://db/app")["pool_pre_ping"] is True
+    assert pool_options("sqlite+aiosqlite:///test.db") == {}
+
+
+def _status_cache_redis(*responses):
+    from unittest.mock import MagicMock
+
+    redis = MagicMock()
+    pipe = redis.pipeline.return_value.__enter__.return_value
+    pipe.execute.side_effect = list(responses)
+    return redis, pipe
+
+
+def test_status_cache_read_through(repository, async_repository):
+    """
+    Промах кэша читается из БД и дозаполняет кэш; смена статуса пишется сквозь кэш
+    """
+    import asyncio
+    from src.repositories.status_cache import TaskStatusCache
+
+    task = repository.add("http://cached.com")
+    redis, pipe = _status_cache_redis([{}], [1])
+    cache = TaskStatusCache(redis, ttl=60)
+    async_repository.status_cache = cache
+
+    views = asyncio.run(async_repository.get_statuses([task.id]))
+
+    assert views[task.id]["status"] == "pending"
+    fill = redis.register_script.return_value
+    args = fill.call_args[1]["args"]
+    assert fill.call_args[1]["keys"] == [f"task:status:{task.id}"]
+    assert args[0] == 60 and "created_at" in args
+
+    redis, pipe = _status_cache_redis([1, 1])
+    repository.status_cache = TaskStatusCache(redis, ttl=60)
+    repository.update_status(task.id, "done", result={"title": "ok"})
+
+    pipe.hset.assert_called_once_with(
+        f"task:status:{task.id}", mapping={"status": '"done"', "result": '{"title": "ok"}'}
+    )
+    pipe.publish.assert_called_once_with(
+        f"task:events:{task.id}", f'{{"id": "{task.id}", "status": "done"}}'
+    )
+
+
+def test_status_cache_followers():
+    """
+    Присоединённая задача берёт статус ведущей; неполные записи и ошибки Redis - промах
+    """
+    from redis import RedisError
+    from src.repositories.status_cache import TaskStatusCache
+
+    follower = {
+        b"id": b'"f"', b"status": b'"pending"', b"created_at": b'"2024-01-01T00:00:00"',
+        b"leader_id": b'"l"', b"result": b"null",
+    }
+    partial = {b"status": b'"processing"'}
+    redis, _ = _status_cache_redis([follower, partial], [[b'"done"', b'{"a": 1}']])
+    views = TaskStatusCache(redis).get_many(["f", "l"])
+
+    assert list(views) == ["f"]
+    assert views["f"]["status"] == "done"
+    assert views["f"]["result"] == {"a": 1}
+
+    redis, _ = _status_cache_redis([follower], [[None, None]])
+    assert TaskStatusCache(redis).get_many(["f"]) == {}
+
+    redis, _ = _status_cache_redis(RedisError("down"))
+    assert TaskStatusCache(redis).get_many(["f"]) == {}
+
+
+def test_backfill_batches():
+    """
+    Backfill идёт пакетами по первичному ключу и повторяет пакет после ошибки БД
+    """
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock, patch
+    from sqlalchemy.exc import OperationalError
+    from src.db.backfill import backfill
+
+    results = [
+        SimpleNamespace(last_id="b", updated=2),
+        OperationalError("UPDATE", {}, Exception("lock timeout")),
+        SimpleNamespace(last_id="d", updated=1),
+        SimpleNamespace(last_id=None, updated=0),
+    ]
+    calls = []
+
+    def execute(statement, params=None):
+        if params is None:
+            return None
+        calls.append(params["after"])
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return MagicMock(one=MagicMock(return_value=result))
+
+    engine = MagicMock()
+    engine.begin.return_value.__enter__.return_value.execute.side_effect = execute
+
+    with patch("src.db.backfill.time.sleep"):
+        assert backfill(engine, batch_size=2, after="") == 3
+
+    assert calls == ["", "b", "b", "d"]
@@ -51,4 +51,575 @@ def test_celery_task_failure():
             task_id, 
             "error", 
             result={"error": "Parsing Failed!"}
-        )
\ No newline at end of file
+        )
+
+def test_celery_task_result_cache_hit():
+    """
+    При max_age и свежем результате в кэше парсинг не выполняется
+    """
+    task_id = "cached-id"
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service):
+
+        mock_container.task_repository.return_value = mock_repo
+        mock_container.result_cache.return_value.get.return_value = {"title": "Cached"}
+
+        parse_url_task.apply(
+            args=["http://test-celery.com", "http"],
+            kwargs={"max_age": 3600},
+            task_id=task_id,
+        )
+
+        mock_container.result_cache.return_value.get.assert_called_once_with(
+            "http://test-celery.com", "http", 3600, spec=None
+        )
+        mock_parser_service.parse.assert_not_called()
+        mock_repo.update_status.assert_called_once_with(
+            task_id, "done", result={"title": "Cached"}, cache_hit=True
+        )
+
+
+def test_celery_task_deferred_by_rate_limit():
+    """
+    Домен превысил лимит - задача откладывается через retry, парсинг не начинается
+    """
+    from celery.exceptions import Retry
+    from src.services.rate_limiter import Reservation
+
+    task_id = "limited-id"
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service), \
+         patch.object(parse_url_task, "retry", side_effect=Retry()) as mock_retry:
+
+        mock_container.task_repository.return_value = mock_repo
+        mock_container.rate_limiter.return_value.acquire.return_value = Reservation(False, 2.0)
+
+        parse_url_task.apply(args=["http://busy.example.com/page", "http"], task_id=task_id)
+
+        mock_container.rate_limiter.return_value.acquire.assert_called_once_with("busy.example.com")
+        assert mock_retry.call_args.kwargs["countdown"] == 2.0
+        assert mock_retry.call_args.kwargs["kwargs"]["reserved"] is True
+        mock_parser_service.parse.assert_not_called()
+        mock_repo.update_status.assert_not_called()
+
+
+def test_celery_task_deferred_beyond_reservation_limit():
+    """
+    Слоты домена расписаны дальше max_delay - задача откладывается без слота
+    и снова спрашивает лимит; такие откладывания не упираются в лимит повторов Celery
+    """
+    from src.services.rate_limiter import Reservation
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.return_value = {"title": "Late"}
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service), \
+         patch.object(parse_url_task, "retry", wraps=parse_url_task.retry) as mock_retry:
+
+        mock_container.task_repository.return_value = mock_repo
+        mock_container.rate_limiter.return_value.acquire.side_effect = (
+            [Reservation(False, 600.0, reserved=False)] * 4 + [Reservation(True)]
+        )
+
+        result = parse_url_task.apply(args=["http://busy.example.com/page", "http"], task_id="late-id")
+
+        assert result.get() == {"title": "Late"}
+        assert mock_container.rate_limiter.return_value.acquire.call_count == 5
+        countdowns = [c.kwargs["countdown"] for c in mock_retry.call_args_list]
+        assert len(countdowns) == 4
+        assert all(600.0 <= c <= 660.0 for c in countdowns)
+        assert all(c.kwargs["kwargs"]["reserved"] is False for c in mock_retry.call_args_list)
+        mock_repo.update_status.assert_called_with("late-id", "done", result={"title": "Late"})
+
+
+def test_celery_task_runs_in_reserved_slot():
+    """
+    Задача, отложенная лимитом, запускается в свой слот без повторного acquire
+    """
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.return_value = {"title": "Slot"}
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service):
+
+        mock_container.task_repository.return_value = mock_repo
+
+        result = parse_url_task.apply(
+            args=["http://busy.example.com/page", "http"],
+            kwargs={"reserved": True},
+            task_id="slot-id",
+        )
+
+        assert result.get() == {"title": "Slot"}
+        mock_container.rate_limiter.return_value.acquire.assert_not_called()
+        mock_repo.update_status.assert_called_with("slot-id", "done", result={"title": "Slot"})
+
+
+def test_celery_task_retries_transient_error():
+    """
+    Временная сетевая ошибка - задача перезапускается с задержкой не меньше Retry-After
+    """
+    from src.parsers.exceptions import NetworkError
+
+    task_id = "retry-id"
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.side_effect = [
+        NetworkError("busy", status_code=503, retry_after=30),
+        {"title": "Recovered"},
+    ]
+
+    # Настоящий Task.retry: в apply() перезапуск выполняется сразу
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service), \
+         patch.object(parse_url_task, "retry", wraps=parse_url_task.retry) as mock_retry:
+
+        mock_container.task_repository.return_value = mock_repo
+
+        result = parse_url_task.apply(args=["http://flaky.example.com", "http"], task_id=task_id)
+
+        assert result.get() == {"title": "Recovered"}
+        retry_kwargs = mock_retry.call_args.kwargs
+        assert retry_kwargs["countdown"] >= 30
+        assert retry_kwargs["kwargs"]["attempt"] == 1
+        mock_repo.mark_retry.assert_called_once()
+        assert mock_repo.mark_retry.call_args.args[:2] == (task_id, 1)
+        mock_container.rate_limiter.return_value.penalize.assert_called_once_with("flaky.example.com", 30)
+
+
+def test_celery_task_retries_beyond_celery_default_limit():
+    """
+    Перезапуски ограничивает только RetryPolicy: после откладывания по лимиту домена
+    (request.retries уже 3) временная ошибка всё равно перезапускает задачу
+    """
+    from src.parsers.exceptions import NetworkError
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.side_effect = [
+        NetworkError("timeout"),
+        NetworkError("timeout"),
+        {"title": "Finally"},
+    ]
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service):
+
+        mock_container.task_repository.return_value = mock_repo
+
+        result = parse_url_task.apply(
+            args=["http://flaky.example.com", "http"],
+            kwargs={"attempt": 1, "reserved": True},
+            task_id="long-retry-id",
+            retries=3,
+        )
+
+        assert result.get() == {"title": "Finally"}
+        assert [c.args[1] for c in mock_repo.mark_retry.call_args_list] == [2, 3]
+        mock_repo.update_status.assert_called_with("long-retry-id", "done", result={"title": "Finally"})
+
+
+def test_celery_task_gives_up_after_max_retries():
+    """
+    Последняя попытка или постоянная ошибка (404) - статус error без перезапуска
+    """
+    from src.parsers.exceptions import NetworkError
+    from src.worker.tasks import retry_policy
+
+    for kwargs, error in (
+        ({"attempt": retry_policy.max_retries}, NetworkError("timeout")),
+        ({}, NetworkError("not found", status_code=404)),
+    ):
+        mock_repo = MagicMock()
+        mock_parser_service = MagicMock()
+        mock_parser_service.parse.side_effect = error
+
+        with patch("src.worker.tasks.container") as mock_container, \
+             patch("src.worker.tasks.ParserService", return_value=mock_parser_service), \
+             patch.object(parse_url_task, "retry") as mock_retry:
+
+            mock_container.task_repository.return_value = mock_repo
+
+            with pytest.raises(NetworkError):
+                parse_url_task.apply(
+                    args=["http://bad-url.com", "http"], kwargs=kwargs, task_id="final-id", throw=True
+                )
+
+            mock_retry.assert_not_called()
+            mock_repo.update_status.assert_called_with("final-id", "error", result={"error": str(error)})
+
+
+def test_tasks_are_routed_by_method():
+    """
+    http и auto - в HTTP-очередь, selenium - в браузерную
+    """
+    from src.worker.celery_app import PARSE_TASK_NAME, celery_app, route_task
+    from src.worker.tasks import settings
+
+    assert parse_url_task.name == PARSE_TASK_NAME
+    assert parse_url_task.app is celery_app
+
+    def queue(method):
+        return route_task(PARSE_TASK_NAME, ["http://a.com", method], {}, {})["queue"]
+
+    assert queue("http") == queue("auto") == settings.CELERY_HTTP_QUEUE
+    assert queue("selenium") == settings.CELERY_BROWSER_QUEUE
+    assert route_task("other.task", [], {}, {}) is None
+
+    # Очереди не делят биржу и ключ маршрутизации
+    routed = celery_app.amqp.router.route({}, PARSE_TASK_NAME, ["http://a.com", "selenium"], {})["queue"]
+    assert routed.exchange.name == routed.routing_key == settings.CELERY_BROWSER_QUEUE
+
+
+def test_worker_profiles():
+    """
+    У каждого профиля своя очередь, пул и параллелизм в командной строке celery
+    """
+    from src.worker.celery_app import worker_argv
+    from src.worker.tasks import settings
+
+    argv = worker_argv("http", ["--loglevel=info"])
+    assert argv[argv.index("-Q") + 1] == settings.CELERY_HTTP_QUEUE
+    assert argv[argv.index("-P") + 1] == settings.WORKER_HTTP_POOL
+    assert argv[argv.index("-c") + 1] == str(settings.WORKER_HTTP_CONCURRENCY)
+    assert argv[-1] == "--loglevel=info"
+
+    argv = worker_argv("browser")
+    assert argv[argv.index("-Q") + 1] == settings.CELERY_BROWSER_QUEUE
+    assert argv[argv.index("--prefetch-multiplier") + 1] == "1"
+
+    with pytest.raises(ValueError):
+        worker_argv("gpu")
+
+
+def test_selenium_stats_published():
+    """
+    Процесс, открывавший сессии Selenium, публикует счётчики узлов после задачи
+    """
+    from src.worker.tasks import _publish_selenium_stats
+
+    stats = {"http://node-a:4444/wd/hub": {"active_sessions": 1}}
+    task = MagicMock()
+    task.request.hostname = "browser@w1"
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.get_selenium_stats", return_value=stats):
+        _publish_selenium_stats(task=task)
+        worker, published = mock_container.selenium_stats.return_value.publish.call_args.args
+        assert worker.startswith("browser@w1:") and published == stats
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.get_selenium_stats", return_value={}):
+        _publish_selenium_stats(task=task)
+        mock_container.selenium_stats.assert_not_called()
+
+
+def test_transport_stats_published():
+    """
+    Счётчики HTTP-транспорта публикуются не чаще раза в HTTP_STATS_INTERVAL
+    """
+    from src.worker import tasks
+
+    stats = {"requests": 3, "connections": 1, "reused": 2, "hosts": {}, "dns": {"hits": 0, "misses": 1}}
+    task = MagicMock()
+    task.request.hostname = "http@w1"
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.get_transport") as mock_transport, \
+         patch("src.worker.tasks.time.monotonic", side_effect=[100.0, 105.0, 111.0]), \
+         patch.object(tasks, "_transport_stats_published_at", None):
+        mock_transport.return_value.get_stats.return_value = stats
+        for _ in range(3):
+            tasks._publish_transport_stats(task=task)
+
+        publish = mock_container.transport_stats.return_value.publish
+        assert publish.call_count == 2
+        worker, published = publish.call_args.args
+        assert worker.startswith("http@w1:") and published == stats
+
+
+def test_green_worker_sizes_db_pool():
+    """
+    Под gevent воркер переключает psycopg2 и расширяет пул БД до своего параллелизма
+    """
+    from src.worker.tasks import _prepare_db_for_green_pool, settings
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.make_psycopg2_green", return_value=True):
+        _prepare_db_for_green_pool(sender=MagicMock(concurrency=settings.DB_POOL_SIZE + 90))
+        mock_container.db.add_kwargs.assert_called_once_with(max_overflow=90)
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.make_psycopg2_green", return_value=False):
+        _prepare_db_for_green_pool(sender=MagicMock(concurrency=4))
+        mock_container.db.add_kwargs.assert_not_called()
+
+
+def test_auto_task_moves_to_browser_queue():
+    """
+    HTTP-воркер не запускает браузер: задача auto перекладывается в браузерную очередь
+    """
+    from celery.exceptions import Retry
+    from src.parsers.exceptions import BrowserRequiredError
+    from src.worker.tasks import settings
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.side_effect = BrowserRequiredError("js shell")
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service) as mock_service_cls, \
+         patch.object(parse_url_task, "retry", side_effect=Retry()) as mock_retry:
+
+        mock_container.task_repository.return_value = mock_repo
+
+        parse_url_task.apply(
+            args=["http://spa.com", "auto"],
+            task_id="auto-id",
+            routing_key=settings.CELERY_HTTP_QUEUE,
+        )
+
+        assert mock_service_cls.call_args.kwargs["browser_fallback"] is False
+        assert mock_retry.call_args.kwargs["queue"] == settings.CELERY_BROWSER_QUEUE
+        assert all(c.args[1] != "error" for c in mock_repo.update_status.call_args_list)
+
+
+def test_auto_task_moves_to_browser_queue_after_retries():
+    """
+    Перенос в браузерную очередь после исчерпанного лимита повторов Celery
+    не превращается в MaxRetriesExceededError
+    """
+    from src.parsers.exceptions import BrowserRequiredError
+    from src.worker.tasks import settings
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.side_effect = [BrowserRequiredError("js shell"), {"title": "SPA"}]
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service):
+
+        mock_container.task_repository.return_value = mock_repo
+
+        result = parse_url_task.apply(
+            args=["http://spa.com", "auto"],
+            task_id="auto-id",
+            retries=3,
+            routing_key=settings.CELERY_HTTP_QUEUE,
+        )
+
+        assert result.get() == {"title": "SPA"}
+        assert mock_parser_service.parse.call_count == 2
+        mock_repo.update_status.assert_called_with("auto-id", "done", result={"title": "SPA"})
+
+
+def test_starvation_guard():
+    """
+    Списки приоритетов передаются скрипту от высшего к низшему, ошибки Redis не мешают задачам
+    """
+    from redis import RedisError
+    from src.services.priority_lanes import StarvationGuard
+
+    script = MagicMock(return_value=1)
+    redis = MagicMock()
+    redis.register_script.return_value = script
+    guard = StarvationGuard(redis, priority_steps=[6, 0, 3], every=5, sep=":")
+
+    assert guard.task_done("parse.http") == 1
+    assert script.call_args.kwargs == {
+        "keys": ["priority:served:parse.http", "parse.http", "parse.http:3", "parse.http:6"],
+        "args": [5],
+    }
+
+    script.side_effect = RedisError("down")
+    assert guard.task_done("parse.http") == 0
+
+    script.reset_mock()
+    assert StarvationGuard(redis, priority_steps=[0, 3], every=0).task_done("parse.http") == 0
+    script.assert_not_called()
+
+
+def test_finished_task_feeds_starvation_guard():
+    """
+    После каждой задачи из очереди воркер учитывает её в защите от голодания
+    """
+    from src.worker.tasks import settings
+
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse.return_value = {"title": "ok"}
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service):
+
+        parse_url_task.apply(
+            args=["http://a.com", "http"], task_id="guard-id", routing_key=settings.CELERY_HTTP_QUEUE
+        )
+
+        mock_container.starvation_guard.return_value.task_done.assert_called_once_with(
+            settings.CELERY_HTTP_QUEUE
+        )
+        mock_container.queue_monitor.return_value.record_drain.assert_called_once_with(
+            settings.CELERY_HTTP_QUEUE
+        )
+
+
+def test_queue_monitor_admission():
+    """
+    Срочная задача принимается при длинной массовой очереди, массовая - нет; без Redis - принимается
+    """
+    from redis import RedisError
+    from src.services.admission import QueueMonitor
+
+    redis = MagicMock()
+    pipe = redis.pipeline.return_value.__enter__.return_value
+    # LLEN high, normal, low, ZCOUNT взятых воркерами high, normal, low
+    # и счётчики завершённых задач за окно (12 корзин по 5 с)
+    pipe.execute.return_value = [10, 40, 5000, 10, 0, 0, [b"60", None] + [b"60"] * 10]
+    monitor = QueueMonitor(redis, max_wait=100.0, max_depth=10_000, window=60, bucket=5)
+
+    stats = monitor.stats("parse.http")
+    assert [c.args[0] for c in pipe.zcount.call_args_list] == [
+        "queue:reserved:parse.http:high",
+        "queue:reserved:parse.http:normal",
+        "queue:reserved:parse.http:low",
+    ]
+    assert stats.reserved == {"high": 10, "normal": 0, "low": 0}
+    assert stats.drain_rate == 11.0
+    assert stats.total_depth == 5060
+    assert stats.estimated_wait("high") == 20 / 11.0
+
+    assert monitor.admit("parse.http", "high").allowed
+    assert monitor.admit("parse.http", "normal").allowed
+    rejected = monitor.admit("parse.http", "low")
+    assert not rejected.allowed
+    assert rejected.retry_after == 360  # 5060 / 11 - 100, с округлением вверх
+
+    # Ничего не завершилось - скорость неизвестна, решает только max_depth
+    monitor = QueueMonitor(redis, max_wait=100.0, max_depth=1000, stats_ttl=0)
+    pipe.execute.return_value = [0, 0, 5000, 0, 0, 0, [None] * 12]
+    assert monitor.admit("parse.http", "high").allowed
+    assert monitor.admit("parse.http", "low").retry_after == 100
+
+    redis.pipeline.side_effect = RedisError("down")
+    assert monitor.admit("parse.http", "low").allowed
+    monitor.record_drain("parse.http")
+    monitor.task_reserved("parse.http", "low", "id")
+
+
+def test_worker_marks_reserved_messages():
+    """
+    Воркер отмечает взятое сообщение при получении и снимает отметку при старте;
+    отложенные через eta не отмечаются
+    """
+    from src.worker.tasks import _mark_reserved, settings
+
+    request = MagicMock(
+        eta=None,
+        id="reserved-id",
+        delivery_info={"routing_key": settings.CELERY_HTTP_QUEUE, "priority": 6},
+    )
+    request.name = parse_url_task.name
+    deferred = MagicMock(eta="2026-10-18T12:00:00", delivery_info=request.delivery_info)
+    deferred.name = parse_url_task.name
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService") as mock_service_cls:
+
+        mock_service_cls.return_value.parse.return_value = {"title": "Ok"}
+        monitor = mock_container.queue_monitor.return_value
+
+        _mark_reserved(request=request)
+        _mark_reserved(request=deferred)
+        parse_url_task.apply(
+            args=["http://a.com", "http"],
+            kwargs={"reserved": True},
+            task_id="reserved-id",
+            routing_key=settings.CELERY_HTTP_QUEUE,
+            priority=6,
+        )
+
+    monitor.task_reserved.assert_called_once_with(settings.CELERY_HTTP_QUEUE, "low", "reserved-id")
+    monitor.task_started.assert_called_once_with(settings.CELERY_HTTP_QUEUE, "low", "reserved-id")
+
+
+def test_batch_task_reports_each_url():
+    """
+    Пакет: статусы пишутся двумя bulk UPDATE, у каждого URL свой итог,
+    временная ошибка и лимит домена перезапускают URL отдельной задачей
+    """
+    from src.parsers.exceptions import NetworkError
+    from src.services.rate_limiter import Reservation
+    from src.worker.tasks import parse_batch_task
+
+    items = [
+        {"task_id": "ok", "url": "http://a.com/1", "max_age": None, "spec": None},
+        {"task_id": "gone", "url": "http://a.com/2", "max_age": None, "spec": None},
+        {"task_id": "busy", "url": "http://a.com/3", "max_age": None, "spec": None},
+        {"task_id": "limited", "url": "http://slow.com/", "max_age": None, "spec": None},
+        {"task_id": "cached", "url": "http://a.com/4", "max_age": 60, "spec": None},
+    ]
+
+    mock_repo = MagicMock()
+    mock_parser_service = MagicMock()
+    mock_parser_service.parse_many.return_value = [
+        {"title": "One"},
+        NetworkError("not found", status_code=404),
+        NetworkError("busy", status_code=503, retry_after=30),
+    ]
+
+    with patch("src.worker.tasks.container") as mock_container, \
+         patch("src.worker.tasks.ParserService", return_value=mock_parser_service) as mock_service_cls, \
+         patch("src.worker.tasks.parse_url_task.apply_async") as mock_single:
+
+        mock_container.task_repository.return_value = mock_repo
+        mock_container.spec_registry.return_value.resolve.return_value = None
+        mock_container.rate_limiter.return_value.acquire.side_effect = lambda domain: Reservation(
+            allowed=domain != "slow.com", retry_after=2.0
+        )
+        mock_container.result_cache.return_value.get_many.return_value = [{"title": "Cached"}]
+
+        summary = parse_batch_task.apply(args=[items]).get()
+
+    mock_container.result_cache.return_value.get_many.assert_called_once_with(
+        [("http://a.com/4", "http", 60, None)]
+    )
+    mock_container.result_cache.return_value.get.assert_not_called()
+    assert summary == {"done": 2, "error": 1, "rescheduled": 2}
+    mock_service_cls.assert_called_once()
+    mock_parser_service.parse_many.assert_called_once_with(
+        ["http://a.com/1", "http://a.com/2", "http://a.com/3"], "http"
+    )
+
+    started, finished = (c.args[0] for c in mock_repo.update_status_many.call_args_list)
+    assert {row["id"]: row["status"] for row in started} == {
+        "ok": "processing", "gone": "processing", "busy": "processing", "cached": "done"
+    }
+    assert {row["id"]: row["status"] for row in finished} == {
+        "ok": "done", "gone": "error", "busy": "retrying"
+    }
+    assert finished[0]["result"] == {"title": "One"}
+
+    # Перезапланирование - в общем UPDATE пакета, а не отдельным mark_retry
+    mock_repo.mark_retry.assert_not_called()
+    retrying = next(row for row in finished if row["id"] == "busy")
+    assert retrying["attempts"] == 1 and retrying["next_retry_at"] is not None
+    rescheduled = {c.kwargs["task_id"]: c.kwargs for c in mock_single.call_args_list}
+    assert rescheduled["busy"]["kwargs"]["attempt"] == 1
+    assert rescheduled["busy"]["countdown"] >= 30
+    assert rescheduled["limited"]["kwargs"]["attempt"] == 0
+    assert rescheduled["limited"]["kwargs"]["reserved"] is True
+    assert rescheduled["limited"]["countdown"] == 2.0
+    assert rescheduled["busy"]["kwargs"]["reserved"] is False
+    assert rescheduled["limited"]["args"] == ["http://slow.com/", "http"]